@@ -19,6 +19,7 @@ import subprocess
 import sys
 import threading
 import traceback
+from collections import deque
 from typing import Optional
 
 # Third-party
@@ -26,13 +27,21 @@ from pubsub import pub
 
 # Local application
 import contact.ui.default_config as config
-from contact.message_handlers.rx_handler import on_receive
+from contact.message_handlers.rx_handler import on_receive, start_packet_worker, stop_packet_worker
 from contact.settings import set_region
 from contact.ui.colors import setup_colors
-from contact.ui.contact_ui import main_ui
+from contact.ui.contact_ui import get_packet_log_size, main_ui
 from contact.ui.splash import draw_splash
 from contact.utilities.arg_parser import setup_parser
-from contact.utilities.db_handler import init_nodedb, load_messages_from_db
+from contact.utilities.db_handler import (
+    close_db_connections,
+    init_database,
+    init_nodedb,
+    load_messages_from_db,
+    stop_db_writer,
+)
+from contact.utilities.db_maintenance import start_db_maintenance, stop_db_maintenance
+from contact.utilities.notifier import stop_notifier
 from contact.utilities.demo_data import build_demo_interface, configure_demo_database, seed_demo_messages
 from contact.utilities.input_handlers import get_list_input
 from contact.utilities.i18n import t
@@ -137,8 +146,12 @@ def initialize_globals(seed_demo: bool = False) -> None:
 
     ui_state.channel_list = []
     ui_state.all_messages = {}
+    ui_state.history_cursors = {}
+    ui_state.history_windows = {}
+    ui_state.wrapped_messages = {}
     ui_state.notifications = []
-    ui_state.packet_buffer = []
+    ui_state.packet_buffer = deque(maxlen=get_packet_log_size())
+    ui_state.packetlog_offset = 0
     ui_state.node_list = []
     ui_state.selected_channel = 0
     ui_state.selected_message = 0
@@ -150,10 +163,13 @@ def initialize_globals(seed_demo: bool = False) -> None:
     ui_state.single_pane_mode = config.single_pane_mode.lower() == "true"
     pub.subscribe(on_receive, "meshtastic.receive")
 
+    init_database()
     init_nodedb()
     if seed_demo:
         seed_demo_messages()
     load_messages_from_db()
+    start_packet_worker()
+    start_db_maintenance()
 
 
 def initialize_runtime_interface(args: object):
@@ -249,6 +265,11 @@ def start() -> None:
             pass
     finally:
         close_interface(interface_state.interface)
+        stop_packet_worker()
+        stop_notifier()
+        stop_db_maintenance()
+        stop_db_writer()
+        close_db_connections()
 
     if fatal_error is not None:
         print("Fatal error:", fatal_error)
@@ -1,193 +1,332 @@
 import logging
-import os
-import platform
-import shutil
-import time
-import subprocess
+import queue
 import threading
-from typing import Any, Dict, Optional
- # Debounce notification sounds so a burst of queued messages only plays once.
-_SOUND_DEBOUNCE_SECONDS = 0.8
-_sound_timer: Optional[threading.Timer] = None
-_sound_timer_lock = threading.Lock()
-_last_sound_request = 0.0
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
 
+from google.protobuf.json_format import MessageToDict
+from google.protobuf.message import Message
 
-def schedule_notification_sound(delay: float = _SOUND_DEBOUNCE_SECONDS) -> None:
-    """Schedule a notification sound after a short quiet period.
-
-    If more messages arrive before the delay elapses, the timer is reset.
-    This prevents playing a sound for each message when a backlog flushes.
-    """
-    global _sound_timer, _last_sound_request
-
-    now = time.monotonic()
-    with _sound_timer_lock:
-        _last_sound_request = now
-
-        # Cancel any previously scheduled sound.
-        if _sound_timer is not None:
-            try:
-                _sound_timer.cancel()
-            except Exception:
-                pass
-            _sound_timer = None
-
-        def _fire(expected_request_time: float) -> None:
-            # Only play if nothing newer has been scheduled.
-            with _sound_timer_lock:
-                if expected_request_time != _last_sound_request:
-                    return
-            play_sound()
-
-        _sound_timer = threading.Timer(delay, _fire, args=(now,))
-        _sound_timer.daemon = True
-        _sound_timer.start()
 from contact.utilities.utils import (
-    refresh_node_list,
+    decode_payload,
+    refresh_node_entry,
     add_new_message,
 )
 from contact.ui.contact_ui import (
     add_notification,
+    format_packet_log_record,
+    get_packet_log_size,
     request_ui_redraw,
 )
 from contact.utilities.db_handler import (
     save_message_to_db,
     maybe_store_nodeinfo_in_db,
-    get_name_from_database,
+    save_telemetry_samples,
     update_node_info_in_db,
 )
-import contact.ui.default_config as config
+from contact.utilities.message_store import MessageStore
+from contact.utilities.notifier import notify_message
 
 from contact.utilities.singleton import ui_state, interface_state, app_state, menu_state
 
+# Packets are handed from the radio reader thread to a worker that does the processing
+PACKET_QUEUE_SIZE = 4096
+PACKET_WORKER_JOIN_TIMEOUT_SECONDS = 5.0
 
-def play_sound():
-    try:
-        system = platform.system()
-        sound_path = None
-        executable = None
-
-        if system == "Darwin":  # macOS
-            sound_path = "/System/Library/Sounds/Ping.aiff"
-            executable = "afplay"
-
-        elif system == "Linux":
-            ogg_path = "/usr/share/sounds/freedesktop/stereo/complete.oga"
-            wav_path = "/usr/share/sounds/alsa/Front_Center.wav"  # common fallback
-
-            if shutil.which("paplay") and os.path.exists(ogg_path):
-                executable = "paplay"
-                sound_path = ogg_path
-            elif shutil.which("ffplay") and os.path.exists(ogg_path):
-                executable = "ffplay"
-                sound_path = ogg_path
-            elif shutil.which("aplay") and os.path.exists(wav_path):
-                executable = "aplay"
-                sound_path = wav_path
-            else:
-                logging.warning("No suitable sound player or sound file found on Linux")
-
-        if executable and sound_path:
-            cmd = [executable, sound_path]
-            if executable == "ffplay":
-                cmd = [executable, "-nodisp", "-autoexit", sound_path]
-
-            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return
+_packet_queue: "queue.Queue[object]" = queue.Queue(maxsize=PACKET_QUEUE_SIZE)
+_packet_worker_thread: Optional[threading.Thread] = None
+_packet_worker_lock = threading.Lock()
+_PACKET_WORKER_STOP = object()
 
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Sound playback failed: {e}")
-    except Exception as e:
-        logging.error(f"Unexpected error: {e}")
+PrepareHook = Callable[[Dict[str, Any], Optional[Message]], None]
+ApplyHook = Callable[[Dict[str, Any], Optional[Message]], Optional[Callable[[], None]]]
 
+# Values stored as per-node time series, by the group they arrive in; see db_handler.save_telemetry_samples
+RECORDED_METRICS = {
+    "deviceMetrics": ("batteryLevel", "voltage", "channelUtilization", "airUtilTx"),
+    "environmentMetrics": ("temperature", "relativeHumidity", "barometricPressure"),
+    "position": ("latitude", "longitude", "altitude"),
+}
 
-def on_receive(packet: Dict[str, Any], interface: Any) -> None:
+
+def _append_packet_log_record(record: str) -> None:
+    """Add a preformatted record to the packet log. Caller holds app_state.lock."""
+    packet_log_size = get_packet_log_size()
+    if ui_state.packet_buffer.maxlen != packet_log_size:
+        ui_state.packet_buffer = deque(ui_state.packet_buffer, maxlen=packet_log_size)
+    ui_state.packet_buffer.append(record)
+    if ui_state.packetlog_offset:
+        # Keep a scrolled-back view on the same records
+        ui_state.packetlog_offset = min(ui_state.packetlog_offset + 1, len(ui_state.packet_buffer) - 1)
+
+    if ui_state.display_log:
+        request_ui_redraw(packetlog=True)
+
+        if ui_state.current_window == 4:
+            menu_state.need_redraw = True
+
+
+def _mark_sender_row_dirty(packet: Dict[str, Any]) -> None:
+    if packet.get("from") in ui_state.node_list:
+        ui_state.dirty_node_rows.add(ui_state.node_list.index(packet["from"]))
+        request_ui_redraw(nodes=True)
+
+
+def _prepare_nodeinfo(packet: Dict[str, Any], message: Optional[Message]) -> None:
+    if "user" in packet["decoded"] and "longName" in packet["decoded"]["user"]:
+        maybe_store_nodeinfo_in_db(packet)
+
+
+def _apply_nodeinfo(packet: Dict[str, Any], message: Optional[Message]) -> None:
+    # The sender's name or key may have changed even if its position did not
+    _mark_sender_row_dirty(packet)
+
+
+def _decoded_position(packet: Dict[str, Any], message: Optional[Message]) -> Optional[Dict[str, Any]]:
+    position = packet["decoded"].get("position")
+    if position is None:
+        if message is None:
+            return None
+        position = MessageToDict(message)
+    position = {key: value for key, value in position.items() if key != "raw"}
+
+    # Same scaling the interface applies to the integer coordinates
+    for field in ("latitude", "longitude"):
+        if field not in position and f"{field}I" in position:
+            position[field] = position[f"{field}I"] * 1e-7
+    return position
+
+
+def _decoded_telemetry(packet: Dict[str, Any], message: Optional[Message]) -> Optional[Dict[str, Any]]:
+    telemetry = packet["decoded"].get("telemetry")
+    if telemetry is None and message is not None:
+        telemetry = MessageToDict(message)
+    return telemetry
+
+
+def _metric_samples(packet: Dict[str, Any], groups: Dict[str, Any]) -> Dict[str, float]:
+    """The recorded metrics found in the given groups, plus the packet's SNR if any were."""
+    samples = {}
+    for group, values in groups.items():
+        for metric in RECORDED_METRICS.get(group, ()):
+            if isinstance(values.get(metric), (int, float)):
+                samples[metric] = values[metric]
+    if samples and isinstance(packet.get("rxSnr"), (int, float)):
+        samples["snr"] = packet["rxSnr"]
+    return samples
+
+
+def _prepare_position(packet: Dict[str, Any], message: Optional[Message]) -> None:
+    position = _decoded_position(packet, message)
+    if position is not None:
+        save_telemetry_samples(packet["from"], _metric_samples(packet, {"position": position}))
+
+
+def _apply_position(packet: Dict[str, Any], message: Optional[Message]) -> None:
+    # The interface updates the sender's node entry itself; only its row needs repainting
+    _mark_sender_row_dirty(packet)
+
+
+def _prepare_telemetry(packet: Dict[str, Any], message: Optional[Message]) -> None:
+    telemetry = _decoded_telemetry(packet, message)
+    if telemetry is not None:
+        save_telemetry_samples(packet["from"], _metric_samples(packet, telemetry))
+
+
+def _apply_telemetry(packet: Dict[str, Any], message: Optional[Message]) -> None:
+    # As with positions, the interface records the new metrics in the node entry
+    _mark_sender_row_dirty(packet)
+
+
+def _apply_text_message(packet: Dict[str, Any], message: Optional[Message]) -> Callable[[], None]:
+    hop_start = packet.get('hopStart', 0)
+    hop_limit = packet.get('hopLimit', 0)
+
+    hops = hop_start - hop_limit
+
+    message_bytes = packet["decoded"]["payload"]
+    message_string = message_bytes.decode("utf-8")
+
+    refresh_channels = False
+    refresh_messages = False
+    new_direct_chat = False
+
+    if packet.get("channel"):
+        channel_number = packet["channel"]
+    else:
+        channel_number = 0
+
+    if packet["to"] == interface_state.myNodeNum:
+        if packet["from"] in ui_state.channel_list:
+            pass
+        else:
+            ui_state.channel_list.append(packet["from"])
+            if packet["from"] not in ui_state.all_messages:
+                ui_state.all_messages[packet["from"]] = MessageStore()
+            new_direct_chat = True
+            refresh_channels = True
+
+        channel_number = ui_state.channel_list.index(packet["from"])
+
+    channel_id = ui_state.channel_list[channel_number]
+
+    if channel_id != ui_state.channel_list[ui_state.selected_channel]:
+        add_notification(channel_number)
+        refresh_channels = True
+    else:
+        refresh_messages = True
+
+    # Add received message to the messages list
+    add_new_message(channel_id, packet["from"], message_string, hops=hops)
+
+    if refresh_channels:
+        request_ui_redraw(channels=True)
+    if refresh_messages:
+        request_ui_redraw(messages=True, scroll_messages_to_bottom=True)
+
+    def persist() -> None:
+        if new_direct_chat:
+            update_node_info_in_db(packet["from"], chat_archived=False)
+            # Un-archiving invalidates the channel rows, possibly after the redraw above already ran
+            request_ui_redraw(channels=True)
+        save_message_to_db(channel_id, packet["from"], message_string)
+        notify_message(channel_id)
+
+    return persist
+
+
+@dataclass(frozen=True)
+class PortHandler:
     """
-    Handles an incoming packet from a Meshtastic interface.
+    How received packets for one portnum are handled.
+
+    prepare runs before app_state.lock is taken and may use the database. apply runs with the lock
+    held, should only update in-memory state, and may return work to run once the lock is released.
+    Both receive the packet and its decoded payload (None for ports without one).
+    """
+
+    apply: ApplyHook
+    prepare: Optional[PrepareHook] = None
+
+
+PORT_HANDLERS: Dict[str, PortHandler] = {}
+
+
+def register_port_handler(portnum: str, apply: ApplyHook, prepare: Optional[PrepareHook] = None) -> None:
+    """Route received packets for portnum to the given hooks, replacing any handler already registered."""
+    PORT_HANDLERS[portnum] = PortHandler(apply, prepare)
+
+
+register_port_handler("NODEINFO_APP", _apply_nodeinfo, prepare=_prepare_nodeinfo)
+register_port_handler("TEXT_MESSAGE_APP", _apply_text_message)
+register_port_handler("POSITION_APP", _apply_position, prepare=_prepare_position)
+register_port_handler("TELEMETRY_APP", _apply_telemetry, prepare=_prepare_telemetry)
+
+
+def process_packet(packet: Dict[str, Any]) -> None:
+    """
+    Classify a received packet, persist it and apply its effect on the UI state.
+
+    The payload is decoded once and shared by the packet log and the port handler. Formatting and
+    database work happen outside app_state.lock; the lock is only held while the in-memory state is
+    updated, so the UI thread never waits on SQLite.
 
     Args:
         packet: The received Meshtastic packet as a dictionary.
-        interface: The Meshtastic interface instance that received the packet.
     """
-    with app_state.lock:
-        # Update packet log
-        ui_state.packet_buffer.append(packet)
-        if len(ui_state.packet_buffer) > 20:
-            # Trim buffer to 20 packets
-            ui_state.packet_buffer = ui_state.packet_buffer[-20:]
-
-        if ui_state.display_log:
-            request_ui_redraw(packetlog=True)
-
-            if ui_state.current_window == 4:
-                menu_state.need_redraw = True
-        try:
+    try:
+        message = decode_payload(packet)
+        record = format_packet_log_record(packet, message)
+        handler = PORT_HANDLERS.get(packet["decoded"]["portnum"]) if "decoded" in packet else None
+
+        if handler is not None and handler.prepare is not None:
+            handler.prepare(packet, message)
+
+        follow_up = None
+        with app_state.lock:
+            _append_packet_log_record(record)
             if "decoded" not in packet:
                 return
 
-            # Assume any incoming packet could update the last seen time for a node
-            changed = refresh_node_list()
-            if changed:
+            # Assume any incoming packet could update the last seen time of its sender
+            moved_rows = refresh_node_entry(packet.get("from"))
+            if moved_rows:
+                ui_state.dirty_node_rows.update(range(moved_rows[0], moved_rows[1] + 1))
                 request_ui_redraw(nodes=True)
 
-            if packet["decoded"]["portnum"] == "NODEINFO_APP":
-                if "user" in packet["decoded"] and "longName" in packet["decoded"]["user"]:
-                    maybe_store_nodeinfo_in_db(packet)
+            if handler is not None:
+                follow_up = handler.apply(packet, message)
 
-            elif packet["decoded"]["portnum"] == "TEXT_MESSAGE_APP":
-                hop_start = packet.get('hopStart', 0)
-                hop_limit = packet.get('hopLimit', 0)
+        if follow_up is not None:
+            follow_up()
 
-                hops = hop_start - hop_limit
+    except KeyError as e:
+        logging.error(f"Error processing packet: {e}")
 
 
-                if config.notification_sound == "True":
-                    schedule_notification_sound()
+def _packet_worker_loop() -> None:
+    while True:
+        item = _packet_queue.get()
+        if item is _PACKET_WORKER_STOP:
+            return
+        handler, packet = item
+        try:
+            handler(packet)
+        except Exception as e:
+            logging.error(f"Unexpected error in packet worker: {e}")
 
-                message_bytes = packet["decoded"]["payload"]
-                message_string = message_bytes.decode("utf-8")
 
-                refresh_channels = False
-                refresh_messages = False
+def start_packet_worker() -> None:
+    """Start the packet ingest thread if it is not already running."""
+    global _packet_worker_thread
 
-                if packet.get("channel"):
-                    channel_number = packet["channel"]
-                else:
-                    channel_number = 0
+    with _packet_worker_lock:
+        if _packet_worker_thread is not None and _packet_worker_thread.is_alive():
+            return
+        _packet_worker_thread = threading.Thread(target=_packet_worker_loop, name="contact-packet-worker", daemon=True)
+        _packet_worker_thread.start()
 
-                if packet["to"] == interface_state.myNodeNum:
-                    if packet["from"] in ui_state.channel_list:
-                        pass
-                    else:
-                        ui_state.channel_list.append(packet["from"])
-                        if packet["from"] not in ui_state.all_messages:
-                            ui_state.all_messages[packet["from"]] = []
-                        update_node_info_in_db(packet["from"], chat_archived=False)
-                        refresh_channels = True
 
-                    channel_number = ui_state.channel_list.index(packet["from"])
+def stop_packet_worker(timeout: float = PACKET_WORKER_JOIN_TIMEOUT_SECONDS) -> None:
+    """Process packets already queued, then stop the packet ingest thread."""
+    global _packet_worker_thread
 
-                channel_id = ui_state.channel_list[channel_number]
+    with _packet_worker_lock:
+        worker = _packet_worker_thread
+        _packet_worker_thread = None
+    if worker is None or not worker.is_alive():
+        return
 
-                if channel_id != ui_state.channel_list[ui_state.selected_channel]:
-                    add_notification(channel_number)
-                    refresh_channels = True
-                else:
-                    refresh_messages = True
+    _packet_queue.put(_PACKET_WORKER_STOP)
+    worker.join(timeout)
+    if worker.is_alive():
+        logging.warning("Timed out processing queued packets after %.1fs", timeout)
 
-                # Add received message to the messages list
-                message_from_id = packet["from"]
-                message_from_string = get_name_from_database(message_from_id, type="short") + ":"
 
-                add_new_message(channel_id, f"{config.message_prefix} [{hops}] {message_from_string} ", message_string)
+def queue_packet_handler(handler: Callable[[Dict[str, Any]], None], packet: Dict[str, Any]) -> None:
+    """
+    Run handler(packet) on the ingest worker, in arrival order with everything else queued.
 
-                if refresh_channels:
-                    request_ui_redraw(channels=True)
-                if refresh_messages:
-                    request_ui_redraw(messages=True, scroll_messages_to_bottom=True)
+    For interface callbacks that run on the radio reader thread and must not wait on the UI lock
+    or the database there.
+    """
+    start_packet_worker()
+    try:
+        _packet_queue.put_nowait((handler, packet))
+    except queue.Full:
+        logging.warning("Packet queue full, dropping packet from %s", packet.get("from"))
 
-                save_message_to_db(channel_id, message_from_id, message_string)
 
-        except KeyError as e:
-            logging.error(f"Error processing packet: {e}")
+def on_receive(packet: Dict[str, Any], interface: Any) -> None:
+    """
+    Handles an incoming packet from a Meshtastic interface.
+
+    Runs on the interface's reader thread, so it only queues the packet for the ingest worker
+    and never waits on the UI lock or the database.
+
+    Args:
+        packet: The received Meshtastic packet as a dictionary.
+        interface: The Meshtastic interface instance that received the packet.
+    """
+    queue_packet_handler(process_packet, packet)
@@ -1,5 +1,3 @@
-import time
-
 from typing import Any, Dict
 
 import google.protobuf.json_format
@@ -13,13 +11,13 @@ from contact.utilities.db_handler import (
     is_chat_archived,
     update_node_info_in_db,
 )
-import contact.ui.default_config as config
 
 from contact.utilities.singleton import ui_state, interface_state, app_state
 
+from contact.utilities.message_store import ACK_CODES, KIND_SENT, KIND_TRACEROUTE, KIND_TRACEROUTE_SENT
 from contact.utilities.utils import add_new_message
 
-ack_naks: Dict[str, Dict[str, Any]] = {}  # requestId -> {channel, messageIndex, timestamp}
+ack_naks: Dict[str, Dict[str, Any]] = {}  # requestId -> {channel, row}; row ids survive history being prepended
 
 
 # Note "onAckNak" has special meaning to the API, thus the nonstandard naming convention
@@ -27,7 +25,16 @@ ack_naks: Dict[str, Dict[str, Any]] = {}  # requestId -> {channel, messageIndex,
 def onAckNak(packet: Dict[str, Any]) -> None:
     """
     Handles incoming ACK/NAK response packets.
+
+    Called on the interface's reader thread, so the packet is handed to the ingest worker.
     """
+    from contact.message_handlers.rx_handler import queue_packet_handler
+
+    queue_packet_handler(_apply_ack_nak, packet)
+
+
+def _apply_ack_nak(packet: Dict[str, Any]) -> None:
+    """Mark the acknowledged message. Runs on the ingest worker."""
     from contact.ui.contact_ui import request_ui_redraw
 
     with app_state.lock:
@@ -36,27 +43,18 @@ def onAckNak(packet: Dict[str, Any]) -> None:
             return
 
         acknak = ack_naks.pop(request)
-        message = ui_state.all_messages[acknak["channel"]][acknak["messageIndex"]][1]
 
-        confirm_string = " "
-        ack_type = None
         if packet["decoded"]["routing"]["errorReason"] == "NONE":
             if packet["from"] == interface_state.myNodeNum:  # Ack "from" ourself means implicit ACK
-                confirm_string = config.ack_implicit_str
                 ack_type = "Implicit"
             else:
-                confirm_string = config.ack_str
                 ack_type = "Ack"
         else:
-            confirm_string = config.nak_str
             ack_type = "Nak"
 
-        ui_state.all_messages[acknak["channel"]][acknak["messageIndex"]] = (
-            time.strftime("[%H:%M:%S] ") + config.sent_message_prefix + confirm_string + ": ",
-            message,
-        )
+        ui_state.all_messages[acknak["channel"]].set_ack(acknak["row"], ACK_CODES[ack_type])
 
-        update_ack_nak(acknak["channel"], acknak["timestamp"], message, ack_type)
+        update_ack_nak(request, ack_type)
 
         channel_number = ui_state.channel_list.index(acknak["channel"])
         if ui_state.channel_list[channel_number] == ui_state.channel_list[ui_state.selected_channel]:
@@ -66,7 +64,16 @@ def onAckNak(packet: Dict[str, Any]) -> None:
 def on_response_traceroute(packet: Dict[str, Any]) -> None:
     """
     Handle traceroute response packets and render the route visually in the UI.
+
+    Called on the interface's reader thread, so the packet is handed to the ingest worker.
     """
+    from contact.message_handlers.rx_handler import queue_packet_handler
+
+    queue_packet_handler(_apply_traceroute_response, packet)
+
+
+def _apply_traceroute_response(packet: Dict[str, Any]) -> None:
+    """Add the rendered route to the node's DM channel. Runs on the ingest worker."""
     from contact.ui.contact_ui import add_notification, request_ui_redraw
 
     with app_state.lock:
@@ -153,9 +160,7 @@ def on_response_traceroute(packet: Dict[str, Any]) -> None:
             add_notification(channel_number)
             refresh_channels = True
 
-        message_from_string = get_name_from_database(packet["from"], type="short") + ":\n"
-
-        add_new_message(channel_id, f"{config.message_prefix} {message_from_string}", msg_str)
+        add_new_message(channel_id, packet["from"], msg_str, kind=KIND_TRACEROUTE)
 
         if refresh_channels:
             request_ui_redraw(channels=True)
@@ -186,14 +191,13 @@ def send_message(message: str, destination: int = BROADCAST_NUM, channel: int =
         channelIndex=send_on_channel,
     )
 
-    add_new_message(channel_id, config.sent_message_prefix + config.ack_unknown_str + ": ", message)
+    row_id = add_new_message(channel_id, myid, message, kind=KIND_SENT)
 
-    timestamp = save_message_to_db(channel_id, myid, message)
+    save_message_to_db(channel_id, myid, message, packet_id=sent_message_data.id)
 
     ack_naks[sent_message_data.id] = {
         "channel": channel_id,
-        "messageIndex": len(ui_state.all_messages[channel_id]) - 1,
-        "timestamp": timestamp,
+        "row": row_id,
     }
 
 
@@ -203,7 +207,7 @@ def send_traceroute() -> None:
     """
 
     channel_id = ui_state.node_list[ui_state.selected_node]
-    add_new_message(channel_id, f"{config.message_prefix} Sent Traceroute", "")
+    add_new_message(channel_id, interface_state.myNodeNum, "", kind=KIND_TRACEROUTE_SENT)
 
     r = mesh_pb2.RouteDiscovery()
     interface_state.interface.sendData(
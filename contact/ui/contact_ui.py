@@ -1,25 +1,50 @@
 import curses
 import logging
+import math
 import time
+from bisect import bisect_right
 import traceback
-from typing import Union
+from typing import Iterable, List, Optional, Union
 
-from contact.utilities.utils import get_channels, get_readable_duration, get_time_ago, refresh_node_list
+from google.protobuf.message import Message
+
+from contact.utilities.utils import (
+    get_channels,
+    get_readable_duration,
+    get_time_ago,
+    refresh_node_entry,
+    refresh_node_list,
+)
 from contact.settings import settings_menu
 from contact.message_handlers.tx_handler import send_message, send_traceroute
 from contact.utilities.utils import parse_protobuf
 from contact.ui.colors import get_color
-from contact.utilities.db_handler import get_name_from_database, update_node_info_in_db, is_chat_archived
+from contact.utilities.db_handler import (
+    get_name_from_database,
+    update_node_info_in_db,
+    is_chat_archived,
+    load_older_messages,
+    load_newer_messages,
+    open_history_window,
+    flush_db_writes,
+    search_messages,
+    get_stored_message,
+    get_telemetry_series,
+    get_telemetry_summary,
+)
 from contact.utilities.input_handlers import get_list_input
+from contact.utilities.message_store import MessageStore
+from contact.utilities.sparkline import bucket_means, render_sparkline
+from contact.ui.ui_state import DEFAULT_PACKET_LOG_SIZE, ChannelListView
 from contact.utilities.i18n import t
-from contact.utilities.emoji_utils import normalize_message_text
 import contact.ui.default_config as config
 import contact.ui.dialog
 from contact.ui.nav_utils import (
     move_main_highlight,
     draw_main_arrows,
     get_msg_window_lines,
-    wrap_text,
+    get_message_store,
+    get_wrapped_messages,
     truncate_with_ellipsis,
     pad_to_width,
 )
@@ -28,6 +53,34 @@ from contact.utilities.singleton import ui_state, interface_state, menu_state, a
 
 MIN_COL = 1  # "effectively zero" without breaking curses
 RESIZE_DEBOUNCE_MS = 250
+INPUT_IDLE_TIMEOUT_MS = 200
+PACKET_LOG_COLUMNS = (10, 10, 15, 30)
+DEFAULT_REDRAW_MAX_FPS = 20.0
+
+# Minimum frames between background redraws of each pane, in priority order.
+# The input line is not listed: it is drawn on every pass of the main loop.
+PANE_REDRAW_FRAMES = (
+    ("messages", 1),
+    ("channels", 1),
+    ("nodes", 4),
+    ("packetlog", 4),
+)
+
+# Ranges the node details dialog summarizes stored telemetry over, cycled with Tab
+NODE_TREND_WINDOWS = (("24h", 24 * 60 * 60), ("7d", 7 * 24 * 60 * 60), ("30d", 30 * 24 * 60 * 60))
+# (metric, label, unit) in display order
+NODE_TREND_METRICS = (
+    ("batteryLevel", "Battery", "%"),
+    ("voltage", "Voltage", "v"),
+    ("channelUtilization", "Channel utilization", "%"),
+    ("airUtilTx", "Air utilization TX", "%"),
+    ("snr", "SNR", "dB"),
+    ("temperature", "Temperature", "°C"),
+    ("relativeHumidity", "Humidity", "%"),
+    ("barometricPressure", "Pressure", "hPa"),
+)
+NODE_TREND_SPARKLINE_WIDTH = 24
+NODE_TREND_CACHE_SECONDS = 30.0
 root_win = None
 nodes_pad = None
 
@@ -49,7 +102,38 @@ def request_ui_redraw(
     ui_state.scroll_messages_to_bottom = ui_state.scroll_messages_to_bottom or scroll_messages_to_bottom
 
 
-def process_pending_ui_updates(stdscr: curses.window) -> None:
+def get_frame_interval() -> float:
+    """Seconds per frame for background redraws, from config.redraw_max_fps (0 disables the cap)."""
+    try:
+        max_fps = float(getattr(config, "redraw_max_fps", DEFAULT_REDRAW_MAX_FPS))
+    except (TypeError, ValueError):
+        max_fps = DEFAULT_REDRAW_MAX_FPS
+    return 1.0 / max_fps if max_fps > 0 else 0.0
+
+
+def _draw_pane(pane: str) -> None:
+    if pane == "messages":
+        scroll_to_bottom = ui_state.scroll_messages_to_bottom
+        ui_state.scroll_messages_to_bottom = False
+        draw_messages_window(scroll_to_bottom)
+    elif pane == "channels":
+        draw_channel_list()
+    elif pane == "nodes":
+        draw_node_list(ui_state.dirty_node_rows)
+    elif pane == "packetlog":
+        draw_packetlog_win()
+
+
+def process_pending_ui_updates(stdscr: curses.window, now: Optional[float] = None) -> Optional[float]:
+    """
+    Redraw panes flagged by request_ui_redraw, no more often than the frame rate allows.
+
+    A pane that is not due yet keeps its flag and is drawn on a later pass, so a packet flood
+    costs at most one redraw per pane per interval. Returns the seconds until the next deferred
+    redraw is due, or None if nothing is pending.
+    """
+    now = time.monotonic() if now is None else now
+
     if ui_state.redraw_full_ui:
         ui_state.redraw_full_ui = False
         ui_state.redraw_channels = False
@@ -58,25 +142,40 @@ def process_pending_ui_updates(stdscr: curses.window) -> None:
         ui_state.redraw_packetlog = False
         ui_state.scroll_messages_to_bottom = False
         handle_resize(stdscr, False)
-        return
+        ui_state.last_pane_redraw = {pane: now for pane, _ in PANE_REDRAW_FRAMES}
+        return None
 
-    if ui_state.redraw_channels:
-        ui_state.redraw_channels = False
-        draw_channel_list()
+    frame_interval = get_frame_interval()
+    next_due = None
 
-    if ui_state.redraw_nodes:
-        ui_state.redraw_nodes = False
-        draw_node_list()
+    for pane, frames in PANE_REDRAW_FRAMES:
+        flag = f"redraw_{pane}"
+        if not getattr(ui_state, flag):
+            continue
 
-    if ui_state.redraw_messages:
-        scroll_to_bottom = ui_state.scroll_messages_to_bottom
-        ui_state.redraw_messages = False
-        ui_state.scroll_messages_to_bottom = False
-        draw_messages_window(scroll_to_bottom)
+        wait = ui_state.last_pane_redraw.get(pane, -math.inf) + frames * frame_interval - now
+        if wait > 0:
+            next_due = wait if next_due is None else min(next_due, wait)
+            continue
 
-    if ui_state.redraw_packetlog:
-        ui_state.redraw_packetlog = False
-        draw_packetlog_win()
+        setattr(ui_state, flag, False)
+        ui_state.last_pane_redraw[pane] = now
+        _draw_pane(pane)
+
+    return next_due
+
+
+def get_input_timeout_ms(next_redraw: Optional[float]) -> int:
+    """How long to wait for a key: the idle poll, or less if a deferred redraw is due sooner."""
+    if next_redraw is None:
+        return INPUT_IDLE_TIMEOUT_MS
+    return max(1, min(INPUT_IDLE_TIMEOUT_MS, math.ceil(next_redraw * 1000)))
+
+
+def flush_frame() -> None:
+    """Write every pane staged with noutrefresh to the terminal in one update, leaving the cursor in the input field."""
+    entry_win.noutrefresh()
+    curses.doupdate()
 
 
 # Draw arrows for a specific window id (0=channel,1=messages,2=nodes).
@@ -84,19 +183,18 @@ def draw_window_arrows(window_id: int) -> None:
 
     if window_id == 0:
         draw_main_arrows(channel_win, len(ui_state.channel_list), window=0)
-        channel_win.refresh()
+        channel_win.noutrefresh()
     elif window_id == 1:
-        msg_line_count = messages_pad.getmaxyx()[0]
         draw_main_arrows(
             messages_win,
-            msg_line_count,
+            get_message_line_count(),
             window=1,
             log_height=packetlog_win.getmaxyx()[0],
         )
-        messages_win.refresh()
+        messages_win.noutrefresh()
     elif window_id == 2:
         draw_main_arrows(nodes_win, len(ui_state.node_list), window=2)
-        nodes_win.refresh()
+        nodes_win.noutrefresh()
 
 
 def compute_widths(total_w: int, focus: int):
@@ -116,7 +214,7 @@ def paint_frame(win, selected: bool) -> None:
     win.attrset(get_color("window_frame_selected") if selected else get_color("window_frame"))
     win.box()
     win.attrset(get_color("window_frame"))
-    win.refresh()
+    win.noutrefresh()
 
 
 def get_channel_row_color(index: int) -> int:
@@ -224,7 +322,7 @@ def draw_frame_title(box: curses.window, title: str) -> None:
 
 def handle_resize(stdscr: curses.window, firstrun: bool) -> None:
     """Handle terminal resize events and redraw the UI accordingly."""
-    global messages_pad, messages_win, nodes_pad, nodes_win, channel_pad, channel_win, packetlog_win, entry_win
+    global messages_win, nodes_pad, nodes_win, channel_pad, channel_win, packetlog_win, entry_win
 
     # Calculate window max dimensions
     height, width = stdscr.getmaxyx()
@@ -274,7 +372,6 @@ def handle_resize(stdscr: curses.window, firstrun: bool) -> None:
         packetlog_win = curses.newwin(pkt_h, messages_width, height - pkt_h - entry_height, messages_x)
 
         # Will be resized to what we need when drawn
-        messages_pad = curses.newpad(1, 1)
         nodes_pad = curses.newpad(1, 1)
         channel_pad = curses.newpad(1, 1)
 
@@ -283,7 +380,7 @@ def handle_resize(stdscr: curses.window, firstrun: bool) -> None:
             win.bkgd(get_color("background"))
 
         # Set background colors for pads
-        for pad in [messages_pad, nodes_pad, channel_pad]:
+        for pad in [nodes_pad, channel_pad]:
             pad.bkgd(get_color("background"))
 
         # Set colors for window frames
@@ -318,10 +415,10 @@ def handle_resize(stdscr: curses.window, firstrun: bool) -> None:
 
     for win in windows_to_draw:
         win.box()
-        win.refresh()
+        win.noutrefresh()
 
     entry_win.keypad(True)
-    entry_win.timeout(200)
+    entry_win.timeout(INPUT_IDLE_TIMEOUT_MS)
     curses.curs_set(1)
 
     try:
@@ -368,8 +465,10 @@ def main_ui(stdscr: curses.window) -> None:
 
     while True:
         with app_state.lock:
-            process_pending_ui_updates(stdscr)
+            next_redraw = process_pending_ui_updates(stdscr)
         draw_text_field(entry_win, f"Message: {(input_text or '')[-(stdscr.getmaxyx()[1] - 10):]}", get_color("input"))
+        flush_frame()
+        entry_win.timeout(get_input_timeout_ms(next_redraw))
 
         # Get user input from entry window
         try:
@@ -425,6 +524,9 @@ def main_ui(stdscr: curses.window) -> None:
         elif char == chr(16):  # Ctrl + P for Packet Log
             handle_ctrl_p()
 
+        elif char in (curses.KEY_SR, curses.KEY_SF):  # Shift + Up/Down to scroll the Packet Log
+            scroll_packet_log(1 if char == curses.KEY_SR else -1)
+
         elif char == curses.KEY_RESIZE:
             input_text = ""
             queued_char = drain_resize_events(entry_win)
@@ -485,6 +587,7 @@ def handle_home() -> None:
         select_channel(0)
     elif ui_state.current_window == 1:
         ui_state.selected_message = 0
+        ui_state.start_index[1] = 0
         refresh_pad(1)
     elif ui_state.current_window == 2:
         select_node(0)
@@ -497,8 +600,11 @@ def handle_end() -> None:
     if ui_state.current_window == 0:
         select_channel(len(ui_state.channel_list) - 1)
     elif ui_state.current_window == 1:
-        msg_line_count = messages_pad.getmaxyx()[0]
+        # End leaves a search hit's history window for the newest messages
+        ui_state.history_windows.pop(ui_state.channel_list[ui_state.selected_channel], None)
+        msg_line_count = get_message_line_count()
         ui_state.selected_message = max(msg_line_count - get_msg_window_lines(messages_win, packetlog_win), 0)
+        ui_state.start_index[1] = ui_state.selected_message
         refresh_pad(1)
     elif ui_state.current_window == 2:
         select_node(len(ui_state.node_list) - 1)
@@ -510,9 +616,12 @@ def handle_pageup() -> None:
     if ui_state.current_window == 0:
         select_channel(ui_state.selected_channel - (channel_win.getmaxyx()[0] - 2))
     elif ui_state.current_window == 1:
+        if ui_state.selected_message < get_msg_window_lines(messages_win, packetlog_win):
+            load_older_history()
         ui_state.selected_message = max(
             ui_state.selected_message - get_msg_window_lines(messages_win, packetlog_win), 0
         )
+        ui_state.start_index[1] = ui_state.selected_message
         refresh_pad(1)
     elif ui_state.current_window == 2:
         select_node(ui_state.selected_node - (nodes_win.getmaxyx()[0] - 2))
@@ -524,11 +633,18 @@ def handle_pagedown() -> None:
     if ui_state.current_window == 0:
         select_channel(ui_state.selected_channel + (channel_win.getmaxyx()[0] - 2))
     elif ui_state.current_window == 1:
-        msg_line_count = messages_pad.getmaxyx()[0]
-        ui_state.selected_message = min(
-            ui_state.selected_message + get_msg_window_lines(messages_win, packetlog_win),
-            msg_line_count - get_msg_window_lines(messages_win, packetlog_win),
+        visible_lines = get_msg_window_lines(messages_win, packetlog_win)
+        if ui_state.selected_message + visible_lines >= get_message_line_count() - visible_lines:
+            load_newer_history()
+        msg_line_count = get_message_line_count()
+        ui_state.selected_message = max(
+            min(
+                ui_state.selected_message + get_msg_window_lines(messages_win, packetlog_win),
+                msg_line_count - get_msg_window_lines(messages_win, packetlog_win),
+            ),
+            0,
         )
+        ui_state.start_index[1] = ui_state.selected_message
         refresh_pad(1)
     elif ui_state.current_window == 2:
         select_node(ui_state.selected_node + (nodes_win.getmaxyx()[0] - 2))
@@ -590,7 +706,7 @@ def handle_enter(input_text: str) -> str:
         if node_list[ui_state.selected_node] not in ui_state.channel_list:
             ui_state.channel_list.append(node_list[ui_state.selected_node])
         if node_list[ui_state.selected_node] not in ui_state.all_messages:
-            ui_state.all_messages[node_list[ui_state.selected_node]] = []
+            ui_state.all_messages[node_list[ui_state.selected_node]] = MessageStore()
 
         ui_state.selected_channel = ui_state.channel_list.index(node_list[ui_state.selected_node])
 
@@ -630,6 +746,36 @@ def handle_enter(input_text: str) -> str:
     return input_text
 
 
+def get_node_trend_lines(node_num: int, window: int, now: Optional[float] = None) -> List[str]:
+    """
+    A sparkline and min/avg/max line per recorded metric of a node over one NODE_TREND_WINDOWS range.
+
+    Results are cached briefly, so holding Up/Down in the node details dialog does not re-query each node.
+    """
+    now = time.time() if now is None else now
+    cached = ui_state.node_trend_cache.get((node_num, window))
+    if cached is not None and now - cached[0] < NODE_TREND_CACHE_SECONDS:
+        return cached[1]
+
+    since = int(now) - NODE_TREND_WINDOWS[window][1]
+    summary = get_telemetry_summary(node_num, since)
+    series = get_telemetry_series(node_num, since) if summary else {}
+
+    lines = []
+    for metric, label, unit in NODE_TREND_METRICS:
+        if metric not in summary:
+            continue
+        low, mean, high = summary[metric]
+        sparkline = ""
+        if metric in series:
+            means = bucket_means(*series[metric], since, int(now), NODE_TREND_SPARKLINE_WIDTH)
+            sparkline = render_sparkline(means) + " "
+        lines.append(f"• {label}: {sparkline}{low:.1f} / {mean:.1f} / {high:.1f}{unit}")
+
+    ui_state.node_trend_cache[(node_num, window)] = (now, lines)
+    return lines
+
+
 def handle_f5_key(stdscr: curses.window) -> None:
     if not ui_state.node_list:
         return
@@ -705,6 +851,13 @@ def handle_f5_key(stdscr: curses.window) -> None:
                 air_emoji = "🔴" if air_util > 80 else "🟡" if air_util > 50 else "🟢"
                 message_parts.append(f"• Air utilization TX: {air_emoji} {air_util:.2f}%")
 
+        window_label = NODE_TREND_WINDOWS[trend_window][0]
+        trend_lines = get_node_trend_lines(node["num"], trend_window) if "num" in node else []
+        if trend_lines:
+            message_parts.append("")
+            message_parts.append(f"**📈 Last {window_label} (min / avg / max):**")
+            message_parts.extend(trend_lines)
+
         title = t(
             "ui.dialog.node_details_title",
             default="📡 Node Details: {name}",
@@ -715,6 +868,7 @@ def handle_f5_key(stdscr: curses.window) -> None:
     previous_window = ui_state.current_window
     ui_state.current_window = 4
     scroll_offset = 0
+    trend_window = 0
     dialog_win = None
 
     curses.curs_set(0)
@@ -759,7 +913,7 @@ def handle_f5_key(stdscr: curses.window) -> None:
             msg_win.erase()
 
             for row, line in enumerate(message_lines[scroll_offset : scroll_offset + viewport_h], start=1):
-                trimmed = line[: max(0, dialog_width - 6)]
+                trimmed = line[: max(0, dialog_width - 4)]
                 try:
                     msg_win.addstr(row, 1, trimmed, get_color("settings_default"))
                 except curses.error:
@@ -774,7 +928,7 @@ def handle_f5_key(stdscr: curses.window) -> None:
                 ui_state.start_index[4] = old_index
 
             try:
-                ok_text = " Up/Down: Nodes  PgUp/PgDn: Scroll  Esc: Close "
+                ok_text = " Up/Down: Nodes  Tab: Range  PgUp/PgDn: Scroll  Esc: Close "
                 dialog_win.addstr(
                     dialog_height - 2,
                     max(1, (dialog_width - len(ok_text)) // 2),
@@ -807,6 +961,8 @@ def handle_f5_key(stdscr: curses.window) -> None:
                 ui_state.selected_node = (ui_state.selected_node + 1) % len(ui_state.node_list)
                 scroll_offset = 0
                 refresh_node_selection(old_selected_node, highlight=True)
+            elif char == ord("\t"):
+                trend_window = (trend_window + 1) % len(NODE_TREND_WINDOWS)
             elif char == curses.KEY_PPAGE:
                 scroll_offset = max(0, scroll_offset - viewport_h)
             elif char == curses.KEY_NPAGE:
@@ -872,7 +1028,7 @@ def handle_backspace(entry_win: curses.window, input_text: str) -> str:
         entry_win.move(y, x - 1)
         entry_win.addch(" ")  #
         entry_win.move(y, x - 1)
-    entry_win.refresh()
+    entry_win.noutrefresh()
     return input_text
 
 
@@ -898,6 +1054,7 @@ def handle_ctrl_p() -> None:
         draw_messages_window(True)
     else:
         ui_state.display_log = False
+        ui_state.packetlog_offset = 0
         packetlog_win.erase()
         draw_messages_window(True)
 
@@ -915,6 +1072,7 @@ def handle_ctrl_k(stdscr: curses.window) -> None:
         t("ui.help.settings", default="` or F12 = Settings"),
         t("ui.help.quit", default="ESC = Quit"),
         t("ui.help.packet_log", default="Ctrl+P = Toggle Packet Log"),
+        t("ui.help.packet_log_scroll", default="Shift+Up/Down = Scroll Packet Log"),
         t("ui.help.traceroute", default="Ctrl+T or F4 = Traceroute"),
         t("ui.help.node_info", default="F5 = Full node info"),
         t("ui.help.archive_chat", default="Ctrl+D = Archive chat / remove node"),
@@ -961,13 +1119,14 @@ def handle_ctrl_d() -> None:
             interface_state.interface.localNode.removeNode(ui_state.node_list[ui_state.selected_node])
 
             # Directly modifying the interface from client code - good? Bad? If it's stupid but it works, it's not supid?
-            del interface_state.interface.nodesByNum[ui_state.node_list[ui_state.selected_node]]
+            node_num = ui_state.node_list[ui_state.selected_node]
+            del interface_state.interface.nodesByNum[node_num]
 
             # Convert to "!hex" representation that interface.nodes uses
-            hexid = f"!{hex(ui_state.node_list[ui_state.selected_node])[2:]}"
+            hexid = f"!{hex(node_num)[2:]}"
             del interface_state.interface.nodes[hexid]
 
-            ui_state.node_list.pop(ui_state.selected_node)
+            refresh_node_entry(node_num)
 
             draw_messages_window()
             draw_node_list()
@@ -980,6 +1139,8 @@ def handle_ctrl_fslash() -> None:
     """Handle Ctrl + / key events to search in the current window."""
     if ui_state.current_window == 2 or ui_state.current_window == 0:
         search(ui_state.current_window)
+    elif ui_state.current_window == 1:
+        search_message_history()
 
 
 def handle_ctrl_f(stdscr: curses.window) -> None:
@@ -1046,6 +1207,7 @@ def handle_ctlr_g(stdscr: curses.window) -> None:
             if confirmation == "Yes":
                 interface_state.interface.localNode.setIgnored(ui_state.node_list[ui_state.selected_node])
                 interface_state.interface.nodesByNum[ui_state.node_list[ui_state.selected_node]]["isIgnored"] = True
+                reindex_selected_node()
         else:
             confirmation = get_list_input(
                 t(
@@ -1059,10 +1221,47 @@ def handle_ctlr_g(stdscr: curses.window) -> None:
             if confirmation == "Yes":
                 interface_state.interface.localNode.removeIgnored(ui_state.node_list[ui_state.selected_node])
                 interface_state.interface.nodesByNum[ui_state.node_list[ui_state.selected_node]]["isIgnored"] = False
+                reindex_selected_node()
 
         handle_resize(stdscr, False)
 
 
+def reindex_selected_node() -> None:
+    """Move the selected node to its new place in the sorted node list, keeping it selected."""
+    node_num = ui_state.node_list[ui_state.selected_node]
+    moved_rows = refresh_node_entry(node_num)
+    if moved_rows:
+        ui_state.dirty_node_rows.update(range(moved_rows[0], moved_rows[1] + 1))
+    ui_state.dirty_node_rows.add(ui_state.selected_node)  # Its color shows the ignored state
+    if node_num in ui_state.node_list:
+        ui_state.selected_node = ui_state.node_list.index(node_num)
+
+
+def get_channel_view() -> ChannelListView:
+    """
+    Return the channel list rows, looking up DM names and archive flags only after the
+    channel list changed or node info was written since the last build.
+    """
+    view = ui_state.channel_view
+    if view is not None and view.channels == tuple(ui_state.channel_list):
+        return view
+
+    view = ChannelListView(channels=tuple(ui_state.channel_list))
+    for channel in view.channels:
+        # Convert node number to long name if it's an integer
+        if isinstance(channel, int):
+            if is_chat_archived(channel):
+                continue
+            channel_name = get_name_from_database(channel, type="long")
+            if channel_name is None:
+                continue
+            channel = channel_name
+        view.names.append(channel)
+
+    ui_state.channel_view = view
+    return view
+
+
 def draw_channel_list() -> None:
     """Update the channel list window and pad based on the current state."""
 
@@ -1074,17 +1273,7 @@ def draw_channel_list() -> None:
 
     channel_pad.resize(max(1, len(ui_state.channel_list)), channel_win.getmaxyx()[1])
 
-    idx = 0
-    for channel in ui_state.channel_list:
-        # Convert node number to long name if it's an integer
-        if isinstance(channel, int):
-            if is_chat_archived(channel):
-                continue
-            channel_name = get_name_from_database(channel, type="long")
-            if channel_name is None:
-                continue
-            channel = channel_name
-
+    for idx, channel in enumerate(get_channel_view().names):
         # Determine whether to add the notification
         notification = " " + config.notification_symbol if idx in ui_state.notifications else ""
 
@@ -1099,12 +1288,10 @@ def draw_channel_list() -> None:
             else:
                 color = get_color("channel_selected")
         channel_pad.addstr(idx, 1, truncated_channel, color)
-        idx += 1
 
     paint_frame(channel_win, selected=(ui_state.current_window == 0))
     refresh_pad(0)
     draw_window_arrows(0)
-    channel_win.refresh()
 
 
 def draw_messages_window(scroll_to_bottom: bool = False) -> None:
@@ -1113,32 +1300,7 @@ def draw_messages_window(scroll_to_bottom: bool = False) -> None:
     if ui_state.current_window != 1 and ui_state.single_pane_mode:
         return
 
-    messages_pad.erase()
-
-    channel = ui_state.channel_list[ui_state.selected_channel]
-
-    if channel in ui_state.all_messages:
-        messages = ui_state.all_messages[channel]
-
-        msg_line_count = 0
-
-        row = 0
-        for prefix, message in messages:
-            full_message = normalize_message_text(f"{prefix}{message}")
-            wrapped_lines = wrap_text(full_message, messages_win.getmaxyx()[1] - 2)
-            msg_line_count += len(wrapped_lines)
-            messages_pad.resize(msg_line_count, messages_win.getmaxyx()[1])
-
-            for line in wrapped_lines:
-                if prefix.startswith("--"):
-                    color = get_color("timestamps")
-                elif prefix.find(config.sent_message_prefix) != -1:
-                    color = get_color("tx_messages")
-                else:
-                    color = get_color("rx_messages")
-
-                messages_pad.addstr(row, 1, line, color)
-                row += 1
+    msg_line_count = get_message_line_count()
 
     paint_frame(messages_win, selected=(ui_state.current_window == 1))
 
@@ -1149,18 +1311,76 @@ def draw_messages_window(scroll_to_bottom: bool = False) -> None:
         ui_state.start_index[1] = max(msg_line_count - visible_lines, 0)
     else:
         ui_state.selected_message = max(min(ui_state.selected_message, msg_line_count - visible_lines), 0)
+        ui_state.start_index[1] = max(min(ui_state.start_index[1], msg_line_count - visible_lines), 0)
 
-    messages_win.refresh()
     refresh_pad(1)
     draw_packetlog_win()
     draw_window_arrows(1)
-    messages_win.refresh()
+    messages_win.noutrefresh()
     if ui_state.current_window == 4:
         menu_state.need_redraw = True
 
 
-def draw_node_list() -> None:
-    """Update the nodes list window and pad based on the current state."""
+def get_message_line_count() -> int:
+    """Return the number of wrapped lines in the selected channel at the current window width."""
+    channel = ui_state.channel_list[ui_state.selected_channel]
+    return get_wrapped_messages(channel, messages_win.getmaxyx()[1] - 2).line_count
+
+
+def draw_message_rows(start_line: int, row_count: int) -> None:
+    """Paint only the visible wrapped lines, starting at start_line, straight into messages_win."""
+    channel = ui_state.channel_list[ui_state.selected_channel]
+    width = messages_win.getmaxyx()[1]
+    wrapped = get_wrapped_messages(channel, width - 2)
+    row_width = max(width - 3, 0)  # Between the left border and the scroll arrow column
+
+    # Map the first visible line to its message, then walk forward
+    entry_index = bisect_right(wrapped.line_starts, start_line) - 1
+    line_index = start_line - wrapped.line_starts[entry_index] if entry_index >= 0 else 0
+    entry_index = max(entry_index, 0)
+
+    for row in range(row_count):
+        while entry_index < len(wrapped.lines) and line_index >= len(wrapped.lines[entry_index]):
+            entry_index += 1
+            line_index = 0
+
+        if entry_index >= len(wrapped.lines):
+            messages_win.addstr(row + 1, 1, " " * row_width, get_color("background"))
+            continue
+
+        line, color = wrapped.lines[entry_index][line_index]
+        messages_win.addstr(row + 1, 1, pad_to_width(line, row_width), get_color(color))
+        line_index += 1
+
+
+def get_node_row_text(node_num: int, box_width: int) -> str:
+    """Rendered text of one node row, reused until the node's displayed fields or the pane width change."""
+    node = interface_state.interface.nodesByNum[node_num]
+    user = node.get("user") or {}
+    secure = bool(user.get("publicKey"))
+    # The resolved name, not just longName, so rows falling back to the database name pick up renames
+    node_name = get_node_display_name(node_num, node)
+    fields = (secure, node_name, box_width)
+
+    cached = ui_state.node_row_cache.get(node_num)
+    if cached is not None and cached[0] == fields:
+        return cached[1]
+
+    status_icon = "🔐" if secure else "🔓"
+
+    # Future node name custom formatting possible
+    node_str = truncate_with_ellipsis(f"{status_icon} {node_name}", box_width - 4)
+    ui_state.node_row_cache[node_num] = (fields, node_str)
+    return node_str
+
+
+def draw_node_list(rows: Optional[Iterable[int]] = None) -> None:
+    """
+    Update the nodes list window and pad based on the current state.
+
+    With rows, only those pad rows are rewritten, as long as the pad still matches the list size
+    and pane width; otherwise, or without rows, the whole pad is repainted.
+    """
     global nodes_pad
 
     if ui_state.current_window != 2 and ui_state.single_pane_mode:
@@ -1169,34 +1389,36 @@ def draw_node_list() -> None:
     if nodes_pad is None:
         nodes_pad = curses.newpad(1, 1)
 
-    try:
-        nodes_pad.erase()
-        box_width = nodes_win.getmaxyx()[1]
-        nodes_pad.resize(len(ui_state.node_list) + 1, box_width)
-    except Exception as e:
-        logging.error(f"Error Drawing Nodes List: {e}")
-        logging.error("Traceback: %s", traceback.format_exc())
-
-    for i, node_num in enumerate(ui_state.node_list):
-        node = interface_state.interface.nodesByNum[node_num]
-        secure = "user" in node and "publicKey" in node["user"] and node["user"]["publicKey"]
-        status_icon = "🔐" if secure else "🔓"
-        node_name = get_node_display_name(node_num, node)
-
-        # Future node name custom formatting possible
-        node_str = truncate_with_ellipsis(f"{status_icon} {node_name}", box_width - 4)
-        nodes_pad.addstr(i, 1, node_str, get_node_row_color(i))
-
-    paint_frame(nodes_win, selected=(ui_state.current_window == 2))
-    nodes_win.refresh()
+    box_width = nodes_win.getmaxyx()[1]
+    full_repaint = rows is None or nodes_pad.getmaxyx() != (len(ui_state.node_list) + 1, box_width)
+    rows = range(len(ui_state.node_list)) if full_repaint else sorted(set(rows))
+    ui_state.dirty_node_rows.clear()
+
+    if full_repaint:
+        try:
+            nodes_pad.erase()
+            nodes_pad.resize(len(ui_state.node_list) + 1, box_width)
+        except Exception as e:
+            logging.error(f"Error Drawing Nodes List: {e}")
+            logging.error("Traceback: %s", traceback.format_exc())
+
+    for i in rows:
+        if not 0 <= i < len(ui_state.node_list):
+            continue
+        if not full_repaint:
+            nodes_pad.move(i, 0)
+            nodes_pad.clrtoeol()
+        nodes_pad.addstr(i, 1, get_node_row_text(ui_state.node_list[i], box_width), get_node_row_color(i))
+
+    if full_repaint:
+        paint_frame(nodes_win, selected=(ui_state.current_window == 2))
     refresh_pad(2)
     draw_window_arrows(2)
-    nodes_win.refresh()
 
     # Restore cursor to input field
     entry_win.keypad(True)
     curses.curs_set(1)
-    entry_win.refresh()
+    entry_win.noutrefresh()
 
     if ui_state.current_window == 4:
         menu_state.need_redraw = True
@@ -1206,6 +1428,12 @@ def select_channel(idx: int) -> None:
     """Select a channel by index and update the UI state accordingly."""
     old_selected_channel = ui_state.selected_channel
     ui_state.selected_channel = max(0, min(idx, len(ui_state.channel_list) - 1))
+
+    # A history window opened at a search hit is closed once another channel is selected
+    selected = ui_state.channel_list[ui_state.selected_channel] if ui_state.channel_list else None
+    for channel in [channel for channel in ui_state.history_windows if channel != selected]:
+        del ui_state.history_windows[channel]
+
     draw_messages_window(True)
 
     # For now just re-draw channel list when clearing notifications, we can probably make this more efficient
@@ -1236,11 +1464,64 @@ def scroll_channels(direction: int) -> None:
     select_channel(new_selected_channel)
 
 
+def load_older_history() -> bool:
+    """Prepend the next page of stored history to the selected channel, keeping the current view in place."""
+    channel = ui_state.channel_list[ui_state.selected_channel]
+    old_line_count = get_message_line_count()
+
+    added = load_older_messages(channel)
+    if not added:
+        return False
+
+    added_lines = max(0, get_message_line_count() - old_line_count)
+    ui_state.selected_message += added_lines
+    ui_state.start_index[1] += added_lines
+    return True
+
+
+def load_newer_history() -> bool:
+    """
+    Append the next page of stored history to a channel opened at a search hit, keeping the view in place.
+
+    Once that reaches the newest stored message, the channel's live messages are shown again, scrolled
+    so the same message stays at the bottom of the view.
+    """
+    channel = ui_state.channel_list[ui_state.selected_channel]
+    window = ui_state.history_windows.get(channel)
+    if window is None:
+        return False
+    if load_newer_messages(channel):
+        return True
+
+    del ui_state.history_windows[channel]
+    live = ui_state.all_messages.get(channel)
+    last_index = None
+    if live is not None and len(window.store):
+        last_row = window.store.row(len(window.store) - 1)
+        last_index = find_message_index(live, last_row[0], last_row[-1])
+
+    wrapped = get_wrapped_messages(channel, messages_win.getmaxyx()[1] - 2)
+    if last_index is None:
+        bottom_line = wrapped.line_count
+    else:
+        bottom_line = wrapped.line_starts[last_index] + len(wrapped.lines[last_index])
+    ui_state.selected_message = max(bottom_line - get_msg_window_lines(messages_win, packetlog_win), 0)
+    ui_state.start_index[1] = ui_state.selected_message
+    return True
+
+
 def scroll_messages(direction: int) -> None:
     """Scroll through the messages in the current channel by a given direction."""
+    if direction < 0 and ui_state.selected_message == 0:
+        load_older_history()
+    elif direction > 0 and ui_state.selected_message >= get_message_line_count() - get_msg_window_lines(
+        messages_win, packetlog_win
+    ):
+        load_newer_history()
+
     ui_state.selected_message += direction
 
-    msg_line_count = messages_pad.getmaxyx()[0]
+    msg_line_count = get_message_line_count()
     ui_state.selected_message = max(
         0, min(ui_state.selected_message, msg_line_count - get_msg_window_lines(messages_win, packetlog_win))
     )
@@ -1258,7 +1539,7 @@ def scroll_messages(direction: int) -> None:
         0, min(ui_state.start_index[ui_state.current_window], max_index - visible_height + 1)
     )
 
-    messages_win.refresh()
+    messages_win.noutrefresh()
     refresh_pad(1)
     draw_window_arrows(ui_state.current_window)
 
@@ -1290,58 +1571,74 @@ def scroll_nodes(direction: int) -> None:
     select_node(new_selected_node)
 
 
-def draw_packetlog_win() -> None:
-    """Draw the packet log window with the latest packets."""
-    columns = [10, 10, 15, 30]
-    span = 0
+def get_packet_log_size() -> int:
+    """Number of packet log records to keep, from config.packet_log_size."""
+    try:
+        return max(int(getattr(config, "packet_log_size", DEFAULT_PACKET_LOG_SIZE)), 1)
+    except (TypeError, ValueError):
+        return DEFAULT_PACKET_LOG_SIZE
+
+
+def format_packet_log_record(packet: dict, message: Optional[Message] = None) -> str:
+    """Format a received packet as one packet log line, untruncated; message is its decoded payload, if known."""
+    from_id = get_name_from_database(packet.get("from"), "short").ljust(PACKET_LOG_COLUMNS[0])
+    to_id = (
+        "BROADCAST".ljust(PACKET_LOG_COLUMNS[1])
+        if str(packet.get("to")) == "4294967295"
+        else get_name_from_database(packet.get("to"), "short").ljust(PACKET_LOG_COLUMNS[1])
+    )
+    if "decoded" in packet:
+        port = str(packet["decoded"].get("portnum", "")).ljust(PACKET_LOG_COLUMNS[2])
+        parsed_payload = parse_protobuf(packet, message)
+    else:
+        port = "NO KEY".ljust(PACKET_LOG_COLUMNS[2])
+        parsed_payload = "NO KEY"
+
+    return f"{from_id} {to_id} {port} {parsed_payload}"
+
 
+def draw_packetlog_win() -> None:
+    """Draw the packet log window with the latest packets, or older ones when scrolled back."""
     if ui_state.current_window != 1 and ui_state.single_pane_mode:
         return
 
     if ui_state.display_log:
         packetlog_win.erase()
         height, width = packetlog_win.getmaxyx()
-
-        for column in columns[:-1]:
-            span += column
+        span = sum(PACKET_LOG_COLUMNS[:-1])
 
         # Add headers
-        headers = f"{'From':<{columns[0]}} {'To':<{columns[1]}} {'Port':<{columns[2]}} {'Payload':<{width-span}}"
+        headers = (
+            f"{'From':<{PACKET_LOG_COLUMNS[0]}} {'To':<{PACKET_LOG_COLUMNS[1]}} "
+            f"{'Port':<{PACKET_LOG_COLUMNS[2]}} {'Payload':<{width-span}}"
+        )
         packetlog_win.addstr(
             1, 1, headers[: width - 2], get_color("log_header", underline=True)
         )  # Truncate headers if they exceed window width
 
-        for i, packet in enumerate(reversed(ui_state.packet_buffer)):
-            if i >= height - 3:  # Skip if exceeds the window height
-                break
-
-            # Format each field
-            from_id = get_name_from_database(packet["from"], "short").ljust(columns[0])
-            to_id = (
-                "BROADCAST".ljust(columns[1])
-                if str(packet["to"]) == "4294967295"
-                else get_name_from_database(packet["to"], "short").ljust(columns[1])
-            )
-            if "decoded" in packet:
-                port = str(packet["decoded"].get("portnum", "")).ljust(columns[2])
-                parsed_payload = parse_protobuf(packet)
-            else:
-                port = "NO KEY".ljust(columns[2])
-                parsed_payload = "NO KEY"
-
-            # Combine and truncate if necessary
-            logString = f"{from_id} {to_id} {port} {parsed_payload}"
-            logString = logString[: width - 3]
+        records = ui_state.packet_buffer
+        ui_state.packetlog_offset = max(0, min(ui_state.packetlog_offset, len(records) - 1))
+        newest = len(records) - 1 - ui_state.packetlog_offset
 
-            # Add to the window
-            packetlog_win.addstr(i + 2, 1, logString, get_color("log"))
+        for i in range(max(0, min(height - 3, newest + 1))):
+            # Add to the window, truncated if necessary
+            packetlog_win.addstr(i + 2, 1, records[newest - i][: width - 3], get_color("log"))
 
         paint_frame(packetlog_win, selected=False)
 
     # Restore cursor to input field
     entry_win.keypad(True)
     curses.curs_set(1)
-    entry_win.refresh()
+    entry_win.noutrefresh()
+
+
+def scroll_packet_log(direction: int) -> None:
+    """Scroll the packet log; positive directions move back towards older records."""
+    if not ui_state.display_log:
+        return
+
+    ui_state.packetlog_offset = max(0, min(ui_state.packetlog_offset + direction, len(ui_state.packet_buffer) - 1))
+    draw_packetlog_win()
 
 
 def search(win: int) -> None:
@@ -1393,6 +1690,99 @@ def search(win: int) -> None:
     entry_win.erase()
 
 
+def find_message_index(store: MessageStore, timestamp: int, rowid: int) -> Optional[int]:
+    """Index of a stored message in a store, or None if the store does not hold it."""
+    # Rows loaded from history carry their database id; messages from this session are matched by content
+    index = store.find_db_id(rowid)
+    if index is None:
+        stored = get_stored_message(rowid)
+        index = store.find_unsaved(timestamp, *stored) if stored is not None else None
+    return index
+
+
+def jump_to_message(channel: Union[str, int], timestamp: int, rowid: int) -> bool:
+    """
+    Select the channel holding a stored message and scroll it into view.
+
+    A message older than the channel's loaded history is shown in a history window holding one page
+    either side of it, rather than paging in everything newer.
+    """
+    if channel not in ui_state.channel_list:
+        return False
+
+    if ui_state.history_cursors.get(channel, (timestamp, rowid)) <= (timestamp, rowid):
+        ui_state.history_windows.pop(channel, None)
+    else:
+        window = ui_state.history_windows.get(channel)
+        if (window is None or window.store.find_db_id(rowid) is None) and not open_history_window(
+            channel, timestamp, rowid
+        ):
+            return False
+
+    select_channel(ui_state.channel_list.index(channel))
+
+    store = get_message_store(channel)
+    hit_index = find_message_index(store, timestamp, rowid) if store is not None else None
+    if hit_index is None:
+        return False
+
+    line_offset = get_wrapped_messages(channel, messages_win.getmaxyx()[1] - 2).line_starts[hit_index]
+    max_start = max(get_message_line_count() - get_msg_window_lines(messages_win, packetlog_win), 0)
+    ui_state.selected_message = min(line_offset, max_start)
+    ui_state.start_index[1] = ui_state.selected_message
+
+    refresh_pad(1)
+    draw_window_arrows(1)
+    return True
+
+
+def search_message_history() -> None:
+    """Search stored message text, jumping to the newest hit as you type and to older hits on Tab."""
+    flush_db_writes()
+
+    search_text = ""
+    current_hit = None
+    entry_win.erase()
+    # Wait for keys rather than polling with the main loop's redraw timeout; the loop sets it again on return
+    entry_win.timeout(-1)
+
+    try:
+        while True:
+            prompt = t("ui.prompt.search_messages", default="Search messages")
+            draw_centered_text_field(entry_win, f"{prompt}: {search_text}", 0, get_color("input"))
+            char = entry_win.get_wch()
+
+            if char in (chr(27), chr(curses.KEY_ENTER), chr(10), chr(13)):
+                break
+            elif char == "\t":
+                if current_hit is None:
+                    continue
+                hit = search_messages(search_text, before=current_hit[1:])
+            elif char in (curses.KEY_BACKSPACE, chr(127)):
+                if not search_text:
+                    continue
+                search_text = search_text[:-1]
+                entry_win.erase()
+                hit = search_messages(search_text)
+            elif isinstance(char, str):
+                search_text += char
+                hit = search_messages(search_text)
+            else:
+                continue
+
+            # Skip hits in archived conversations, which have no channel to jump to
+            while hit is not None and hit[0] not in ui_state.channel_list:
+                hit = search_messages(search_text, before=hit[1:])
+
+            if hit is not None:
+                current_hit = hit
+                jump_to_message(*hit)
+    finally:
+        entry_win.timeout(INPUT_IDLE_TIMEOUT_MS)
+
+    entry_win.erase()
+
+
 def refresh_pad(window: int) -> None:
 
     # If in single-pane mode and this isn't the focused window, skip refreshing its (collapsed) pad
@@ -1403,14 +1793,13 @@ def refresh_pad(window: int) -> None:
     win_height = channel_win.getmaxyx()[0]
 
     if window == 1:
-        pad = messages_pad
         box = messages_win
         lines = get_msg_window_lines(messages_win, packetlog_win)
         start_index = ui_state.start_index[1]
 
         if ui_state.display_log:
             packetlog_win.box()
-            packetlog_win.refresh()
+            packetlog_win.noutrefresh()
 
     elif window == 2:
         pad = nodes_pad
@@ -1438,6 +1827,14 @@ def refresh_pad(window: int) -> None:
     # Clamp lines to available inner height
     lines = max(0, min(lines, inner_h))
 
+    if window == 1:
+        # Messages are virtualized: only the visible lines are drawn, directly into the frame
+        start_index = max(0, min(start_index, get_message_line_count() - 1))
+        draw_message_rows(start_index, lines)
+        draw_frame_title(box, get_window_title(window))
+        box.noutrefresh()
+        return
+
     # Clamp start_index within the pad's height
     pad_h, pad_w = pad.getmaxyx()
     if pad_h <= 0:
@@ -1453,9 +1850,9 @@ def refresh_pad(window: int) -> None:
         return
 
     draw_frame_title(box, get_window_title(window))
-    box.refresh()
+    box.noutrefresh()
 
-    pad.refresh(
+    pad.noutrefresh(
         start_index,
         0,
         top,
@@ -224,7 +224,14 @@ def initialize_config() -> Dict[str, object]:
         "channel_list_16ths": "3",
         "node_list_16ths": "5",
         "single_pane_mode": "False",
+        "redraw_max_fps": "20",
+        "packet_log_size": "1000",
         "db_file_path": db_file_path,
+        "db_write_behind": "True",
+        "message_retention_days": "0",
+        "message_retention_rows": "0",
+        "message_archive_path": "",
+        "db_incremental_vacuum": "False",
         "log_file_path": log_file_path,
         "node_configs_file_path": node_configs_file_path,
         "language": default_language,
@@ -232,6 +239,8 @@ def initialize_config() -> Dict[str, object]:
         "sent_message_prefix": ">> Sent",
         "notification_symbol": "*",
         "notification_sound": "True",
+        "notification_muted_channels": "",
+        "notification_priority_channels": "",
         "ack_implicit_str": "[◌]",
         "ack_str": "[✓]",
         "nak_str": "[x]",
@@ -268,16 +277,25 @@ def initialize_config() -> Dict[str, object]:
 def assign_config_variables(loaded_config: Dict[str, object]) -> None:
     # Assign values to local variables
 
-    global db_file_path, log_file_path, node_configs_file_path, message_prefix, sent_message_prefix
+    global db_file_path, db_write_behind, message_retention_days, message_retention_rows, message_archive_path
+    global db_incremental_vacuum
+    global log_file_path, node_configs_file_path, message_prefix, sent_message_prefix
     global notification_symbol, ack_implicit_str, ack_str, nak_str, ack_unknown_str
-    global node_list_16ths, channel_list_16ths, single_pane_mode
+    global node_list_16ths, channel_list_16ths, single_pane_mode, redraw_max_fps, packet_log_size
     global theme, COLOR_CONFIG, language
-    global node_sort, notification_sound
+    global node_sort, notification_sound, notification_muted_channels, notification_priority_channels
 
     channel_list_16ths = loaded_config["channel_list_16ths"]
     node_list_16ths = loaded_config["node_list_16ths"]
     single_pane_mode = loaded_config["single_pane_mode"]
+    redraw_max_fps = loaded_config["redraw_max_fps"]
+    packet_log_size = loaded_config["packet_log_size"]
     db_file_path = loaded_config["db_file_path"]
+    db_write_behind = loaded_config["db_write_behind"]
+    message_retention_days = loaded_config["message_retention_days"]
+    message_retention_rows = loaded_config["message_retention_rows"]
+    message_archive_path = loaded_config["message_archive_path"]
+    db_incremental_vacuum = loaded_config["db_incremental_vacuum"]
     log_file_path = loaded_config["log_file_path"]
     node_configs_file_path = loaded_config.get("node_configs_file_path")
     language = loaded_config["language"]
@@ -285,6 +303,8 @@ def assign_config_variables(loaded_config: Dict[str, object]) -> None:
     sent_message_prefix = loaded_config["sent_message_prefix"]
     notification_symbol = loaded_config["notification_symbol"]
     notification_sound = loaded_config["notification_sound"]
+    notification_muted_channels = loaded_config["notification_muted_channels"]
+    notification_priority_channels = loaded_config["notification_priority_channels"]
     ack_implicit_str = loaded_config["ack_implicit_str"]
     ack_str = loaded_config["ack_str"]
     nak_str = loaded_config["nak_str"]
@@ -1,11 +1,27 @@
 import curses
 import re
+from datetime import datetime
+from itertools import accumulate
 from unicodedata import east_asian_width
 
+import contact.ui.default_config as config
 from contact.ui.colors import get_color
+from contact.ui.ui_state import WrappedMessageLines
+from contact.utilities.db_handler import get_name_from_database
 from contact.utilities.i18n import t
 from contact.utilities.control_utils import transform_menu_path
-from typing import Any, Optional, List, Dict
+from contact.utilities.emoji_utils import normalize_message_text
+from contact.utilities.message_store import (
+    ACK_IMPLICIT,
+    ACK_NAK,
+    ACK_OK,
+    KIND_SENT,
+    KIND_TRACEROUTE,
+    KIND_TRACEROUTE_SENT,
+    NO_HOPS,
+    MessageStore,
+)
+from typing import Any, Optional, List, Dict, Tuple
 from contact.utilities.singleton import interface_state, ui_state
 
 
@@ -327,23 +343,37 @@ def get_wrapped_help_text(
     return wrapped_help
 
 
+WHITESPACE_TO_SPACE = dict.fromkeys(map(ord, "\t\n\x0b\x0c\r "), ord(" "))
+
+# Display width per codepoint, filled in as characters are first seen
+_char_widths: Dict[str, int] = {}
+
+
+def char_width(char: str) -> int:
+    width = _char_widths.get(char)
+    if width is None:
+        width = _char_widths[char] = 2 if east_asian_width(char) in "FW" else 1
+    return width
+
+
 def text_width(text: str) -> int:
-    return sum(2 if east_asian_width(c) in "FW" else 1 for c in text)
+    if text.isascii():
+        return len(text)
+    return sum(map(char_width, text))
 
 
 def slice_to_width(text: str, max_width: int) -> str:
     if max_width <= 0:
         return ""
+    if text.isascii():
+        return text[:max_width]
 
     width = 0
-    chars = []
-    for char in text:
-        char_width = text_width(char)
-        if width + char_width > max_width:
-            break
-        chars.append(char)
-        width += char_width
-    return "".join(chars)
+    for index, char in enumerate(text):
+        width += char_width(char)
+        if width > max_width:
+            return text[:index]
+    return text
 
 
 def pad_to_width(text: str, width: int) -> str:
@@ -364,24 +394,34 @@ def truncate_with_ellipsis(text: str, width: int) -> str:
 def split_text_to_width_chunks(text: str, width: int) -> List[str]:
     if width <= 0:
         return [""]
+    if text.isascii():
+        return [text[start : start + width] for start in range(0, len(text), width)] or [""]
 
     chunks = []
-    remaining = text
-    while remaining:
-        chunk = slice_to_width(remaining, width)
-        if not chunk:
+    chunk_start = 0
+    chunk_width = 0
+    for index, char in enumerate(text):
+        current_width = char_width(char)
+        if current_width > width:
+            # Can never fit; the rest of the text is dropped
             break
-        chunks.append(chunk)
-        remaining = remaining[len(chunk) :]
+        if chunk_width + current_width > width:
+            chunks.append(text[chunk_start:index])
+            chunk_start = index
+            chunk_width = 0
+        chunk_width += current_width
+    else:
+        index = len(text)
+
+    if index > chunk_start:
+        chunks.append(text[chunk_start:index])
     return chunks or [""]
 
 
 def wrap_text(text: str, wrap_width: int) -> List[str]:
     """Wraps text while preserving spaces and breaking long words."""
 
-    whitespace = "\t\n\x0b\x0c\r "
-    whitespace_trans = dict.fromkeys(map(ord, whitespace), ord(" "))
-    text = text.translate(whitespace_trans)
+    text = text.translate(WHITESPACE_TO_SPACE)
 
     words = re.findall(r"\S+|\s+", text)  # Capture words and spaces separately
     wrapped_lines = []
@@ -415,6 +455,110 @@ def wrap_text(text: str, wrap_width: int) -> List[str]:
     return wrapped_lines
 
 
+def format_message_row(store: MessageStore, index: int) -> List[Tuple[str, str]]:
+    """Build the display text of one stored message, preceded by an hour separator when the hour changes."""
+    moment = datetime.fromtimestamp(store.timestamps[index])
+    hour = moment.strftime("%Y-%m-%d %H:00")
+    parts = []
+    if index == 0 or datetime.fromtimestamp(store.timestamps[index - 1]).strftime("%Y-%m-%d %H:00") != hour:
+        parts.append((f"-- {hour} --", "timestamps"))
+
+    ts_str = moment.strftime("[%H:%M:%S]")
+    kind = store.kinds[index]
+    if kind == KIND_SENT:
+        ack_str = {
+            ACK_IMPLICIT: config.ack_implicit_str,
+            ACK_OK: config.ack_str,
+            ACK_NAK: config.nak_str,
+        }.get(store.acks[index], config.ack_unknown_str)
+        parts.append((f"{ts_str} {config.sent_message_prefix}{ack_str}: {store.texts[index]}", "tx_messages"))
+    elif kind == KIND_TRACEROUTE_SENT:
+        parts.append((f"{ts_str} {config.message_prefix} Sent Traceroute", "tx_messages"))
+    else:
+        name = get_name_from_database(store.senders[index], "short")
+        hops = f"[{store.hops[index]}] " if store.hops[index] != NO_HOPS else ""
+        separator = ":\n" if kind == KIND_TRACEROUTE else ": "
+        parts.append((f"{ts_str} {config.message_prefix} {hops}{name}{separator}{store.texts[index]}", "rx_messages"))
+
+    return parts
+
+
+def wrap_message_row(store: MessageStore, index: int, wrap_width: int) -> List[Tuple[str, str]]:
+    """Wrap one stored message the way the messages window displays it, as (line, color name) pairs."""
+    return [
+        (line, color)
+        for text, color in format_message_row(store, index)
+        for line in wrap_text(normalize_message_text(text), wrap_width)
+    ]
+
+
+def _reset_line_starts(wrapped: WrappedMessageLines) -> None:
+    wrapped.line_starts = [0, *accumulate(len(lines) for lines in wrapped.lines)]
+    wrapped.line_count = wrapped.line_starts.pop()
+
+
+def _replace_row(wrapped: WrappedMessageLines, index: int) -> None:
+    lines = wrap_message_row(wrapped.store, index, wrapped.width)
+    delta = len(lines) - len(wrapped.lines[index])
+    wrapped.lines[index] = lines
+    if delta:
+        for following in range(index + 1, len(wrapped.line_starts)):
+            wrapped.line_starts[following] += delta
+        wrapped.line_count += delta
+
+
+def get_message_store(channel: Any) -> Optional[MessageStore]:
+    """The store shown for a channel: the history window opened at a search hit, if any, else its live messages."""
+    window = ui_state.history_windows.get(channel)
+    return window.store if window is not None else ui_state.all_messages.get(channel)
+
+
+def get_wrapped_messages(channel: Any, wrap_width: int) -> WrappedMessageLines:
+    """
+    Return the wrapped lines of a channel's messages, reusing what was wrapped on earlier draws.
+
+    Only messages appended or prepended since the last call, and rows whose ACK state changed,
+    are formatted and wrapped again. A width change rebuilds lazily on the next call.
+    """
+    store = get_message_store(channel)
+    if store is None:
+        return WrappedMessageLines(width=wrap_width)
+
+    wrapped = ui_state.wrapped_messages.get(channel)
+    if (
+        wrapped is None
+        or wrapped.width != wrap_width
+        or wrapped.store is not store
+        or wrapped.first_id < store.first_id
+        or wrapped.first_id + len(wrapped.lines) > store.first_id + len(store)
+    ):
+        wrapped = WrappedMessageLines(width=wrap_width, store=store, first_id=store.first_id)
+        ui_state.wrapped_messages[channel] = wrapped
+
+    prepended = wrapped.first_id - store.first_id
+    if prepended:
+        wrapped.lines[:0] = [wrap_message_row(store, index, wrap_width) for index in range(prepended)]
+        wrapped.first_id = store.first_id
+        if len(wrapped.lines) > prepended:
+            # The formerly oldest message may no longer start a new hour
+            wrapped.lines[prepended] = wrap_message_row(store, prepended, wrap_width)
+        _reset_line_starts(wrapped)
+
+    for row_id in store.dirty_rows:
+        index = row_id - wrapped.first_id
+        if 0 <= index < len(wrapped.lines):
+            _replace_row(wrapped, index)
+    store.dirty_rows.clear()
+
+    for index in range(len(wrapped.lines), len(store)):
+        lines = wrap_message_row(store, index, wrap_width)
+        wrapped.lines.append(lines)
+        wrapped.line_starts.append(wrapped.line_count)
+        wrapped.line_count += len(lines)
+
+    return wrapped
+
+
 def move_main_highlight(
     old_idx: int, new_idx, options: List[str], menu_win: curses.window, menu_pad: curses.window, ui_state: object
 ) -> None:
@@ -441,7 +585,7 @@ def move_main_highlight(
         max_index += 1
 
     draw_main_arrows(menu_win, max_index, window=ui_state.current_window)
-    menu_win.refresh()
+    menu_win.noutrefresh()
 
 
 def highlight_line(
@@ -460,10 +604,10 @@ def highlight_line(
         menu_pad.chgat(old_idx, 1, menu_pad.getmaxyx()[1] - 4, get_node_color(old_idx))
         menu_pad.chgat(new_idx, 1, menu_pad.getmaxyx()[1] - 4, get_node_color(new_idx, reverse=True))
 
-    menu_win.refresh()
+    menu_win.noutrefresh()
 
     # Refresh pad only if scrolling is needed
-    menu_pad.refresh(
+    menu_pad.noutrefresh(
         ui_state.start_index[ui_state.current_window],
         0,
         menu_win.getbegyx()[0] + 1,
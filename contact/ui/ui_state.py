@@ -1,6 +1,9 @@
-from typing import Any, Union, List, Dict
+from collections import deque
+from typing import Any, Union, List, Deque, Dict, Optional, Set, Tuple
 from dataclasses import dataclass, field
 
+DEFAULT_PACKET_LOG_SIZE = 1000
+
 
 @dataclass
 class MenuState:
@@ -13,14 +16,46 @@ class MenuState:
     need_redraw: bool = False
 
 
+@dataclass
+class WrappedMessageLines:
+    width: int = 0
+    store: Any = None
+    first_id: int = 0
+    lines: List[List[Tuple[str, str]]] = field(default_factory=list)  # Per message: (line, color name) pairs
+    line_starts: List[int] = field(default_factory=list)
+    line_count: int = 0
+
+
+@dataclass
+class HistoryWindow:
+    store: Any = None  # MessageStore holding a slice of stored history, shown in place of the live store
+    older: Optional[Tuple[int, int]] = None  # (timestamp, rowid) cursor of the next older page; None when exhausted
+    newer: Optional[Tuple[int, int]] = None  # Cursor of the next newer page; None once the newest row is loaded
+
+
+@dataclass
+class ChannelListView:
+    channels: Tuple[Any, ...] = ()  # The channel_list the rows were built from
+    names: List[str] = field(default_factory=list)  # Display name per visible row; archived DMs are left out
+
+
 @dataclass
 class ChatUIState:
     display_log: bool = False
     channel_list: List[str] = field(default_factory=list)
-    all_messages: Dict[str, List[str]] = field(default_factory=dict)
+    channel_view: Optional[ChannelListView] = None  # None when names or archive state may have changed
+    all_messages: Dict[str, Any] = field(default_factory=dict)  # Channel -> MessageStore
+    history_cursors: Dict[str, Any] = field(default_factory=dict)
+    history_windows: Dict[str, HistoryWindow] = field(default_factory=dict)  # Channels showing a search hit
+    wrapped_messages: Dict[str, WrappedMessageLines] = field(default_factory=dict)
     notifications: List[str] = field(default_factory=list)
-    packet_buffer: List[str] = field(default_factory=list)
+    packet_buffer: Deque[str] = field(default_factory=lambda: deque(maxlen=DEFAULT_PACKET_LOG_SIZE))  # Log lines
+    packetlog_offset: int = 0  # Records scrolled back from the newest
     node_list: List[str] = field(default_factory=list)
+    node_index: Any = None  # NodeIndex that keeps node_list sorted
+    dirty_node_rows: Set[int] = field(default_factory=set)  # node_list rows to repaint on the next nodes redraw
+    node_row_cache: Dict[int, Tuple[Tuple[Any, ...], str]] = field(default_factory=dict)  # Node -> (fields, text)
+    node_trend_cache: Dict[Tuple[int, int], Tuple[float, List[str]]] = field(default_factory=dict)  # (node, range)
     selected_channel: int = 0
     selected_message: int = 0
     selected_node: int = 0
@@ -39,6 +74,7 @@ class ChatUIState:
     redraw_packetlog: bool = False
     redraw_full_ui: bool = False
     scroll_messages_to_bottom: bool = False
+    last_pane_redraw: Dict[str, float] = field(default_factory=dict)  # Pane -> time.monotonic() of last redraw
 
 
 @dataclass
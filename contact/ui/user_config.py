@@ -178,6 +178,10 @@ def edit_value(key: str, display_label: str, current_value: str) -> str:
         sound_options = ["True", "False"]
         return get_list_input(display_label, current_value, sound_options)
 
+    elif key == "db_write_behind" or key == "db_incremental_vacuum":
+        write_options = ["True", "False"]
+        return get_list_input(display_label, current_value, write_options)
+
     # Standard Input Mode (Scrollable)
     edit_win.addstr(7, 2, t("ui.label.new_value", default="New Value: "), get_color("settings_default"))
     curses.curs_set(1)
@@ -1,49 +1,567 @@
+import queue
 import sqlite3
+import threading
 import time
 import logging
-from datetime import datetime
-from typing import Optional, Union, Dict
-
+from array import array
+from collections import OrderedDict
+from typing import Optional, Union, Dict, List, Tuple
+
+from contact.utilities.message_store import (
+    ACK_CODES,
+    ACK_UNKNOWN,
+    KIND_RECEIVED,
+    KIND_SENT,
+    NO_HOPS,
+    MessageRow,
+    MessageStore,
+)
 from contact.utilities.utils import decimal_to_hex
 import contact.ui.default_config as config
 
 
+from contact.ui.ui_state import HistoryWindow
 from contact.utilities.singleton import ui_state, interface_state
 
+# Applied to every pooled connection when it is opened.
+DB_CONNECTION_PRAGMAS = (
+    "PRAGMA auto_vacuum=INCREMENTAL",  # Only takes effect on new files; see db_maintenance.compact_database
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8000",  # Negative means KiB, so roughly 8 MiB of page cache
+    "PRAGMA temp_store=MEMORY",
+)
+DB_BUSY_TIMEOUT_SECONDS = 5.0
+
+_db_local = threading.local()
+_db_connections: List[sqlite3.Connection] = []
+_db_connections_lock = threading.Lock()
+_db_generation = 0
+
+# Write-behind queue drained by a background writer thread (see config.db_write_behind)
+DB_WRITE_QUEUE_SIZE = 2048
+DB_WRITE_BATCH_ROWS = 64
+DB_WRITE_FLUSH_INTERVAL_SECONDS = 0.25
+DB_WRITER_JOIN_TIMEOUT_SECONDS = 5.0
+# How long a caller waits for room in a full queue before the write is dropped
+DB_WRITE_QUEUE_PUT_TIMEOUT_SECONDS = 0.5
+# Writes another connection kept locked past the busy timeout are retried with doubling pauses, then dropped
+DB_WRITE_BUSY_RETRIES = 3
+DB_WRITE_BUSY_RETRY_SECONDS = 0.5
+
+_db_write_queue: "queue.Queue[object]" = queue.Queue(maxsize=DB_WRITE_QUEUE_SIZE)
+_db_writer_thread: Optional[threading.Thread] = None
+_db_writer_lock = threading.Lock()
+_DB_WRITER_STOP = object()
+
+# Telemetry samples are rolled up into buckets of this many seconds as they are inserted
+TELEMETRY_ROLLUP_SECONDS = 60 * 60
+
+# Number of stored messages loaded per channel at startup and per scroll past the top
+MESSAGE_HISTORY_PAGE_SIZE = 500
+
+# Process-wide LRU cache of node names keyed by (user_id, "long"/"short")
+NAME_CACHE_SIZE = 4096
+_name_cache: "OrderedDict[Tuple[int, str], str]" = OrderedDict()
+_name_cache_lock = threading.Lock()
+_name_cache_scope: Optional[Tuple[str, int]] = None
+
+
+def get_db_connection() -> sqlite3.Connection:
+    """
+    Return the calling thread's long-lived connection to the configured database.
+
+    Connections are opened lazily, once per thread, and reopened if config.db_file_path
+    changes or close_db_connections() has been called since.
+    """
+    db_path = config.db_file_path
+    connection = getattr(_db_local, "connection", None)
+    if connection is not None and _db_local.path == db_path and _db_local.generation == _db_generation:
+        return connection
+
+    connection = sqlite3.connect(db_path, timeout=DB_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+    for pragma in DB_CONNECTION_PRAGMAS:
+        connection.execute(pragma)
+
+    with _db_connections_lock:
+        _db_connections.append(connection)
+        _db_local.connection = connection
+        _db_local.path = db_path
+        _db_local.generation = _db_generation
+
+    return connection
+
+
+def close_db_connections() -> None:
+    """Close every pooled connection. Threads transparently reconnect on their next query."""
+    global _db_generation
+
+    with _db_connections_lock:
+        connections = list(_db_connections)
+        _db_connections.clear()
+        _db_generation += 1
+
+    for connection in connections:
+        try:
+            connection.close()
+        except sqlite3.Error as e:
+            logging.warning(f"SQLite error while closing connection: {e}")
+
+
+def _is_busy_error(error: sqlite3.Error) -> bool:
+    """True for SQLITE_BUSY/SQLITE_LOCKED ("database is locked"), which clear once the other connection finishes."""
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in str(error) or "busy" in str(error))
+
+
+def _execute_with_busy_retries(db_connection: sqlite3.Connection, statements: List[Tuple[str, tuple]]) -> None:
+    """Run statements in one transaction, backing off and retrying a few times while the database is locked."""
+    for attempt in range(DB_WRITE_BUSY_RETRIES + 1):
+        try:
+            with db_connection:
+                for query, params in statements:
+                    db_connection.execute(query, params)
+            return
+        except sqlite3.Error as e:
+            if not _is_busy_error(e) or attempt == DB_WRITE_BUSY_RETRIES:
+                raise
+            logging.warning(f"Database busy, retrying {len(statements)} queued writes: {e}")
+            time.sleep(DB_WRITE_BUSY_RETRY_SECONDS * 2**attempt)
+
+
+def _commit_db_writes(batch: List[Tuple[str, tuple]]) -> None:
+    """Apply a batch of queued statements in a single transaction, falling back to one at a time on error."""
+    if not batch:
+        return
+
+    db_connection = None
+    try:
+        db_connection = get_db_connection()
+        _execute_with_busy_retries(db_connection, batch)
+        return
+    except sqlite3.Error as e:
+        if db_connection is None or _is_busy_error(e):
+            # Row-by-row retries would only wait out the same lock once per row
+            logging.error(f"SQLite error committing batch of {len(batch)} writes, dropping them: {e}")
+            return
+        logging.warning(f"SQLite error committing batch of {len(batch)} writes, retrying individually: {e}")
+
+    for query, params in batch:
+        try:
+            _execute_with_busy_retries(db_connection, [(query, params)])
+        except sqlite3.Error as e:
+            logging.error(f"SQLite error in queued write: {e}")
+
+
+def _db_writer_loop() -> None:
+    while True:
+        item = _db_write_queue.get()
+        batch = []
+        flush_events = []
+        stop = False
+        deadline = time.monotonic() + DB_WRITE_FLUSH_INTERVAL_SECONDS
+
+        # Gather writes until the batch is full, the flush interval expires, or a flush/stop is requested
+        while True:
+            if item is _DB_WRITER_STOP:
+                stop = True
+                break
+            if isinstance(item, threading.Event):
+                flush_events.append(item)
+                break
+
+            batch.append(item)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= DB_WRITE_BATCH_ROWS or remaining <= 0:
+                break
+            try:
+                item = _db_write_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+        try:
+            _commit_db_writes(batch)
+        except Exception as e:
+            logging.error(f"Unexpected error in database writer: {e}")
+
+        for event in flush_events:
+            event.set()
+        if stop:
+            return
+
+
+def _queue_db_write(query: str, params: tuple = ()) -> None:
+    """Queue a write for the background writer, or execute it immediately when write-behind is disabled."""
+    global _db_writer_thread
+
+    if config.db_write_behind != "True":
+        with get_db_connection() as db_connection:
+            db_connection.execute(query, params)
+        return
+
+    with _db_writer_lock:
+        if _db_writer_thread is None or not _db_writer_thread.is_alive():
+            _db_writer_thread = threading.Thread(target=_db_writer_loop, name="contact-db-writer", daemon=True)
+            _db_writer_thread.start()
+
+    try:
+        _db_write_queue.put((query, params), timeout=DB_WRITE_QUEUE_PUT_TIMEOUT_SECONDS)
+    except queue.Full:
+        # A stalled writer must not hang the UI or the packet worker; losing the row is the lesser harm
+        logging.warning(f"Database write queue full, dropping write: {query.split()[0]} {params!r:.80}")
 
-def get_table_name(channel: str) -> str:
-    # Construct the table name
-    table_name = f"{str(interface_state.myNodeNum)}_{channel}_messages"
-    quoted_table_name = f'"{table_name}"'  # Quote the table name becuase we begin with numerics and contain spaces
-    return quoted_table_name
 
+def flush_db_writes(timeout: float = DB_WRITER_JOIN_TIMEOUT_SECONDS) -> bool:
+    """Block until every write queued so far has been committed. Returns False if that takes over timeout."""
+    with _db_writer_lock:
+        writer = _db_writer_thread
+    if writer is None or not writer.is_alive():
+        return True
 
-def save_message_to_db(channel: str, user_id: str, message_text: str) -> Optional[int]:
-    """Save messages to the database, ensuring the table exists."""
+    deadline = time.monotonic() + timeout
+    flushed = threading.Event()
     try:
-        quoted_table_name = get_table_name(channel)
+        _db_write_queue.put(flushed, timeout=timeout)
+    except queue.Full:
+        logging.warning("Timed out queueing a database flush after %.1fs", timeout)
+        return False
+    return flushed.wait(max(deadline - time.monotonic(), 0))
+
+
+def stop_db_writer(timeout: float = DB_WRITER_JOIN_TIMEOUT_SECONDS) -> None:
+    """Flush pending writes and stop the background writer thread."""
+    global _db_writer_thread
+
+    with _db_writer_lock:
+        writer = _db_writer_thread
+        _db_writer_thread = None
+    if writer is None or not writer.is_alive():
+        return
+
+    deadline = time.monotonic() + timeout
+    try:
+        _db_write_queue.put(_DB_WRITER_STOP, timeout=timeout)
+    except queue.Full:
+        logging.warning("Timed out flushing queued database writes after %.1fs", timeout)
+        return
+    writer.join(max(deadline - time.monotonic(), 0))
+    if writer.is_alive():
+        logging.warning("Timed out flushing queued database writes after %.1fs", timeout)
 
-        schema = """
-            user_id TEXT,
-            message_text TEXT,
-            timestamp INTEGER,
-            ack_type TEXT
-        """
-        ensure_table_exists(quoted_table_name, schema)
 
-        with sqlite3.connect(config.db_file_path) as db_connection:
+def _name_cache_key(user_id: Union[int, str], type: str) -> Tuple[int, str]:
+    return int(user_id), "long" if type == "long" else "short"
+
+
+def _ensure_name_cache_scope() -> None:
+    """Drop cached names when the database or local node changes. Caller must hold _name_cache_lock."""
+    global _name_cache_scope
+
+    scope = (config.db_file_path, interface_state.myNodeNum)
+    if scope != _name_cache_scope:
+        _name_cache.clear()
+        _name_cache_scope = scope
+
+
+def _store_cached_name(key: Tuple[int, str], name: str) -> None:
+    """Insert or refresh a cache entry, evicting the least recently used one. Caller must hold _name_cache_lock."""
+    _name_cache[key] = name
+    _name_cache.move_to_end(key)
+    while len(_name_cache) > NAME_CACHE_SIZE:
+        _name_cache.popitem(last=False)
+
+
+def cache_node_names(user_id: Union[int, str], long_name: str, short_name: str) -> None:
+    """Update the cached long and short names for a node."""
+    with _name_cache_lock:
+        _ensure_name_cache_scope()
+        _store_cached_name(_name_cache_key(user_id, "long"), long_name)
+        _store_cached_name(_name_cache_key(user_id, "short"), short_name)
+
+
+def clear_name_cache() -> None:
+    with _name_cache_lock:
+        _name_cache.clear()
+
+
+def load_name_cache() -> None:
+    """Populate the node name cache in bulk from the node database."""
+    try:
+        with get_db_connection() as db_connection:
             db_cursor = db_connection.cursor()
-            timestamp = int(time.time())
+            nodeinfo_table = f'"{interface_state.myNodeNum}_nodedb"'
+            db_cursor.execute(f"SELECT user_id, long_name, short_name FROM {nodeinfo_table} LIMIT ?", (NAME_CACHE_SIZE // 2,))
+            rows = db_cursor.fetchall()
+
+        with _name_cache_lock:
+            _ensure_name_cache_scope()
+            for user_id, long_name, short_name in rows:
+                _store_cached_name(_name_cache_key(user_id, "long"), long_name)
+                _store_cached_name(_name_cache_key(user_id, "short"), short_name)
+
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error in load_name_cache: {e}")
+    except Exception as e:
+        logging.error(f"Unexpected error in load_name_cache: {e}")
+
+
+MESSAGES_TABLE_SCHEMA = """
+    id INTEGER PRIMARY KEY,
+    owner_node INTEGER NOT NULL,
+    channel_key TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    user_id TEXT,
+    text TEXT,
+    ack_type TEXT,
+    packet_id INTEGER
+"""
+
+
+def get_channel_key(channel: Union[str, int]) -> str:
+    """Channels are stored by name and DMs by node number, both as text."""
+    return str(channel)
+
+
+def parse_channel_key(channel_key: str) -> Union[str, int]:
+    # Convert the channel to an integer if it's numeric, otherwise keep it as a string (nodenum vs channel name)
+    return int(channel_key) if channel_key.isdigit() else channel_key
+
+
+def _migrate_create_messages_table(db_cursor: sqlite3.Cursor) -> None:
+    """Schema 1: unified messages table, its lookup indexes, and rows moved out of the legacy per-channel tables."""
+    db_cursor.execute(f"CREATE TABLE IF NOT EXISTS messages ({MESSAGES_TABLE_SCHEMA})")
+    db_cursor.execute(
+        "CREATE INDEX IF NOT EXISTS messages_owner_channel_ts ON messages (owner_node, channel_key, timestamp)"
+    )
+    db_cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS messages_owner_packet_id ON messages (owner_node, packet_id)
+        WHERE packet_id IS NOT NULL
+        """
+    )
+
+    db_cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%\\_messages' ESCAPE '\\'")
+    legacy_tables = [row[0] for row in db_cursor.fetchall()]
+
+    for table_name in legacy_tables:
+        owner_node, _, remainder = table_name.partition("_")
+        if not owner_node.isdigit() or not remainder.endswith("_messages"):
+            continue
+        channel_key = remainder[: -len("_messages")]
+
+        quoted_table_name = f'"{table_name}"'  # Quote the table name because we begin with numerics and contain spaces
+        table_columns = [i[1] for i in db_cursor.execute(f"PRAGMA table_info({quoted_table_name})")]
+        ack_column = "ack_type" if "ack_type" in table_columns else "NULL"
+
+        db_cursor.execute(
+            f"""
+            INSERT INTO messages (owner_node, channel_key, timestamp, user_id, text, ack_type)
+            SELECT ?, ?, timestamp, user_id, message_text, {ack_column}
+            FROM {quoted_table_name}
+            WHERE timestamp IS NOT NULL
+            ORDER BY rowid
+            """,
+            (int(owner_node), channel_key),
+        )
+        db_cursor.execute(f"DROP TABLE {quoted_table_name}")
+        logging.info(f"Migrated legacy message table {table_name}")
+
+
+def _migrate_add_chat_archived(db_cursor: sqlite3.Cursor) -> None:
+    """Schema 2: every existing nodedb table has a chat_archived column."""
+    db_cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%\\_nodedb' ESCAPE '\\'")
+    for (table_name,) in db_cursor.fetchall():
+        quoted_table_name = f'"{table_name}"'
+        table_columns = [i[1] for i in db_cursor.execute(f"PRAGMA table_info({quoted_table_name})")]
+        if "chat_archived" not in table_columns:
+            db_cursor.execute(f"ALTER TABLE {quoted_table_name} ADD COLUMN chat_archived INTEGER")
+
+
+def _migrate_create_message_search_index(db_cursor: sqlite3.Cursor) -> None:
+    """Schema 3: stable message ids and an FTS5 index over message text, kept in sync by triggers."""
+    message_columns = [i[1] for i in db_cursor.execute("PRAGMA table_info(messages)")]
+    if "id" not in message_columns:
+        # Without an INTEGER PRIMARY KEY, VACUUM may renumber rowids and orphan the search index
+        db_cursor.execute(f"CREATE TABLE messages_rebuild ({MESSAGES_TABLE_SCHEMA})")
+        db_cursor.execute(
+            """
+            INSERT INTO messages_rebuild (id, owner_node, channel_key, timestamp, user_id, text, ack_type, packet_id)
+            SELECT rowid, owner_node, channel_key, timestamp, user_id, text, ack_type, packet_id FROM messages
+            """
+        )
+        db_cursor.execute("DROP TABLE messages")
+        db_cursor.execute("ALTER TABLE messages_rebuild RENAME TO messages")
+        _migrate_create_messages_table(db_cursor)
 
-            # Insert the message
-            insert_query = f"""
-                INSERT INTO {quoted_table_name} (user_id, message_text, timestamp, ack_type)
-                VALUES (?, ?, ?, ?)
+    try:
+        db_cursor.execute(
+            """
+            CREATE VIRTUAL TABLE messages_fts USING fts5(
+                text, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+            )
             """
-            db_cursor.execute(insert_query, (user_id, message_text, timestamp, None))
+        )
+    except sqlite3.OperationalError as e:
+        logging.warning(f"Full-text search unavailable, falling back to substring search: {e}")
+        return
+
+    db_cursor.execute(
+        """
+        CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts (rowid, text) VALUES (new.id, new.text);
+        END
+        """
+    )
+    db_cursor.execute(
+        """
+        CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        END
+        """
+    )
+    db_cursor.execute(
+        """
+        CREATE TRIGGER messages_fts_update AFTER UPDATE OF text ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            INSERT INTO messages_fts (rowid, text) VALUES (new.id, new.text);
+        END
+        """
+    )
+    db_cursor.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+
+
+def _migrate_create_telemetry_tables(db_cursor: sqlite3.Cursor) -> None:
+    """Schema 4: per-node metric samples, plus rollups kept current by a trigger as samples arrive."""
+    db_cursor.execute(
+        """
+        CREATE TABLE telemetry_samples (
+            owner_node INTEGER NOT NULL,
+            node INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            value REAL NOT NULL,
+            PRIMARY KEY (owner_node, node, metric, ts)
+        ) WITHOUT ROWID
+        """
+    )
+    db_cursor.execute(
+        """
+        CREATE TABLE telemetry_rollups (
+            owner_node INTEGER NOT NULL,
+            node INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            bucket_ts INTEGER NOT NULL,
+            sample_count INTEGER NOT NULL,
+            total REAL NOT NULL,
+            min_value REAL NOT NULL,
+            max_value REAL NOT NULL,
+            PRIMARY KEY (owner_node, node, metric, bucket_ts)
+        ) WITHOUT ROWID
+        """
+    )
+    db_cursor.execute(
+        f"""
+        CREATE TRIGGER telemetry_samples_rollup AFTER INSERT ON telemetry_samples BEGIN
+            INSERT INTO telemetry_rollups
+                (owner_node, node, metric, bucket_ts, sample_count, total, min_value, max_value)
+            VALUES
+                (new.owner_node, new.node, new.metric, new.ts - new.ts % {TELEMETRY_ROLLUP_SECONDS}, 1,
+                 new.value, new.value, new.value)
+            ON CONFLICT (owner_node, node, metric, bucket_ts) DO UPDATE SET
+                sample_count = sample_count + 1,
+                total = total + excluded.total,
+                min_value = min(min_value, excluded.min_value),
+                max_value = max(max_value, excluded.max_value);
+        END
+        """
+    )
+
+
+def _migrate_create_message_channels_table(db_cursor: sqlite3.Cursor) -> None:
+    """Schema 5: each owner's channels with the id of their first message, kept current by an insert trigger."""
+    db_cursor.execute(
+        """
+        CREATE TABLE message_channels (
+            owner_node INTEGER NOT NULL,
+            channel_key TEXT NOT NULL,
+            first_id INTEGER NOT NULL,
+            PRIMARY KEY (owner_node, channel_key)
+        ) WITHOUT ROWID
+        """
+    )
+    db_cursor.execute(
+        """
+        INSERT INTO message_channels (owner_node, channel_key, first_id)
+        SELECT owner_node, channel_key, MIN(id) FROM messages GROUP BY owner_node, channel_key
+        """
+    )
+    db_cursor.execute(
+        """
+        CREATE TRIGGER message_channels_insert AFTER INSERT ON messages BEGIN
+            INSERT OR IGNORE INTO message_channels (owner_node, channel_key, first_id)
+            VALUES (new.owner_node, new.channel_key, new.id);
+        END
+        """
+    )
+
+
+# Applied in order; PRAGMA user_version records how many have run against the database file
+SCHEMA_MIGRATIONS = (
+    _migrate_create_messages_table,
+    _migrate_add_chat_archived,
+    _migrate_create_message_search_index,
+    _migrate_create_telemetry_tables,
+    _migrate_create_message_channels_table,
+)
+
+
+def run_migrations() -> None:
+    """Bring the database up to the current schema, one transaction per pending migration."""
+    db_connection = get_db_connection()
+    current_version = db_connection.execute("PRAGMA user_version").fetchone()[0]
+
+    for version, migration in enumerate(SCHEMA_MIGRATIONS, start=1):
+        if version <= current_version:
+            continue
+
+        db_cursor = db_connection.cursor()
+        try:
+            db_cursor.execute("BEGIN")
+            migration(db_cursor)
+            db_cursor.execute(f"PRAGMA user_version = {version}")
             db_connection.commit()
+        except sqlite3.Error:
+            db_connection.rollback()
+            raise
+        logging.info(f"Database migrated to schema version {version}")
+
+
+def init_database() -> None:
+    """Run pending schema migrations and create the local node's tables. Called once at startup."""
+    try:
+        run_migrations()
+        ensure_node_table_exists()
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error in init_database: {e}")
 
-            return timestamp
+
+def save_message_to_db(
+    channel: str, user_id: str, message_text: str, packet_id: Optional[int] = None
+) -> Optional[int]:
+    """Queue a message for saving to the database."""
+    try:
+        timestamp = int(time.time())
+
+        # Insert the message
+        insert_query = """
+            INSERT INTO messages (owner_node, channel_key, timestamp, user_id, text, ack_type, packet_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        _queue_db_write(
+            insert_query,
+            (interface_state.myNodeNum, get_channel_key(channel), timestamp, str(user_id), message_text, None, packet_id),
+        )
+
+        return timestamp
 
     except sqlite3.Error as e:
         logging.error(f"SQLite error in save_message_to_db: {e}")
@@ -51,20 +569,17 @@ def save_message_to_db(channel: str, user_id: str, message_text: str) -> Optiona
         logging.error(f"Unexpected error in save_message_to_db: {e}")
 
 
-def update_ack_nak(channel: str, timestamp: int, message: str, ack: str) -> None:
+def update_ack_nak(packet_id: int, ack: str) -> None:
+    """Record the ACK/NAK result for the message sent with the given packet id."""
     try:
-        with sqlite3.connect(config.db_file_path) as db_connection:
-            db_cursor = db_connection.cursor()
-            update_query = f"""
-                UPDATE {get_table_name(channel)}
-                SET ack_type = ?
-                WHERE user_id = ? AND
-                      timestamp = ? AND
-                      message_text = ?
-            """
+        # Packet ids are 32-bit and get reused, so only the newest message sent with this one is meant
+        update_query = """
+            UPDATE messages
+            SET ack_type = ?
+            WHERE id = (SELECT MAX(id) FROM messages WHERE owner_node = ? AND packet_id = ?)
+        """
 
-            db_cursor.execute(update_query, (ack, str(interface_state.myNodeNum), timestamp, message))
-            db_connection.commit()
+        _queue_db_write(update_query, (ack, interface_state.myNodeNum, packet_id))
 
     except sqlite3.Error as e:
         logging.error(f"SQLite error in update_ack_nak: {e}")
@@ -73,38 +588,97 @@ def update_ack_nak(channel: str, timestamp: int, message: str, ack: str) -> None
         logging.error(f"Unexpected error in update_ack_nak: {e}")
 
 
+def _message_rows(rows: List[tuple]) -> List[MessageRow]:
+    """Convert (rowid, user_id, text, timestamp, ack_type) database rows, oldest first, into message store rows."""
+    message_rows = []
+    my_node_id = str(interface_state.myNodeNum)
+
+    for row in rows:
+        rowid, user_id, message, timestamp, ack_type = row
+
+        # Only ack_type is allowed to be None
+        if user_id is None or message is None or timestamp is None:
+            logging.warning(f"Skipping row with NULL required field(s): {row}")
+            continue
+
+        kind = KIND_SENT if user_id == my_node_id else KIND_RECEIVED
+        ack = ACK_CODES.get(ack_type, ACK_UNKNOWN)
+        message_rows.append((timestamp, int(user_id), message.replace("\x00", ""), kind, ack, NO_HOPS, rowid))
+
+    return message_rows
+
+
+def _fetch_message_page(db_cursor: sqlite3.Cursor, channel_key: str, before: Optional[Tuple[int, int]]) -> List[tuple]:
+    """Fetch up to MESSAGE_HISTORY_PAGE_SIZE rows older than the (timestamp, rowid) cursor, newest first."""
+    if before is None:
+        query = """
+            SELECT rowid, user_id, text, timestamp, ack_type FROM messages
+            WHERE owner_node = ? AND channel_key = ?
+            ORDER BY timestamp DESC, rowid DESC
+            LIMIT ?
+        """
+        params = (interface_state.myNodeNum, channel_key, MESSAGE_HISTORY_PAGE_SIZE)
+    else:
+        query = """
+            SELECT rowid, user_id, text, timestamp, ack_type FROM messages
+            WHERE owner_node = ? AND channel_key = ? AND (timestamp, rowid) < (?, ?)
+            ORDER BY timestamp DESC, rowid DESC
+            LIMIT ?
+        """
+        params = (interface_state.myNodeNum, channel_key, before[0], before[1], MESSAGE_HISTORY_PAGE_SIZE)
+
+    db_cursor.execute(query, params)
+    return db_cursor.fetchall()
+
+
+def _fetch_newer_message_page(db_cursor: sqlite3.Cursor, channel_key: str, after: Tuple[int, int]) -> List[tuple]:
+    """Fetch up to MESSAGE_HISTORY_PAGE_SIZE rows newer than the (timestamp, rowid) cursor, oldest first."""
+    query = """
+        SELECT rowid, user_id, text, timestamp, ack_type FROM messages
+        WHERE owner_node = ? AND channel_key = ? AND (timestamp, rowid) > (?, ?)
+        ORDER BY timestamp, rowid
+        LIMIT ?
+    """
+    db_cursor.execute(query, (interface_state.myNodeNum, channel_key, after[0], after[1], MESSAGE_HISTORY_PAGE_SIZE))
+    return db_cursor.fetchall()
+
+
+def _page_cursor(page: List[tuple]) -> Optional[Tuple[int, int]]:
+    """(timestamp, rowid) of a full page's last row, where the next page starts; None if the page was the last."""
+    if len(page) < MESSAGE_HISTORY_PAGE_SIZE:
+        return None
+    last_rowid, _, _, last_timestamp, _ = page[-1]
+    return last_timestamp, last_rowid
+
+
+def _update_history_cursor(channel: Union[str, int], page: List[tuple]) -> None:
+    """Remember where the next older page starts, or forget the channel once its history is exhausted."""
+    cursor = _page_cursor(page)
+    if cursor is None:
+        ui_state.history_cursors.pop(channel, None)
+    else:
+        ui_state.history_cursors[channel] = cursor
+
+
 def load_messages_from_db() -> None:
-    """Load messages from the database for all channels and update ui_state.all_messages and ui_state.channel_list."""
+    """Load the most recent page of messages for every channel into ui_state.all_messages and ui_state.channel_list."""
     try:
-        with sqlite3.connect(config.db_file_path) as db_connection:
+        with get_db_connection() as db_connection:
             db_cursor = db_connection.cursor()
 
-            query = "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE ?"
-            db_cursor.execute(query, (f"{str(interface_state.myNodeNum)}_%_messages",))
-            tables = [row[0] for row in db_cursor.fetchall()]
-
-            # Iterate through each table and fetch its messages
-            for table_name in tables:
-                quoted_table_name = (
-                    f'"{table_name}"'  # Quote the table name because we begin with numerics and contain spaces
-                )
-                table_columns = [i[1] for i in db_cursor.execute(f"PRAGMA table_info({quoted_table_name})")]
-                if "ack_type" not in table_columns:
-                    update_table_query = f"ALTER TABLE {quoted_table_name} ADD COLUMN ack_type TEXT"
-                    db_cursor.execute(update_table_query)
-
-                query = f"SELECT user_id, message_text, timestamp, ack_type FROM {quoted_table_name}"
+            # Channels in the order their first message was stored
+            query = "SELECT channel_key FROM message_channels WHERE owner_node = ? ORDER BY first_id"
+            db_cursor.execute(query, (interface_state.myNodeNum,))
+            channel_keys = [row[0] for row in db_cursor.fetchall()]
 
+            # Iterate through each channel and fetch its latest messages
+            for channel_key in channel_keys:
                 try:
-                    # Fetch all messages from the table
-                    db_cursor.execute(query)
-                    db_messages = [(row[0], row[1], row[2], row[3]) for row in db_cursor.fetchall()]  # Save as tuples
-
-                    # Extract the channel name from the table name
-                    channel = table_name.split("_")[1]
+                    page = _fetch_message_page(db_cursor, channel_key, None)
+                    if not page:
+                        continue  # Every message was pruned
 
-                    # Convert the channel to an integer if it's numeric, otherwise keep it as a string (nodenum vs channel name)
-                    channel = int(channel) if channel.isdigit() else channel
+                    channel = parse_channel_key(channel_key)
 
                     # Add the channel to ui_state.channel_list if not already present
                     if channel not in ui_state.channel_list and not is_chat_archived(channel):
@@ -112,81 +686,287 @@ def load_messages_from_db() -> None:
 
                     # Ensure the channel exists in ui_state.all_messages
                     if channel not in ui_state.all_messages:
-                        ui_state.all_messages[channel] = []
-
-                    # Add messages to ui_state.all_messages grouped by hourly timestamp
-                    hourly_messages = {}
-                    for row in db_messages:
-                        user_id, message, timestamp, ack_type = row
-
-                        # Only ack_type is allowed to be None
-                        if user_id is None or message is None or timestamp is None:
-                            logging.warning(f"Skipping row with NULL required field(s): {row}")
-                            continue
-
-                        hour = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:00")
-                        if hour not in hourly_messages:
-                            hourly_messages[hour] = []
-
-                        ack_str = config.ack_unknown_str
-                        if ack_type == "Implicit":
-                            ack_str = config.ack_implicit_str
-                        elif ack_type == "Ack":
-                            ack_str = config.ack_str
-                        elif ack_type == "Nak":
-                            ack_str = config.nak_str
-
-                        ts_str = datetime.fromtimestamp(timestamp).strftime("[%H:%M:%S]")
-
-                        if user_id == str(interface_state.myNodeNum):
-                            sanitized_message = message.replace("\x00", "")
-                            formatted_message = (
-                                f"{ts_str} {config.sent_message_prefix}{ack_str}: ",
-                                sanitized_message,
-                            )
-                        else:
-                            sanitized_message = message.replace("\x00", "")
-                            formatted_message = (
-                                f"{ts_str} {config.message_prefix} {get_name_from_database(int(user_id), 'short')}: ",
-                                sanitized_message,
-                            )
-
-                        hourly_messages[hour].append(formatted_message)
-
-                    # Flatten the hourly messages into ui_state.all_messages[channel]
-                    for hour, messages in sorted(hourly_messages.items()):
-                        ui_state.all_messages[channel].append((f"-- {hour} --", ""))
-                        ui_state.all_messages[channel].extend(messages)
+                        ui_state.all_messages[channel] = MessageStore()
+
+                    _update_history_cursor(channel, page)
+                    ui_state.all_messages[channel].extend(_message_rows(page[::-1]))
 
                 except sqlite3.Error as e:
-                    logging.error(f"SQLite error while loading messages from table '{table_name}': {e}")
+                    logging.error(f"SQLite error while loading messages for channel '{channel_key}': {e}")
 
     except sqlite3.Error as e:
         logging.error(f"SQLite error in load_messages_from_db: {e}")
 
 
+def load_older_messages(channel: Union[str, int]) -> int:
+    """
+    Prepend the next older page of stored history to the store shown for a channel.
+
+    That is the channel's history window when one is open, else its live store in ui_state.all_messages.
+
+    :return: The number of messages added to the front of the store.
+    """
+    window = ui_state.history_windows.get(channel)
+    before = window.older if window is not None else ui_state.history_cursors.get(channel)
+    if before is None:
+        return 0
+
+    try:
+        with get_db_connection() as db_connection:
+            page = _fetch_message_page(db_connection.cursor(), get_channel_key(channel), before)
+
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error in load_older_messages: {e}")
+        return 0
+
+    if window is not None:
+        window.older = _page_cursor(page)
+        return window.store.prepend(_message_rows(page[::-1]))
+
+    _update_history_cursor(channel, page)
+    store = ui_state.all_messages.setdefault(channel, MessageStore())
+    return store.prepend(_message_rows(page[::-1]))
+
+
+def load_newer_messages(channel: Union[str, int]) -> int:
+    """
+    Append the next newer page of stored history to a channel's history window.
+
+    :return: The number of messages added, 0 once the window holds the newest stored message.
+    """
+    window = ui_state.history_windows.get(channel)
+    if window is None or window.newer is None:
+        return 0
+
+    try:
+        with get_db_connection() as db_connection:
+            page = _fetch_newer_message_page(db_connection.cursor(), get_channel_key(channel), window.newer)
+
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error in load_newer_messages: {e}")
+        return 0
+
+    window.newer = _page_cursor(page)
+    window.store.extend(_message_rows(page))
+    return len(page)
+
+
+def open_history_window(channel: Union[str, int], timestamp: int, rowid: int) -> bool:
+    """
+    Show a channel from one page of stored history either side of a message, instead of its live store.
+
+    Further pages are loaded with load_older_messages and load_newer_messages as the view scrolls.
+    """
+    channel_key = get_channel_key(channel)
+    try:
+        with get_db_connection() as db_connection:
+            db_cursor = db_connection.cursor()
+            # The cursor is exclusive, so start just past the hit to include it
+            older = _fetch_message_page(db_cursor, channel_key, (timestamp, rowid + 1))
+            newer = _fetch_newer_message_page(db_cursor, channel_key, (timestamp, rowid))
+
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error in open_history_window: {e}")
+        return False
+
+    store = MessageStore()
+    store.extend(_message_rows(older[::-1] + newer))
+    ui_state.history_windows[channel] = HistoryWindow(store=store, older=_page_cursor(older), newer=_page_cursor(newer))
+    return True
+
+
+def _build_fts_query(search_text: str) -> Optional[str]:
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    terms = ['"' + term.replace('"', '""') + '"*' for term in search_text.split()]
+    return " ".join(terms) if terms else None
+
+
+def search_messages(
+    search_text: str, before: Optional[Tuple[int, int]] = None
+) -> Optional[Tuple[Union[str, int], int, int]]:
+    """
+    Find the newest stored message matching search_text, older than the optional (timestamp, rowid) cursor.
+
+    :return: (channel, timestamp, rowid) of the hit, or None when nothing matches.
+    """
+    fts_query = _build_fts_query(search_text)
+    if fts_query is None:
+        return None
+
+    keyset = "AND (m.timestamp, m.rowid) < (?, ?)" if before is not None else ""
+    keyset_params = tuple(before) if before is not None else ()
+
+    try:
+        with get_db_connection() as db_connection:
+            db_cursor = db_connection.cursor()
+            db_cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='messages_fts'")
+
+            if db_cursor.fetchone():
+                query = f"""
+                    SELECT m.channel_key, m.timestamp, m.rowid FROM messages_fts
+                    JOIN messages m ON m.rowid = messages_fts.rowid
+                    WHERE messages_fts MATCH ? AND m.owner_node = ? {keyset}
+                    ORDER BY m.timestamp DESC, m.rowid DESC
+                    LIMIT 1
+                """
+                params = (fts_query, interface_state.myNodeNum) + keyset_params
+            else:
+                escaped_text = search_text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                query = f"""
+                    SELECT m.channel_key, m.timestamp, m.rowid FROM messages m
+                    WHERE m.text LIKE ? ESCAPE '\\' AND m.owner_node = ? {keyset}
+                    ORDER BY m.timestamp DESC, m.rowid DESC
+                    LIMIT 1
+                """
+                params = (f"%{escaped_text}%", interface_state.myNodeNum) + keyset_params
+
+            db_cursor.execute(query, params)
+            row = db_cursor.fetchone()
+
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error in search_messages: {e}")
+        return None
+
+    if row is None:
+        return None
+    channel_key, timestamp, rowid = row
+    return parse_channel_key(channel_key), timestamp, rowid
+
+
+def get_stored_message(rowid: int) -> Optional[Tuple[int, str]]:
+    """The (sender, text) of a stored message, or None if there is no such row."""
+    try:
+        with get_db_connection() as db_connection:
+            db_cursor = db_connection.cursor()
+            db_cursor.execute(
+                "SELECT user_id, text FROM messages WHERE owner_node = ? AND rowid = ?",
+                (interface_state.myNodeNum, rowid),
+            )
+            row = db_cursor.fetchone()
+
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error in get_stored_message: {e}")
+        return None
+
+    if row is None or row[0] is None or row[1] is None:
+        return None
+    return int(row[0]), row[1]
+
+
+def save_telemetry_samples(node_num: int, samples: Dict[str, float], timestamp: Optional[int] = None) -> None:
+    """Queue one reading per metric for a node; a repeat of a metric within the same second is ignored."""
+    if not samples:
+        return
+
+    try:
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        insert_query = """
+            INSERT OR IGNORE INTO telemetry_samples (owner_node, node, metric, ts, value)
+            VALUES (?, ?, ?, ?, ?)
+        """
+        for metric, value in samples.items():
+            _queue_db_write(insert_query, (interface_state.myNodeNum, node_num, metric, timestamp, float(value)))
+
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error in save_telemetry_samples: {e}")
+    except Exception as e:
+        logging.error(f"Unexpected error in save_telemetry_samples: {e}")
+
+
+def get_telemetry_summary(node_num: int, since: int) -> Dict[str, Tuple[float, float, float]]:
+    """
+    (min, avg, max) of each metric recorded for a node since the given time, read from the rollups.
+
+    The window is widened to the start of the rollup bucket containing since.
+    """
+    try:
+        with get_db_connection() as db_connection:
+            db_cursor = db_connection.cursor()
+            db_cursor.execute(
+                """
+                SELECT metric, MIN(min_value), SUM(total) / SUM(sample_count), MAX(max_value)
+                FROM telemetry_rollups
+                WHERE owner_node = ? AND node = ? AND bucket_ts >= ?
+                GROUP BY metric
+                """,
+                (interface_state.myNodeNum, node_num, since - since % TELEMETRY_ROLLUP_SECONDS),
+            )
+            return {metric: (low, mean, high) for metric, low, mean, high in db_cursor.fetchall()}
+
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error in get_telemetry_summary: {e}")
+        return {}
+
+
+def get_telemetry_series(node_num: int, since: int) -> Dict[str, Tuple[array, array, array]]:
+    """
+    A node's recorded metrics since the given time, as (timestamps, totals, weights) arrays per metric.
+
+    Raw samples come back with weight 1. Older periods whose samples were already pruned come from
+    the rollups, as the bucket's sum and sample count.
+    """
+    series: Dict[str, Tuple[array, array, array]] = {}
+    try:
+        with get_db_connection() as db_connection:
+            db_cursor = db_connection.cursor()
+            db_cursor.execute(
+                f"""
+                SELECT metric, ts, value, 1 FROM telemetry_samples
+                WHERE owner_node = :owner AND node = :node AND ts >= :since
+                UNION ALL
+                SELECT metric, bucket_ts, total, sample_count FROM telemetry_rollups AS rollup
+                WHERE owner_node = :owner AND node = :node AND bucket_ts >= :since
+                    AND NOT EXISTS (
+                        SELECT 1 FROM telemetry_samples AS sample
+                        WHERE sample.owner_node = rollup.owner_node
+                            AND sample.node = rollup.node
+                            AND sample.metric = rollup.metric
+                            AND sample.ts < rollup.bucket_ts + {TELEMETRY_ROLLUP_SECONDS}
+                    )
+                """,
+                {"owner": interface_state.myNodeNum, "node": node_num, "since": since},
+            )
+            for metric, timestamp, total, weight in db_cursor:
+                if metric not in series:
+                    series[metric] = (array("q"), array("d"), array("d"))
+                timestamps, totals, weights = series[metric]
+                timestamps.append(timestamp)
+                totals.append(total)
+                weights.append(weight)
+            return series
+
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error in get_telemetry_series: {e}")
+        return {}
+
+
 def init_nodedb() -> None:
     """Initialize the node database and update it with nodes from the interface."""
 
     try:
         if not interface_state.interface.nodes:
+            load_name_cache()
             return  # No nodes to initialize
 
-        ensure_node_table_exists()  # Ensure the table exists before insertion
         nodes_snapshot = list(interface_state.interface.nodes.values())
 
-        # Insert or update all nodes
-        for node in nodes_snapshot:
-            update_node_info_in_db(
-                user_id=node["num"],
-                long_name=node["user"].get("longName", ""),
-                short_name=node["user"].get("shortName", ""),
-                hw_model=node["user"].get("hwModel", ""),
-                is_licensed=node["user"].get("isLicensed", "0"),
-                role=node["user"].get("role", "CLIENT"),
-                public_key=node["user"].get("publicKey", ""),
-            )
-
+        # Insert or update all nodes in a single transaction
+        bulk_update_node_info_in_db(
+            [
+                {
+                    "user_id": node["num"],
+                    "long_name": node["user"].get("longName", ""),
+                    "short_name": node["user"].get("shortName", ""),
+                    "hw_model": node["user"].get("hwModel", ""),
+                    "is_licensed": node["user"].get("isLicensed", "0"),
+                    "role": node["user"].get("role", "CLIENT"),
+                    "public_key": node["user"].get("publicKey", ""),
+                }
+                for node in nodes_snapshot
+            ]
+        )
+
+        load_name_cache()
         logging.info("Node database initialized successfully.")
 
     except sqlite3.Error as e:
@@ -214,6 +994,61 @@ def maybe_store_nodeinfo_in_db(packet: Dict[str, object]) -> None:
         logging.error(f"Unexpected error in maybe_store_nodeinfo_in_db: {e}")
 
 
+NODE_UPSERT_QUERY = """
+    INSERT INTO {table_name} (user_id, long_name, short_name, hw_model, is_licensed, role, public_key, chat_archived)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        long_name = excluded.long_name,
+        short_name = excluded.short_name,
+        hw_model = excluded.hw_model,
+        is_licensed = excluded.is_licensed,
+        role = excluded.role,
+        public_key = excluded.public_key,
+        chat_archived = excluded.chat_archived
+"""
+
+
+NODE_RECORD_FIELDS = ("long_name", "short_name", "hw_model", "is_licensed", "role", "public_key", "chat_archived")
+
+
+def _merge_node_record(
+    user_id: Union[int, str],
+    fields: Tuple[object, ...],
+    existing_record: Optional[Tuple[object, ...]],
+) -> Tuple[object, ...]:
+    """Fill unset node fields from the stored row, then from defaults. Returns the upsert parameter tuple."""
+    long_name, short_name, hw_model, is_licensed, role, public_key, chat_archived = fields
+
+    if existing_record:
+        (
+            existing_long_name,
+            existing_short_name,
+            existing_hw_model,
+            existing_is_licensed,
+            existing_role,
+            existing_public_key,
+            existing_chat_archived,
+        ) = existing_record[1:]
+
+        long_name = long_name if long_name is not None else existing_long_name
+        short_name = short_name if short_name is not None else existing_short_name
+        hw_model = hw_model if hw_model is not None else existing_hw_model
+        is_licensed = is_licensed if is_licensed is not None else existing_is_licensed
+        role = role if role is not None else existing_role
+        public_key = public_key if public_key is not None else existing_public_key
+        chat_archived = chat_archived if chat_archived is not None else existing_chat_archived
+
+    long_name = long_name if long_name is not None else "Meshtastic " + str(decimal_to_hex(user_id)[-4:])
+    short_name = short_name if short_name is not None else str(decimal_to_hex(user_id)[-4:])
+    hw_model = hw_model if hw_model is not None else "UNSET"
+    is_licensed = is_licensed if is_licensed is not None else 0
+    role = role if role is not None else "CLIENT"
+    public_key = public_key if public_key is not None else ""
+    chat_archived = chat_archived if chat_archived is not None else 0
+
+    return (user_id, long_name, short_name, hw_model, is_licensed, role, public_key, chat_archived)
+
+
 def update_node_info_in_db(
     user_id: Union[int, str],
     long_name: Optional[str] = None,
@@ -226,72 +1061,58 @@ def update_node_info_in_db(
 ) -> None:
     """Update or insert node information into the database, preserving unchanged fields."""
     try:
-        ensure_node_table_exists()  # Ensure the table exists before any operation
-
-        with sqlite3.connect(config.db_file_path) as db_connection:
+        with get_db_connection() as db_connection:
             db_cursor = db_connection.cursor()
             table_name = f'"{interface_state.myNodeNum}_nodedb"'  # Quote in case of numeric names
 
-            table_columns = [i[1] for i in db_cursor.execute(f"PRAGMA table_info({table_name})")]
-            if "chat_archived" not in table_columns:
-                update_table_query = f"ALTER TABLE {table_name} ADD COLUMN chat_archived INTEGER"
-                db_cursor.execute(update_table_query)
-
             # Fetch existing values to preserve unchanged fields
             db_cursor.execute(f"SELECT * FROM {table_name} WHERE user_id = ?", (user_id,))
-            existing_record = db_cursor.fetchone()
-
-            if existing_record:
-                (
-                    existing_long_name,
-                    existing_short_name,
-                    existing_hw_model,
-                    existing_is_licensed,
-                    existing_role,
-                    existing_public_key,
-                    existing_chat_archived,
-                ) = existing_record[1:]
-
-                long_name = long_name if long_name is not None else existing_long_name
-                short_name = short_name if short_name is not None else existing_short_name
-                hw_model = hw_model if hw_model is not None else existing_hw_model
-                is_licensed = is_licensed if is_licensed is not None else existing_is_licensed
-                role = role if role is not None else existing_role
-                public_key = public_key if public_key is not None else existing_public_key
-                chat_archived = chat_archived if chat_archived is not None else existing_chat_archived
-
-            long_name = long_name if long_name is not None else "Meshtastic " + str(decimal_to_hex(user_id)[-4:])
-            short_name = short_name if short_name is not None else str(decimal_to_hex(user_id)[-4:])
-            hw_model = hw_model if hw_model is not None else "UNSET"
-            is_licensed = is_licensed if is_licensed is not None else 0
-            role = role if role is not None else "CLIENT"
-            public_key = public_key if public_key is not None else ""
-            chat_archived = chat_archived if chat_archived is not None else 0
-
-            # Upsert logic
-            upsert_query = f"""
-                INSERT INTO {table_name} (user_id, long_name, short_name, hw_model, is_licensed, role, public_key, chat_archived)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(user_id) DO UPDATE SET
-                    long_name = excluded.long_name,
-                    short_name = excluded.short_name,
-                    hw_model = excluded.hw_model,
-                    is_licensed = excluded.is_licensed,
-                    role = excluded.role,
-                    public_key = excluded.public_key,
-                    chat_archived = excluded.chat_archived
-            """
-            db_cursor.execute(
-                upsert_query, (user_id, long_name, short_name, hw_model, is_licensed, role, public_key, chat_archived)
+            record = _merge_node_record(
+                user_id,
+                (long_name, short_name, hw_model, is_licensed, role, public_key, chat_archived),
+                db_cursor.fetchone(),
             )
+
+            db_cursor.execute(NODE_UPSERT_QUERY.format(table_name=table_name), record)
             db_connection.commit()
 
+        cache_node_names(user_id, record[1], record[2])
+        ui_state.channel_view = None  # DM names or archive state may have changed
+
     except sqlite3.Error as e:
         logging.error(f"SQLite error in update_node_info_in_db: {e}")
     except Exception as e:
         logging.error(f"Unexpected error in update_node_info_in_db: {e}")
 
 
+def bulk_update_node_info_in_db(nodes: List[Dict[str, object]]) -> None:
+    """Upsert many nodes in one transaction, reading the existing rows once instead of per node."""
+    try:
+        with get_db_connection() as db_connection:
+            db_cursor = db_connection.cursor()
+            table_name = f'"{interface_state.myNodeNum}_nodedb"'  # Quote in case of numeric names
+
+            existing_records = {row[0]: row for row in db_cursor.execute(f"SELECT * FROM {table_name}")}
+
+            records = []
+            for node in nodes:
+                user_id = node["user_id"]
+                fields = tuple(node.get(field) for field in NODE_RECORD_FIELDS)
+                records.append(_merge_node_record(user_id, fields, existing_records.get(str(user_id))))
+
+            db_cursor.executemany(NODE_UPSERT_QUERY.format(table_name=table_name), records)
+            db_connection.commit()
+
+        for record in records:
+            cache_node_names(record[0], record[1], record[2])
+        ui_state.channel_view = None
+
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error in bulk_update_node_info_in_db: {e}")
+    except Exception as e:
+        logging.error(f"Unexpected error in bulk_update_node_info_in_db: {e}")
+
+
 def ensure_node_table_exists() -> None:
     """Ensure the node database table exists."""
     table_name = f'"{interface_state.myNodeNum}_nodedb"'  # Quote for safety
@@ -311,7 +1132,7 @@ def ensure_node_table_exists() -> None:
 def ensure_table_exists(table_name: str, schema: str) -> None:
     """Ensure the given table exists in the database."""
     try:
-        with sqlite3.connect(config.db_file_path) as db_connection:
+        with get_db_connection() as db_connection:
             db_cursor = db_connection.cursor()
             create_table_query = f"CREATE TABLE IF NOT EXISTS {table_name} ({schema})"
             db_cursor.execute(create_table_query)
@@ -331,7 +1152,15 @@ def get_name_from_database(user_id: int, type: str = "long") -> str:
     :return: The retrieved name or the hex of the user id
     """
     try:
-        with sqlite3.connect(config.db_file_path) as db_connection:
+        key = _name_cache_key(user_id, type)
+        with _name_cache_lock:
+            _ensure_name_cache_scope()
+            cached_name = _name_cache.get(key)
+            if cached_name is not None:
+                _name_cache.move_to_end(key)
+                return cached_name
+
+        with get_db_connection() as db_connection:
             db_cursor = db_connection.cursor()
 
             # Construct table name
@@ -346,7 +1175,11 @@ def get_name_from_database(user_id: int, type: str = "long") -> str:
             db_cursor.execute(query, (user_id,))
             result = db_cursor.fetchone()
 
-            return result[0] if result else decimal_to_hex(user_id)
+        name = result[0] if result else decimal_to_hex(user_id)
+        with _name_cache_lock:
+            _ensure_name_cache_scope()
+            _store_cached_name(key, name)
+        return name
 
     except sqlite3.Error as e:
         logging.error(f"SQLite error in get_name_from_database: {e}")
@@ -359,7 +1192,7 @@ def get_name_from_database(user_id: int, type: str = "long") -> str:
 
 def is_chat_archived(user_id: int) -> int:
     try:
-        with sqlite3.connect(config.db_file_path) as db_connection:
+        with get_db_connection() as db_connection:
             db_cursor = db_connection.cursor()
             table_name = f"{str(interface_state.myNodeNum)}_nodedb"
             nodeinfo_table = f'"{table_name}"'
@@ -0,0 +1,253 @@
+import gzip
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import contact.ui.default_config as config
+from contact.utilities.db_handler import get_db_connection
+
+# First pass runs shortly after startup, then periodically for long-running sessions
+DB_MAINTENANCE_START_DELAY_SECONDS = 30.0
+DB_MAINTENANCE_INTERVAL_SECONDS = 6 * 60 * 60
+DB_MAINTENANCE_JOIN_TIMEOUT_SECONDS = 5.0
+
+# Rows deleted per transaction, so the write-behind writer is never locked out for long
+PRUNE_BATCH_ROWS = 1000
+
+# Free pages returned to the filesystem per maintenance pass
+INCREMENTAL_VACUUM_PAGES = 4096
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+# Raw telemetry samples are kept this long; older hourly rollups are merged into one per day
+TELEMETRY_SAMPLE_RETENTION_DAYS = 7
+TELEMETRY_HOURLY_ROLLUP_DAYS = 30
+DAY_SECONDS = 24 * 60 * 60
+
+ARCHIVED_MESSAGE_COLUMNS = ("id", "owner_node", "channel_key", "timestamp", "user_id", "text", "ack_type", "packet_id")
+
+_maintenance_thread: Optional[threading.Thread] = None
+_maintenance_stop = threading.Event()
+_maintenance_lock = threading.Lock()
+
+
+def _config_int(name: str) -> int:
+    """Read a non-negative integer setting, treating blanks and bad values as 0 (disabled)."""
+    value = getattr(config, name, "0")
+    try:
+        return max(int(str(value).strip() or 0), 0)
+    except ValueError:
+        logging.warning(f"Ignoring invalid {name} setting: {value!r}")
+        return 0
+
+
+def get_retention_policy() -> Tuple[int, int]:
+    """Return (max age in days, max rows per channel); 0 disables either limit."""
+    return _config_int("message_retention_days"), _config_int("message_retention_rows")
+
+
+def archive_messages(rows: List[tuple]) -> None:
+    """Append pruned rows as JSON lines to the gzip archive, if one is configured."""
+    archive_path = getattr(config, "message_archive_path", "")
+    if not archive_path or not rows:
+        return
+
+    # Each call appends a new gzip member; gzip readers decompress the concatenation transparently
+    with gzip.open(archive_path, "at", encoding="utf-8") as archive:
+        for row in rows:
+            archive.write(json.dumps(dict(zip(ARCHIVED_MESSAGE_COLUMNS, row)), ensure_ascii=False) + "\n")
+
+
+def _prune_where(db_connection: sqlite3.Connection, condition: str, params: tuple) -> int:
+    """Archive and delete matching messages in bounded batches, committing after each."""
+    columns = ", ".join(ARCHIVED_MESSAGE_COLUMNS)
+    pruned = 0
+
+    while True:
+        db_cursor = db_connection.cursor()
+        db_cursor.execute(
+            f"SELECT {columns} FROM messages WHERE {condition} ORDER BY id LIMIT ?", params + (PRUNE_BATCH_ROWS,)
+        )
+        rows = db_cursor.fetchall()
+        if not rows:
+            return pruned
+
+        archive_messages(rows)
+        db_cursor.executemany("DELETE FROM messages WHERE id = ?", [(row[0],) for row in rows])
+        db_connection.commit()
+        pruned += len(rows)
+
+        if len(rows) < PRUNE_BATCH_ROWS:
+            return pruned
+
+
+def prune_messages(now: Optional[float] = None) -> int:
+    """
+    Delete messages older than the retention age and beyond the per-channel row limit.
+
+    :return: The number of messages removed.
+    """
+    max_age_days, max_rows = get_retention_policy()
+    db_connection = get_db_connection()
+    pruned = 0
+
+    if max_age_days:
+        cutoff = int((now if now is not None else time.time()) - max_age_days * 24 * 60 * 60)
+        pruned += _prune_where(db_connection, "timestamp < ?", (cutoff,))
+
+    if max_rows:
+        db_cursor = db_connection.cursor()
+        db_cursor.execute(
+            "SELECT owner_node, channel_key FROM messages GROUP BY owner_node, channel_key HAVING COUNT(*) > ?",
+            (max_rows,),
+        )
+        for owner_node, channel_key in db_cursor.fetchall():
+            # The oldest row still kept; everything sorting before it goes
+            db_cursor.execute(
+                """
+                SELECT timestamp, id FROM messages
+                WHERE owner_node = ? AND channel_key = ?
+                ORDER BY timestamp DESC, id DESC
+                LIMIT 1 OFFSET ?
+                """,
+                (owner_node, channel_key, max_rows - 1),
+            )
+            boundary = db_cursor.fetchone()
+            if boundary is None:
+                continue
+            pruned += _prune_where(
+                db_connection,
+                "owner_node = ? AND channel_key = ? AND (timestamp, id) < (?, ?)",
+                (owner_node, channel_key) + tuple(boundary),
+            )
+
+    return pruned
+
+
+def rollup_telemetry(now: Optional[float] = None) -> Tuple[int, int]:
+    """
+    Delete raw telemetry samples past their retention, whose summary the rollups already hold, and
+    downsample hourly rollups older than TELEMETRY_HOURLY_ROLLUP_DAYS to daily ones.
+
+    :return: (samples deleted, rollup rows merged away).
+    """
+    now = int(now if now is not None else time.time())
+    db_connection = get_db_connection()
+    db_cursor = db_connection.cursor()
+
+    # One short transaction per series, each a range over the primary key
+    sample_cutoff = now - TELEMETRY_SAMPLE_RETENTION_DAYS * DAY_SECONDS
+    db_cursor.execute("SELECT DISTINCT owner_node, node, metric FROM telemetry_samples")
+    deleted = 0
+    for series in db_cursor.fetchall():
+        with db_connection:
+            deleted += db_connection.execute(
+                "DELETE FROM telemetry_samples WHERE owner_node = ? AND node = ? AND metric = ? AND ts < ?",
+                series + (sample_cutoff,),
+            ).rowcount
+
+    # Only whole days are merged, so a day is never split between hourly and daily rows
+    rollup_cutoff = now - now % DAY_SECONDS - TELEMETRY_HOURLY_ROLLUP_DAYS * DAY_SECONDS
+    db_cursor.execute(
+        f"""
+        SELECT owner_node, node, metric, bucket_ts - bucket_ts % {DAY_SECONDS} AS day,
+            SUM(sample_count), SUM(total), MIN(min_value), MAX(max_value), COUNT(*)
+        FROM telemetry_rollups
+        WHERE bucket_ts < ?
+        GROUP BY owner_node, node, metric, day
+        HAVING COUNT(*) > 1
+        """,
+        (rollup_cutoff,),
+    )
+    days = db_cursor.fetchall()
+    if days:
+        with db_connection:
+            db_connection.executemany(
+                """
+                DELETE FROM telemetry_rollups
+                WHERE owner_node = ? AND node = ? AND metric = ? AND bucket_ts >= ? AND bucket_ts < ?
+                """,
+                [(owner_node, node, metric, day, day + DAY_SECONDS) for owner_node, node, metric, day, *_ in days],
+            )
+            db_connection.executemany(
+                """
+                INSERT INTO telemetry_rollups
+                    (owner_node, node, metric, bucket_ts, sample_count, total, min_value, max_value)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [row[:8] for row in days],
+            )
+
+    return deleted, sum(row[8] - 1 for row in days)
+
+
+def compact_database() -> None:
+    """
+    Return free pages to the filesystem once the file uses incremental auto_vacuum.
+
+    Switching an existing file over takes one full VACUUM that rewrites the whole database, so it only
+    happens when a retention limit is set or db_incremental_vacuum opts in.
+    """
+    db_connection = get_db_connection()
+
+    if db_connection.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+        db_connection.execute(f"PRAGMA incremental_vacuum({INCREMENTAL_VACUUM_PAGES})").fetchall()
+        return
+
+    if not any(get_retention_policy()) and getattr(config, "db_incremental_vacuum", "False") != "True":
+        return
+
+    # Existing files only pick up the new auto_vacuum mode after one full VACUUM
+    db_connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    db_connection.execute("VACUUM")
+    logging.info("Database converted to incremental auto_vacuum")
+
+
+def run_db_maintenance() -> None:
+    """Prune expired history, downsample old telemetry and compact the database file once."""
+    try:
+        pruned = prune_messages()
+        if pruned:
+            logging.info(f"Pruned {pruned} messages past the retention policy")
+        deleted, merged = rollup_telemetry()
+        if deleted or merged:
+            logging.info(f"Dropped {deleted} old telemetry samples and merged {merged} hourly rollups")
+        compact_database()
+    except (sqlite3.Error, OSError) as e:
+        logging.error(f"Error in run_db_maintenance: {e}")
+
+
+def _db_maintenance_loop() -> None:
+    delay = DB_MAINTENANCE_START_DELAY_SECONDS
+    while not _maintenance_stop.wait(delay):
+        run_db_maintenance()
+        delay = DB_MAINTENANCE_INTERVAL_SECONDS
+
+
+def start_db_maintenance() -> None:
+    """Start the background maintenance thread if it is not already running."""
+    global _maintenance_thread
+
+    with _maintenance_lock:
+        if _maintenance_thread is not None and _maintenance_thread.is_alive():
+            return
+        _maintenance_stop.clear()
+        _maintenance_thread = threading.Thread(target=_db_maintenance_loop, name="contact-db-maintenance", daemon=True)
+        _maintenance_thread.start()
+
+
+def stop_db_maintenance(timeout: float = DB_MAINTENANCE_JOIN_TIMEOUT_SECONDS) -> None:
+    """Stop the background maintenance thread, waiting for an in-progress pass to finish."""
+    global _maintenance_thread
+
+    with _maintenance_lock:
+        maintenance_thread = _maintenance_thread
+        _maintenance_thread = None
+    if maintenance_thread is None:
+        return
+
+    _maintenance_stop.set()
+    maintenance_thread.join(timeout)
@@ -1,11 +1,10 @@
 import os
-import sqlite3
 import tempfile
 from dataclasses import dataclass
 from typing import Dict, List, Tuple, Union
 
 import contact.ui.default_config as config
-from contact.utilities.db_handler import get_table_name
+from contact.utilities.db_handler import get_channel_key, get_db_connection
 from contact.utilities.singleton import interface_state
 
 
@@ -134,25 +133,16 @@ def configure_demo_database(base_dir: str = "") -> str:
 
 
 def seed_demo_messages() -> None:
-    schema = """
-        user_id TEXT,
-        message_text TEXT,
-        timestamp INTEGER,
-        ack_type TEXT
-    """
-
-    with sqlite3.connect(config.db_file_path) as db_connection:
+    with get_db_connection() as db_connection:
         cursor = db_connection.cursor()
 
         for channel_name, rows in _demo_messages().items():
-            table_name = get_table_name(channel_name)
-            cursor.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({schema})")
             cursor.executemany(
-                f"""
-                INSERT INTO {table_name} (user_id, message_text, timestamp, ack_type)
-                VALUES (?, ?, ?, ?)
+                """
+                INSERT INTO messages (owner_node, channel_key, user_id, text, timestamp, ack_type)
+                VALUES (?, ?, ?, ?, ?, ?)
                 """,
-                rows,
+                [(interface_state.myNodeNum, get_channel_key(channel_name), *row) for row in rows],
             )
 
         db_connection.commit()
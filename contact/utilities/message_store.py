@@ -0,0 +1,141 @@
+"""Compact per-channel message history; display strings are built at render time, not stored."""
+
+from array import array
+from typing import Iterable, List, Optional, Set, Tuple
+
+ACK_UNKNOWN = 0
+ACK_IMPLICIT = 1
+ACK_OK = 2
+ACK_NAK = 3
+
+# ack_type values as stored in the database
+ACK_CODES = {None: ACK_UNKNOWN, "Implicit": ACK_IMPLICIT, "Ack": ACK_OK, "Nak": ACK_NAK}
+
+KIND_RECEIVED = 0
+KIND_SENT = 1
+KIND_TRACEROUTE = 2
+KIND_TRACEROUTE_SENT = 3
+
+# Hop count of rows whose packet carried none. Stored hop counts are not clipped, so this is the
+# smallest 'q' value, which hopStart - hopLimit can never reach
+NO_HOPS = -(2**63)
+
+# Rows with no database row: live messages whose write is still queued, and traceroutes
+NO_DB_ID = 0
+
+# (timestamp, sender, text, kind, ack, hops, db_id), oldest first; db_id may be left off
+MessageRow = Tuple[int, int, str, int, int, int, int]
+
+
+class MessageStore:
+    """
+    One channel's messages as parallel columns.
+
+    Rows are addressed by stable ids that survive older history being prepended: row 0 has id
+    first_id, which drops by the number of rows each prepend adds.
+    """
+
+    __slots__ = ("timestamps", "senders", "acks", "kinds", "hops", "db_ids", "texts", "first_id", "dirty_rows")
+
+    def __init__(self) -> None:
+        self.timestamps = array("q")
+        self.senders = array("Q")
+        self.acks = array("B")
+        self.kinds = array("B")
+        self.hops = array("q")
+        self.db_ids = array("q")  # messages.id of rows loaded from the database, else NO_DB_ID
+        self.texts: List[str] = []
+        self.first_id = 0
+        self.dirty_rows: Set[int] = set()  # Row ids whose display changed since the view last synced
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def row_index(self, row_id: int) -> int:
+        return row_id - self.first_id
+
+    def append(
+        self,
+        timestamp: int,
+        sender: int,
+        text: str,
+        kind: int = KIND_RECEIVED,
+        ack: int = ACK_UNKNOWN,
+        hops: int = NO_HOPS,
+        db_id: int = NO_DB_ID,
+    ) -> int:
+        """Add the newest message and return its row id."""
+        self.timestamps.append(int(timestamp))
+        self.senders.append(int(sender))
+        self.acks.append(ack)
+        self.kinds.append(kind)
+        self.hops.append(hops)
+        self.db_ids.append(db_id)
+        self.texts.append(text)
+        return self.first_id + len(self.texts) - 1
+
+    def extend(self, rows: Iterable[MessageRow]) -> None:
+        for row in rows:
+            self.append(*row)
+
+    def prepend(self, rows: List[MessageRow]) -> int:
+        """Insert older rows ahead of the current ones. Returns the number of rows added."""
+        if not rows:
+            return 0
+
+        older = MessageStore()
+        older.extend(rows)
+        self.timestamps[:0] = older.timestamps
+        self.senders[:0] = older.senders
+        self.acks[:0] = older.acks
+        self.kinds[:0] = older.kinds
+        self.hops[:0] = older.hops
+        self.db_ids[:0] = older.db_ids
+        self.texts[:0] = older.texts
+        self.first_id -= len(rows)
+        return len(rows)
+
+    def set_ack(self, row_id: int, ack: int) -> bool:
+        index = self.row_index(row_id)
+        if not 0 <= index < len(self.texts):
+            return False
+        self.acks[index] = ack
+        self.dirty_rows.add(row_id)
+        return True
+
+    def row(self, index: int) -> MessageRow:
+        return (
+            self.timestamps[index],
+            self.senders[index],
+            self.texts[index],
+            self.kinds[index],
+            self.acks[index],
+            self.hops[index],
+            self.db_ids[index],
+        )
+
+    def find_unsaved(self, timestamp: int, sender: int, text: str, slack: int = 2) -> Optional[int]:
+        """
+        Index of the newest row without a database id matching a stored message, if any.
+
+        Live rows are timestamped separately from their database write, so timestamps within
+        slack seconds match.
+        """
+        for index in range(len(self.texts) - 1, -1, -1):
+            if (
+                self.db_ids[index] == NO_DB_ID
+                and self.senders[index] == sender
+                and abs(self.timestamps[index] - timestamp) <= slack
+                and self.texts[index] == text
+            ):
+                return index
+        return None
+
+    def find_db_id(self, db_id: int) -> Optional[int]:
+        """Index of the row loaded from the given database row, if it is in the store."""
+        if db_id == NO_DB_ID:
+            return None
+        try:
+            return self.db_ids.index(db_id)
+        except ValueError:
+            return None
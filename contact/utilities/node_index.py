@@ -0,0 +1,105 @@
+"""Node numbers in display order, kept sorted incrementally as packets update individual nodes."""
+
+from bisect import bisect_left
+from itertools import count
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# (ignored, not favorite, sort value, first-seen order, node number)
+NodeKey = Tuple[bool, bool, Any, int, int]
+
+
+def node_sort_value(node: Dict[str, Any], node_sort: str) -> Any:
+    """The config.node_sort component of a node's position; never compares across types."""
+    if node_sort == "lastHeard":
+        last_heard = node.get("lastHeard")
+        return -last_heard if isinstance(last_heard, int) else 0
+    if node_sort == "name":
+        return (node.get("user") or {}).get("longName") or ""
+    if node_sort == "hops":
+        hops_away = node.get("hopsAway")
+        return hops_away if isinstance(hops_away, int) else 100
+    return 0
+
+
+class NodeIndex:
+    """
+    The node list shown in the nodes pane: the local node first, then favorites, other nodes and
+    ignored nodes, each group ordered by node_sort. Ties keep the order nodes were first seen in,
+    matching a stable sort over the interface's node dict.
+
+    node_list is kept in step with the index, so it can be shared as ui_state.node_list.
+    """
+
+    def __init__(self, nodes: Iterable[Dict[str, Any]], my_node_num: int, node_sort: str) -> None:
+        self.my_node_num = my_node_num
+        self.node_sort = node_sort
+        self._sequence = count()
+        self._order: Dict[int, int] = {}
+        self._keys: Dict[int, NodeKey] = {}
+
+        for node in nodes:
+            if node["num"] != my_node_num:
+                self._keys[node["num"]] = self._key(node)
+        self._sorted: List[NodeKey] = sorted(self._keys.values())
+        self.node_list: List[int] = [my_node_num] + [key[-1] for key in self._sorted]
+
+    def __len__(self) -> int:
+        return len(self.node_list)
+
+    def _key(self, node: Dict[str, Any]) -> NodeKey:
+        node_num = node["num"]
+        if node_num not in self._order:
+            self._order[node_num] = next(self._sequence)
+        return (
+            bool(node.get("isIgnored", False)),
+            not node.get("isFavorite", False),
+            node_sort_value(node, self.node_sort),
+            self._order[node_num],
+            node_num,
+        )
+
+    def update(self, node: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+        """
+        Re-position one node after its entry changed, adding it if it is new.
+
+        :return: (first, last) node_list positions whose node changed, or None if the order is unchanged.
+        """
+        node_num = node["num"]
+        if node_num == self.my_node_num:
+            return None
+
+        new_key = self._key(node)
+        old_key = self._keys.get(node_num)
+        if new_key == old_key:
+            return None
+
+        if old_key is None:
+            old_position = None
+        else:
+            old_position = bisect_left(self._sorted, old_key)
+            del self._sorted[old_position]
+            del self.node_list[old_position + 1]
+
+        self._keys[node_num] = new_key
+        new_position = bisect_left(self._sorted, new_key)
+        self._sorted.insert(new_position, new_key)
+        self.node_list.insert(new_position + 1, node_num)
+
+        if old_position is None:
+            # Everything from the new row down shifted by one
+            return new_position + 1, len(self.node_list) - 1
+        if old_position == new_position:
+            return None
+        return min(old_position, new_position) + 1, max(old_position, new_position) + 1
+
+    def remove(self, node_num: int) -> Optional[Tuple[int, int]]:
+        """Drop a node from the index; returns the (first, last) positions that changed, or None."""
+        old_key = self._keys.pop(node_num, None)
+        self._order.pop(node_num, None)
+        if old_key is None:
+            return None
+
+        old_position = bisect_left(self._sorted, old_key)
+        del self._sorted[old_position]
+        del self.node_list[old_position + 1]
+        return old_position + 1, len(self.node_list)
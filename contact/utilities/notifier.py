@@ -0,0 +1,191 @@
+"""Notification sounds, played by one long-lived thread that coalesces bursts and rate-limits playback."""
+
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import time
+from typing import List, Optional, Set, Union
+
+import contact.ui.default_config as config
+
+# A burst of messages plays one sound once this long has passed without another
+SOUND_DEBOUNCE_SECONDS = 0.8
+
+# Token bucket: up to this many sounds back to back, then one per refill interval
+SOUND_BURST = 3
+SOUND_REFILL_SECONDS = 10.0
+
+NOTIFIER_JOIN_TIMEOUT_SECONDS = 2.0
+
+_UNRESOLVED = object()
+_sound_command: Union[object, Optional[List[str]]] = _UNRESOLVED
+_players: List[subprocess.Popen] = []
+
+_notifier_condition = threading.Condition()
+_notifier_thread: Optional[threading.Thread] = None
+_notifier_stopping = False
+_pending = False
+_pending_priority = False
+_last_request = 0.0
+
+
+class TokenBucket:
+    """Allows capacity events at once, then one per refill_seconds as tokens come back."""
+
+    def __init__(self, capacity: int, refill_seconds: float, now: float) -> None:
+        self.capacity = capacity
+        self.refill_seconds = refill_seconds
+        self.tokens = float(capacity)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take a token if one is available. Returns 0.0 on success, else the seconds until one will be."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.refill_seconds)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) * self.refill_seconds
+
+
+def _channel_setting(name: str) -> Set[str]:
+    """A comma-separated list of channel names or node numbers from the config."""
+    return {entry.strip() for entry in str(getattr(config, name, "")).split(",") if entry.strip()}
+
+
+def resolve_sound_command() -> Optional[List[str]]:
+    """The command that plays the notification sound, looked up on first use and then reused."""
+    global _sound_command
+
+    if _sound_command is not _UNRESOLVED:
+        return _sound_command
+
+    command = None
+    system = platform.system()
+    if system == "Darwin":  # macOS
+        command = ["afplay", "/System/Library/Sounds/Ping.aiff"]
+
+    elif system == "Linux":
+        ogg_path = "/usr/share/sounds/freedesktop/stereo/complete.oga"
+        wav_path = "/usr/share/sounds/alsa/Front_Center.wav"  # common fallback
+
+        if shutil.which("paplay") and os.path.exists(ogg_path):
+            command = ["paplay", ogg_path]
+        elif shutil.which("ffplay") and os.path.exists(ogg_path):
+            command = ["ffplay", "-nodisp", "-autoexit", ogg_path]
+        elif shutil.which("aplay") and os.path.exists(wav_path):
+            command = ["aplay", wav_path]
+        else:
+            logging.warning("No suitable sound player or sound file found on Linux")
+
+    _sound_command = command
+    return command
+
+
+def _reap_players() -> None:
+    """Collect players that have exited, logging any that failed."""
+    for player in list(_players):
+        returncode = player.poll()
+        if returncode is None:
+            continue
+        _players.remove(player)
+        if returncode != 0:
+            logging.error(f"Sound playback failed: {player.args[0]} exited with status {returncode}")
+
+
+def play_sound() -> None:
+    """Start the notification sound without waiting for it; skipped while the previous one still plays."""
+    _reap_players()
+    if _players:
+        return
+
+    command = resolve_sound_command()
+    if not command:
+        return
+
+    try:
+        _players.append(subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+    except OSError as e:
+        logging.error(f"Sound playback failed: {e}")
+
+
+def _wait_for_sound(bucket: TokenBucket) -> bool:
+    """Wait until a pending request should play. Called with _notifier_condition held; False means stop."""
+    while not _pending and not _notifier_stopping:
+        _notifier_condition.wait()
+
+    # Let a burst settle into one sound, unless something urgent is waiting
+    while not _pending_priority and not _notifier_stopping:
+        remaining = _last_request + SOUND_DEBOUNCE_SECONDS - time.monotonic()
+        if remaining <= 0:
+            break
+        _notifier_condition.wait(remaining)
+
+    delay = bucket.take(time.monotonic())
+    while delay > 0 and not _notifier_stopping:
+        _notifier_condition.wait(delay)
+        delay = bucket.take(time.monotonic())
+
+    return not _notifier_stopping
+
+
+def _notifier_loop() -> None:
+    global _pending, _pending_priority
+
+    bucket = TokenBucket(SOUND_BURST, SOUND_REFILL_SECONDS, time.monotonic())
+    while True:
+        with _notifier_condition:
+            if not _wait_for_sound(bucket):
+                return
+            _pending = False
+            _pending_priority = False
+
+        try:
+            play_sound()
+        except Exception as e:
+            logging.error(f"Unexpected error in notifier: {e}")
+
+
+def notify_message(channel: Union[str, int]) -> None:
+    """
+    Request a notification sound for a message received on a channel (a name, or a node number for DMs).
+
+    Channels in notification_muted_channels are silent. Those in notification_priority_channels
+    play without waiting for a burst to settle, though still within the rate limit.
+    """
+    global _notifier_thread, _pending, _pending_priority, _last_request
+
+    if config.notification_sound != "True" or str(channel) in _channel_setting("notification_muted_channels"):
+        return
+
+    with _notifier_condition:
+        if _notifier_thread is None or not _notifier_thread.is_alive():
+            _notifier_thread = threading.Thread(target=_notifier_loop, name="contact-notifier", daemon=True)
+            _notifier_thread.start()
+
+        _pending = True
+        _pending_priority = _pending_priority or str(channel) in _channel_setting("notification_priority_channels")
+        _last_request = time.monotonic()
+        _notifier_condition.notify()
+
+
+def stop_notifier(timeout: float = NOTIFIER_JOIN_TIMEOUT_SECONDS) -> None:
+    """Stop the notifier thread, dropping any sound not yet played."""
+    global _notifier_thread, _notifier_stopping, _pending, _pending_priority
+
+    with _notifier_condition:
+        notifier = _notifier_thread
+        _notifier_thread = None
+        _notifier_stopping = True
+        _notifier_condition.notify()
+    if notifier is not None:
+        notifier.join(timeout)
+
+    with _notifier_condition:
+        _notifier_stopping = False
+        _pending = False
+        _pending_priority = False
+    _reap_players()
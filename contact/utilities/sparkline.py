@@ -0,0 +1,52 @@
+"""Fixed-width unicode sparklines for metric time series, bucketed over plain arrays."""
+
+from array import array
+from typing import List, Optional, Sequence
+
+SPARKLINE_LEVELS = "▁▂▃▄▅▆▇█"
+SPARKLINE_GAP = " "
+
+
+def bucket_means(
+    timestamps: Sequence[int],
+    totals: Sequence[float],
+    weights: Sequence[float],
+    start: int,
+    end: int,
+    width: int,
+) -> List[Optional[float]]:
+    """
+    Mean value of each of width equal time buckets covering [start, end), or None where a bucket is empty.
+
+    Each point contributes totals[i] spread over weights[i] samples, so rollup rows (sum, count) and raw
+    samples (value, 1) can be mixed in one series.
+    """
+    sums = array("d", [0.0]) * width
+    counts = array("d", [0.0]) * width
+    span = max(end - start, 1)
+
+    for timestamp, total, weight in zip(timestamps, totals, weights):
+        index = (timestamp - start) * width // span
+        if 0 <= index < width:
+            sums[index] += total
+            counts[index] += weight
+
+    return [total / count if count else None for total, count in zip(sums, counts)]
+
+
+def render_sparkline(values: Sequence[Optional[float]]) -> str:
+    """One block character per value, scaled between the smallest and largest; gaps stay blank."""
+    present = [value for value in values if value is not None]
+    if not present:
+        return SPARKLINE_GAP * len(values)
+
+    low, high = min(present), max(present)
+    top = len(SPARKLINE_LEVELS) - 1
+    if high == low:
+        # A flat line sits mid-height rather than looking like all-minimum or all-maximum
+        return "".join(SPARKLINE_GAP if value is None else SPARKLINE_LEVELS[top // 2] for value in values)
+
+    scale = top / (high - low)
+    return "".join(
+        SPARKLINE_GAP if value is None else SPARKLINE_LEVELS[round((value - low) * scale)] for value in values
+    )
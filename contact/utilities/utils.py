@@ -1,11 +1,13 @@
 import datetime
 import time
-from typing import Optional, Union
-from google.protobuf.message import DecodeError
+from typing import Optional, Tuple, Union
+from google.protobuf.message import DecodeError, Message
 
 from meshtastic import protocols
 from meshtastic.protobuf import config_pb2, mesh_pb2, portnums_pb2
 import contact.ui.default_config as config
+from contact.utilities.message_store import KIND_RECEIVED, NO_HOPS, MessageStore
+from contact.utilities.node_index import NodeIndex
 from contact.utilities.singleton import ui_state, interface_state
 import contact.utilities.telemetry_beautifier as tb
 
@@ -44,7 +46,7 @@ def get_channels():
         elif channel_name in previous_messages:
             rebuilt_messages[channel_name] = previous_messages[channel_name]
         else:
-            rebuilt_messages[channel_name] = []
+            rebuilt_messages[channel_name] = MessageStore()
 
     for channel in preserved_direct_channels:
         if channel in previous_messages:
@@ -60,39 +62,48 @@ def get_channels():
 
 def get_node_list():
     if interface_state.interface.nodes:
-        my_node_num = interface_state.myNodeNum
-
-        def node_sort(node):
-            if config.node_sort == "lastHeard":
-                return -node["lastHeard"] if ("lastHeard" in node and isinstance(node["lastHeard"], int)) else 0
-            elif config.node_sort == "name":
-                return node["user"]["longName"]
-            elif config.node_sort == "hops":
-                return node["hopsAway"] if "hopsAway" in node else 100
-            else:
-                return node
-
-        sorted_nodes = sorted(interface_state.interface.nodes.values(), key=node_sort)
-
-        # Move favorite nodes to the beginning
-        sorted_nodes = sorted(
-            sorted_nodes, key=lambda node: node["isFavorite"] if "isFavorite" in node else False, reverse=True
+        return NodeIndex(interface_state.interface.nodes.values(), interface_state.myNodeNum, config.node_sort).node_list
+    return []
+
+
+def refresh_node_list():
+    """Rebuild the node index from the interface; returns True if the displayed order changed."""
+    if not interface_state.interface.nodes:
+        ui_state.node_index = None
+        new_node_list = []
+    else:
+        ui_state.node_index = NodeIndex(
+            interface_state.interface.nodes.values(), interface_state.myNodeNum, config.node_sort
         )
+        new_node_list = ui_state.node_index.node_list
 
-        # Move ignored nodes to the end
-        sorted_nodes = sorted(sorted_nodes, key=lambda node: node["isIgnored"] if "isIgnored" in node else False)
+    changed = new_node_list != ui_state.node_list
+    ui_state.node_list = new_node_list
+    return changed
 
-        node_list = [node["num"] for node in sorted_nodes if node["num"] != my_node_num]
-        return [my_node_num] + node_list  # Ensuring your node is always first
-    return []
 
+def refresh_node_entry(node_num: int) -> Optional[Tuple[int, int]]:
+    """
+    Re-position a single node in ui_state.node_list after a packet from it.
 
-def refresh_node_list():
-    new_node_list = get_node_list()
-    if new_node_list != ui_state.node_list:
-        ui_state.node_list = new_node_list
-        return True
-    return False
+    :return: (first, last) rows of the node list that now show a different node, or None.
+    """
+    index = ui_state.node_index
+    if (
+        index is None
+        or index.node_list is not ui_state.node_list
+        or index.my_node_num != interface_state.myNodeNum
+        or index.node_sort != config.node_sort
+    ):
+        # No index yet, or the list was replaced or edited behind its back
+        if not refresh_node_list():
+            return None
+        return 0, max(len(ui_state.node_list) - 1, 0)
+
+    node = interface_state.interface.nodesByNum.get(node_num)
+    if node is None:
+        return index.remove(node_num)
+    return index.update(node)
 
 
 def get_nodeNum():
@@ -156,38 +167,54 @@ def get_time_ago(timestamp):
     return "now"
 
 
-def add_new_message(channel_id, prefix, message):
+def add_new_message(
+    channel_id: Union[str, int], sender: int, message: str, kind: int = KIND_RECEIVED, hops: int = NO_HOPS
+) -> int:
+    """Append a live message to a channel's store and return its row id."""
     if channel_id not in ui_state.all_messages:
-        ui_state.all_messages[channel_id] = []
-
-    # Timestamp handling
-    current_timestamp = time.time()
-    current_hour = datetime.datetime.fromtimestamp(current_timestamp).strftime("%Y-%m-%d %H:00")
-
-    # Retrieve the last timestamp if available
-    channel_messages = ui_state.all_messages[channel_id]
-    if channel_messages:
-        # Check the last entry for a timestamp
-        for entry in reversed(channel_messages):
-            if entry[0].startswith("--"):
-                last_hour = entry[0].strip("- ").strip()
-                break
-        else:
-            last_hour = None
-    else:
-        last_hour = None
+        ui_state.all_messages[channel_id] = MessageStore()
+
+    return ui_state.all_messages[channel_id].append(int(time.time()), sender, message, kind=kind, hops=hops)
 
-    # Add a new timestamp if it's a new hour
-    if last_hour != current_hour:
-        ui_state.all_messages[channel_id].append((f"-- {current_hour} --", ""))
 
-    # Add the message
-    ts_str = time.strftime("[%H:%M:%S] ")
-    ui_state.all_messages[channel_id].append((f"{ts_str}{prefix}", message))
+def decode_payload(packet: dict) -> Optional[Message]:
+    """
+    The decoded protobuf for a packet's payload, or None if its port carries none or it fails to parse.
 
+    The interface attaches the message it already parsed as decoded[<port name>]["raw"]; that is
+    reused, so each payload is only parsed once.
+    """
+    decoded = packet.get("decoded") or {}
+    portnum = decoded.get("portnum")
+    payload = decoded.get("payload")
+    if portnum is None or isinstance(payload, str):
+        return None
 
-def parse_protobuf(packet: dict) -> Union[str, dict]:
-    """Attempt to parse a decoded payload using the registered protobuf handler."""
+    try:
+        handler = protocols.get(portnums_pb2.PortNum.Value(portnum))
+    except ValueError:
+        return None
+    if handler is None or handler.protobufFactory is None:
+        return None
+
+    raw = (decoded.get(handler.name) or {}).get("raw")
+    if isinstance(raw, Message):
+        return raw
+
+    try:
+        message = handler.protobufFactory()
+        message.ParseFromString(bytes(payload))
+    except (DecodeError, TypeError):
+        return None
+    return message
+
+
+def parse_protobuf(packet: dict, message: Optional[Message] = None) -> Union[str, dict]:
+    """
+    Describe a decoded payload for the packet log.
+
+    message is the result of decode_payload, when the caller already has it.
+    """
     try:
         decoded = packet.get("decoded") or {}
         portnum = decoded.get("portnum")
@@ -204,31 +231,24 @@ def parse_protobuf(packet: dict) -> Union[str, dict]:
         elif portnum == "TRACEROUTE_APP":
             return "Traceroute payload"
 
-        handler = protocols.get(portnums_pb2.PortNum.Value(portnum)) if portnum is not None else None
-        if handler is not None and handler.protobufFactory is not None:
-            try:
-                pb = handler.protobufFactory()
-                pb.ParseFromString(bytes(payload))
-
-                # If we have position payload
-                if portnum == "POSITION_APP":
-                    return tb.get_chunks(str(pb))
-
-                # Part of TELEMETRY_APP portnum
-                if hasattr(pb, "device_metrics") and pb.HasField("device_metrics"):
-                    return tb.get_chunks(str(pb.device_metrics))
+        pb = message if message is not None else decode_payload(packet)
+        if pb is None:
+            return payload
 
-                # Part of TELEMETRY_APP portnum
-                if hasattr(pb, "environment_metrics") and pb.HasField("environment_metrics"):
-                    return tb.get_chunks(str(pb.environment_metrics))
+        # If we have position payload
+        if portnum == "POSITION_APP":
+            return tb.get_chunks(str(pb))
 
-                # For other data, without implemented beautification, fallback to just printing the object
-                return str(pb).replace("\n", " ").replace("\r", " ").strip()
+        # Part of TELEMETRY_APP portnum
+        if hasattr(pb, "device_metrics") and pb.HasField("device_metrics"):
+            return tb.get_chunks(str(pb.device_metrics))
 
-            except DecodeError:
-                return payload
+        # Part of TELEMETRY_APP portnum
+        if hasattr(pb, "environment_metrics") and pb.HasField("environment_metrics"):
+            return tb.get_chunks(str(pb.environment_metrics))
 
-        # return payload
+        # For other data, without implemented beautification, fallback to just printing the object
+        return str(pb).replace("\n", " ").replace("\r", " ").strip()
 
     except Exception:
         return payload
@@ -1,10 +1,17 @@
 import unittest
+from array import array
+from collections import deque
+from datetime import datetime
 from unittest import mock
 
 import contact.ui.default_config as config
 from contact.ui import contact_ui
 from contact.ui.nav_utils import text_width
-from contact.utilities.singleton import ui_state
+from contact.ui.ui_state import HistoryWindow
+from contact.utilities.message_store import ACK_UNKNOWN, KIND_RECEIVED, KIND_TRACEROUTE, NO_HOPS, MessageStore
+from contact.utilities.demo_data import DEMO_LOCAL_NODE_NUM, build_demo_interface
+from contact.utilities.singleton import interface_state, ui_state
+from contact.utilities.utils import refresh_node_list
 
 from tests.test_support import reset_singletons, restore_config, snapshot_config
 
@@ -12,7 +19,7 @@ from tests.test_support import reset_singletons, restore_config, snapshot_config
 class ContactUiTests(unittest.TestCase):
     def setUp(self) -> None:
         reset_singletons()
-        self.saved_config = snapshot_config("single_pane_mode")
+        self.saved_config = snapshot_config("single_pane_mode", "message_prefix", "redraw_max_fps")
 
     def tearDown(self) -> None:
         restore_config(self.saved_config)
@@ -54,9 +61,35 @@ class ContactUiTests(unittest.TestCase):
 
         draw_channel_list.assert_called_once_with()
         draw_messages_window.assert_called_once_with(True)
-        draw_node_list.assert_called_once_with()
+        draw_node_list.assert_called_once_with(ui_state.dirty_node_rows)
         draw_packetlog_win.assert_called_once_with()
 
+    def test_process_pending_ui_updates_throttles_background_panes_by_priority(self) -> None:
+        stdscr = mock.Mock()
+        config.redraw_max_fps = "10"
+        ui_state.last_pane_redraw = {"messages": 100.0, "channels": 100.0, "nodes": 100.0, "packetlog": 100.0}
+        ui_state.redraw_messages = True
+        ui_state.redraw_nodes = True
+
+        with mock.patch.object(contact_ui, "draw_messages_window") as draw_messages_window:
+            with mock.patch.object(contact_ui, "draw_node_list") as draw_node_list:
+                next_redraw = contact_ui.process_pending_ui_updates(stdscr, now=100.05)
+                self.assertAlmostEqual(next_redraw, 0.05)
+                draw_messages_window.assert_not_called()
+
+                # Messages redraw every frame, the node list only every fourth
+                next_redraw = contact_ui.process_pending_ui_updates(stdscr, now=100.1)
+                self.assertAlmostEqual(next_redraw, 0.3)
+                draw_messages_window.assert_called_once_with(False)
+                draw_node_list.assert_not_called()
+                self.assertTrue(ui_state.redraw_nodes)
+
+                self.assertIsNone(contact_ui.process_pending_ui_updates(stdscr, now=100.4))
+                draw_node_list.assert_called_once_with(ui_state.dirty_node_rows)
+
+        self.assertEqual(contact_ui.get_input_timeout_ms(None), contact_ui.INPUT_IDLE_TIMEOUT_MS)
+        self.assertEqual(contact_ui.get_input_timeout_ms(0.0301), 31)
+
     def test_process_pending_ui_updates_full_redraw_uses_handle_resize(self) -> None:
         stdscr = mock.Mock()
         ui_state.redraw_full_ui = True
@@ -114,6 +147,32 @@ class ContactUiTests(unittest.TestCase):
         text = contact_ui.channel_pad.addstr.call_args.args[2]
         self.assertEqual(len(text), 16)
 
+    def test_draw_channel_list_reuses_view_until_channels_or_node_info_change(self) -> None:
+        ui_state.channel_list = ["Primary", 222, 333]
+        ui_state.notifications = [1]
+        ui_state.selected_channel = 0
+        ui_state.current_window = 1
+        contact_ui.channel_pad = mock.Mock()
+        contact_ui.channel_win = mock.Mock()
+        contact_ui.channel_win.getmaxyx.return_value = (10, 30)
+
+        with mock.patch.object(contact_ui, "get_color", return_value=1):
+            with mock.patch.object(contact_ui, "paint_frame"):
+                with mock.patch.object(contact_ui, "refresh_pad"):
+                    with mock.patch.object(contact_ui, "draw_window_arrows"):
+                        with mock.patch.object(contact_ui, "is_chat_archived", side_effect=lambda num: num == 333):
+                            with mock.patch.object(contact_ui, "get_name_from_database", return_value="Bob") as lookup:
+                                contact_ui.draw_channel_list()
+                                contact_ui.draw_channel_list()
+                                self.assertEqual(lookup.call_count, 1)
+
+                                ui_state.channel_view = None  # As after update_node_info_in_db
+                                contact_ui.draw_channel_list()
+                                self.assertEqual(lookup.call_count, 2)
+
+        rows = [(c.args[0], c.args[2].rstrip()) for c in contact_ui.channel_pad.addstr.call_args_list[-2:]]
+        self.assertEqual(rows, [(0, "Primary"), (1, f"Bob {config.notification_symbol}")])
+
     def test_draw_node_list_reserves_scroll_arrow_column(self) -> None:
         ui_state.node_list = [101]
         ui_state.current_window = 2
@@ -147,7 +206,6 @@ class ContactUiTests(unittest.TestCase):
         contact_ui.messages_win = mock.Mock()
         contact_ui.nodes_win = mock.Mock()
         contact_ui.packetlog_win = mock.Mock()
-        contact_ui.messages_pad = mock.Mock()
         contact_ui.nodes_pad = mock.Mock()
         contact_ui.channel_pad = mock.Mock()
 
@@ -190,13 +248,315 @@ class ContactUiTests(unittest.TestCase):
 
         contact_ui.channel_win = mock.Mock()
         contact_ui.channel_win.getmaxyx.return_value = (10, 20)
-        contact_ui.messages_pad = mock.Mock()
-        contact_ui.messages_pad.getmaxyx.return_value = (5, 20)
         contact_ui.messages_win = mock.Mock()
         contact_ui.messages_win.getbegyx.return_value = (0, 0)
         contact_ui.messages_win.getmaxyx.return_value = (10, 20)
 
         with mock.patch.object(contact_ui, "get_msg_window_lines", return_value=4):
-            contact_ui.refresh_pad(1)
+            with mock.patch.object(contact_ui, "draw_message_rows") as draw_message_rows:
+                contact_ui.refresh_pad(1)
 
+        draw_message_rows.assert_called_once_with(0, 4)
         contact_ui.messages_win.addstr.assert_called_once_with(0, 2, " Primary ", contact_ui.curses.A_BOLD)
+        contact_ui.messages_win.noutrefresh.assert_called_once_with()
+        contact_ui.messages_win.refresh.assert_not_called()
+
+    def test_draw_node_list_stages_panes_and_flush_frame_writes_them_once(self) -> None:
+        ui_state.current_window = 1
+        ui_state.node_list = []
+        contact_ui.nodes_pad = mock.Mock()
+        contact_ui.nodes_win = mock.Mock()
+        contact_ui.nodes_win.getmaxyx.return_value = (10, 20)
+        contact_ui.entry_win = mock.Mock()
+
+        with mock.patch.object(contact_ui.curses, "curs_set"):
+            with mock.patch.object(contact_ui, "refresh_pad"):
+                with mock.patch.object(contact_ui, "draw_window_arrows"):
+                    with mock.patch.object(contact_ui, "get_color", return_value=0):
+                        contact_ui.draw_node_list()
+
+        contact_ui.nodes_win.refresh.assert_not_called()
+        contact_ui.entry_win.refresh.assert_not_called()
+
+        with mock.patch.object(contact_ui.curses, "doupdate") as doupdate:
+            contact_ui.flush_frame()
+
+        contact_ui.entry_win.noutrefresh.assert_called_with()
+        doupdate.assert_called_once_with()
+
+    def test_draw_node_list_rewrites_only_dirty_rows_and_reuses_rendered_text(self) -> None:
+        ui_state.current_window = 1
+        ui_state.node_list = [101, 202, 303]
+        interface = mock.Mock()
+        interface.nodesByNum = {num: {"num": num, "user": {"longName": f"Node {num}"}} for num in ui_state.node_list}
+        contact_ui.nodes_pad = mock.Mock()
+        contact_ui.nodes_pad.getmaxyx.return_value = (4, 20)
+        contact_ui.nodes_win = mock.Mock()
+        contact_ui.nodes_win.getmaxyx.return_value = (10, 20)
+        contact_ui.entry_win = mock.Mock()
+        ui_state.dirty_node_rows = {1, 2}
+
+        with mock.patch("contact.ui.contact_ui.interface_state.interface", interface):
+            with mock.patch.object(contact_ui.curses, "curs_set"):
+                with mock.patch.object(contact_ui, "refresh_pad"):
+                    with mock.patch.object(contact_ui, "draw_window_arrows"):
+                        with mock.patch.object(contact_ui, "get_node_row_color", return_value=0):
+                            with mock.patch.object(
+                                contact_ui, "truncate_with_ellipsis", wraps=contact_ui.truncate_with_ellipsis
+                            ) as truncate_with_ellipsis:
+                                contact_ui.draw_node_list(ui_state.dirty_node_rows)
+                                contact_ui.draw_node_list([2])
+
+        contact_ui.nodes_pad.erase.assert_not_called()
+        self.assertEqual([c.args[0] for c in contact_ui.nodes_pad.addstr.call_args_list], [1, 2, 2])
+        self.assertEqual(contact_ui.nodes_pad.addstr.call_args_list[-1].args[2].rstrip(), "🔓 Node 303")
+        self.assertEqual(truncate_with_ellipsis.call_count, 2)
+        self.assertEqual(ui_state.dirty_node_rows, set())
+
+    def test_get_node_row_text_picks_up_renames_of_nodes_named_from_the_database(self) -> None:
+        interface = mock.Mock()
+        interface.nodesByNum = {101: {"num": 101, "user": {}}}
+
+        with mock.patch("contact.ui.contact_ui.interface_state.interface", interface):
+            with mock.patch.object(contact_ui, "get_name_from_database", side_effect=["Old name", "New name"]):
+                self.assertEqual(contact_ui.get_node_row_text(101, 30).rstrip(), "🔓 Old name")
+                self.assertEqual(contact_ui.get_node_row_text(101, 30).rstrip(), "🔓 New name")
+
+    def test_ignoring_a_node_moves_it_in_the_sorted_list_and_keeps_it_selected(self) -> None:
+        interface_state.interface = build_demo_interface()
+        interface_state.myNodeNum = DEMO_LOCAL_NODE_NUM
+        refresh_node_list()
+        ui_state.current_window = 2
+        ui_state.selected_node = 1
+        node_num = ui_state.node_list[1]
+
+        with mock.patch.object(contact_ui.curses, "curs_set"):
+            with mock.patch.object(contact_ui, "get_name_from_database", return_value="Node"):
+                with mock.patch.object(contact_ui, "get_list_input", return_value="Yes"):
+                    with mock.patch.object(contact_ui, "handle_resize"):
+                        contact_ui.handle_ctlr_g(mock.Mock())
+
+        # Ignored nodes sort after every other node
+        nodes_by_num = interface_state.interface.nodesByNum
+        self.assertTrue(all(nodes_by_num[num].get("isIgnored") for num in ui_state.node_list[ui_state.selected_node :]))
+        self.assertEqual(ui_state.node_list[ui_state.selected_node], node_num)
+        self.assertGreater(ui_state.selected_node, 1)
+        self.assertEqual(ui_state.dirty_node_rows, set(range(1, ui_state.selected_node + 1)))
+
+    def test_draw_packetlog_win_paints_stored_records_from_the_scroll_offset(self) -> None:
+        ui_state.display_log = True
+        ui_state.current_window = 1
+        ui_state.packet_buffer = deque(f"record {i}" for i in range(10))
+        contact_ui.packetlog_win = mock.Mock()
+        contact_ui.packetlog_win.getmaxyx.return_value = (6, 80)
+        contact_ui.entry_win = mock.Mock()
+
+        with mock.patch.object(contact_ui.curses, "curs_set"):
+            with mock.patch.object(contact_ui, "get_color", return_value=0):
+                with mock.patch.object(contact_ui, "parse_protobuf") as parse_protobuf:
+                    contact_ui.scroll_packet_log(4)
+                    rows = [c.args[2] for c in contact_ui.packetlog_win.addstr.call_args_list[1:]]
+                    self.assertEqual(rows, ["record 5", "record 4", "record 3"])
+
+                    contact_ui.packetlog_win.addstr.reset_mock()
+                    contact_ui.scroll_packet_log(100)
+
+        parse_protobuf.assert_not_called()
+        self.assertEqual(ui_state.packetlog_offset, 9)
+        rows = [c.args[2] for c in contact_ui.packetlog_win.addstr.call_args_list[1:]]
+        self.assertEqual(rows, ["record 0"])
+
+    def test_draw_message_rows_paints_only_the_visible_lines(self) -> None:
+        ui_state.channel_list = ["Primary"]
+        ui_state.selected_channel = 0
+        config.message_prefix = ">>"
+        ten_o_clock = int(datetime(2024, 1, 1, 10, 0).timestamp())
+        store = MessageStore()
+        store.extend((ten_o_clock + i, 222, f"msg{i}", KIND_RECEIVED, ACK_UNKNOWN, NO_HOPS) for i in range(9))
+        ui_state.all_messages = {"Primary": store}
+        contact_ui.messages_win = mock.Mock()
+        contact_ui.messages_win.getmaxyx.return_value = (10, 40)
+
+        with mock.patch("contact.ui.nav_utils.get_name_from_database", return_value="A"):
+            with mock.patch.object(contact_ui, "get_color", side_effect=lambda category: category):
+                contact_ui.draw_message_rows(3, 3)
+                contact_ui.messages_win.addstr.reset_mock()
+                contact_ui.draw_message_rows(8, 3)
+
+        rows = [(c.args[0], c.args[2].rstrip(), c.args[3]) for c in contact_ui.messages_win.addstr.call_args_list]
+        self.assertEqual(
+            rows,
+            [
+                (1, "[10:00:07] >> A: msg7", "rx_messages"),
+                (2, "[10:00:08] >> A: msg8", "rx_messages"),
+                (3, "", "background"),
+            ],
+        )
+
+    def test_scroll_messages_up_from_top_loads_older_history(self) -> None:
+        ui_state.channel_list = ["Primary"]
+        ui_state.selected_channel = 0
+        ui_state.current_window = 1
+        ui_state.selected_message = 0
+        ui_state.start_index = [0, 0, 0]
+        contact_ui.messages_win = mock.Mock()
+        contact_ui.packetlog_win = mock.Mock()
+
+        with mock.patch.object(contact_ui, "load_older_messages", return_value=4) as load_older_messages:
+            with mock.patch.object(contact_ui, "get_message_line_count", side_effect=[10, 25, 25]):
+                with mock.patch.object(contact_ui, "get_msg_window_lines", return_value=5):
+                    with mock.patch.object(contact_ui, "refresh_pad"):
+                        with mock.patch.object(contact_ui, "draw_window_arrows"):
+                            contact_ui.scroll_messages(-1)
+
+        load_older_messages.assert_called_once_with("Primary")
+        self.assertEqual(ui_state.selected_message, 14)
+        self.assertEqual(ui_state.start_index[1], 14)
+
+    def jump(self, *hit, stored=None):
+        contact_ui.messages_win = mock.Mock()
+        contact_ui.messages_win.getmaxyx.return_value = (10, 40)
+        contact_ui.packetlog_win = mock.Mock()
+
+        with mock.patch.object(contact_ui, "select_channel") as select_channel:
+            with mock.patch.object(contact_ui, "get_stored_message", return_value=stored):
+                with mock.patch.object(contact_ui, "get_msg_window_lines", return_value=2):
+                    with mock.patch.object(contact_ui, "refresh_pad"):
+                        with mock.patch.object(contact_ui, "draw_window_arrows"):
+                            with mock.patch("contact.ui.nav_utils.get_name_from_database", return_value="A"):
+                                jumped = contact_ui.jump_to_message(*hit)
+
+        select_channel.assert_called_once_with(0)
+        return jumped
+
+    def test_jump_to_message_opens_history_window_for_hits_older_than_loaded_history(self) -> None:
+        ui_state.channel_list = ["Primary"]
+        ten_o_clock = int(datetime(2024, 1, 1, 10, 0).timestamp())
+        ui_state.history_cursors = {"Primary": (ten_o_clock + 500, 50)}
+        live = MessageStore()
+        live.append(ten_o_clock + 500, 222, "newest", db_id=50)
+        ui_state.all_messages = {"Primary": live}
+        window_rows = [
+            (ten_o_clock - 60, 222, "a", KIND_RECEIVED, ACK_UNKNOWN, NO_HOPS, 9),
+            (ten_o_clock - 59, 222, "hit", KIND_RECEIVED, ACK_UNKNOWN, NO_HOPS, 10),
+            (ten_o_clock, 222, "b", KIND_RECEIVED, ACK_UNKNOWN, NO_HOPS, 11),
+        ]
+
+        def open_window(channel, timestamp, rowid):
+            store = MessageStore()
+            store.extend(window_rows)
+            ui_state.history_windows[channel] = HistoryWindow(store=store, older=(1, 1), newer=(ten_o_clock, 11))
+            return True
+
+        with mock.patch.object(contact_ui, "open_history_window", side_effect=open_window) as open_history_window:
+            with mock.patch.object(contact_ui, "load_older_messages") as load_older_messages:
+                jumped = self.jump("Primary", ten_o_clock - 59, 10)
+
+        self.assertTrue(jumped)
+        open_history_window.assert_called_once_with("Primary", ten_o_clock - 59, 10)
+        load_older_messages.assert_not_called()
+        self.assertEqual(live.texts, ["newest"])
+        # Separator and "a" take lines 0-1, so the hit starts on line 2
+        self.assertEqual(ui_state.selected_message, 2)
+        self.assertEqual(ui_state.start_index[1], 2)
+
+        # A hit inside the live store's loaded history closes the window again
+        self.assertTrue(self.jump("Primary", ten_o_clock + 500, 50))
+        self.assertEqual(ui_state.history_windows, {})
+
+    def test_load_newer_history_returns_to_live_messages_once_caught_up(self) -> None:
+        ui_state.channel_list = ["Primary"]
+        ten_o_clock = int(datetime(2024, 1, 1, 10, 0).timestamp())
+        window = MessageStore()
+        window.append(ten_o_clock, 222, "old", db_id=5)
+        window.append(ten_o_clock + 1, 222, "newest stored", db_id=6)
+        ui_state.history_windows = {"Primary": HistoryWindow(store=window)}
+        live = MessageStore()
+        live.append(ten_o_clock + 1, 222, "newest stored", db_id=6)
+        for i in range(3):
+            live.append(ten_o_clock + 2 + i, 222, f"live {i}")
+        ui_state.all_messages = {"Primary": live}
+        contact_ui.messages_win = mock.Mock()
+        contact_ui.messages_win.getmaxyx.return_value = (10, 40)
+
+        with mock.patch.object(contact_ui, "get_msg_window_lines", return_value=2):
+            with mock.patch("contact.ui.nav_utils.get_name_from_database", return_value="A"):
+                self.assertTrue(contact_ui.load_newer_history())
+                self.assertIs(contact_ui.get_message_store("Primary"), live)
+
+        self.assertEqual(ui_state.history_windows, {})
+        # Separator plus "newest stored" end on line 2, which stays at the bottom of a two-line view
+        self.assertEqual(ui_state.selected_message, 0)
+
+    def test_jump_to_message_finds_hit_among_rows_that_were_never_saved(self) -> None:
+        ui_state.channel_list = ["Primary"]
+        ten_o_clock = int(datetime(2024, 1, 1, 10, 0).timestamp())
+        store = MessageStore()
+        store.append(ten_o_clock, 222, "a", db_id=7)
+        store.append(ten_o_clock + 1, 111, "traceroute", kind=KIND_TRACEROUTE)
+        store.append(ten_o_clock + 2, 222, "hit", db_id=8)
+        store.append(ten_o_clock + 3, 111, "another traceroute", kind=KIND_TRACEROUTE)
+        store.append(ten_o_clock + 4, 222, "live")  # Received this session; its write is still queued
+        store.append(ten_o_clock + 5, 111, "last traceroute", kind=KIND_TRACEROUTE)
+        ui_state.all_messages = {"Primary": store}
+
+        self.assertTrue(self.jump("Primary", ten_o_clock + 2, 8))
+        self.assertEqual(ui_state.selected_message, 3)  # Separator, "a" and the traceroute come first
+
+        self.assertTrue(self.jump("Primary", ten_o_clock + 5, 9, stored=(222, "live")))
+        self.assertEqual(ui_state.selected_message, 5)
+
+        self.assertFalse(self.jump("Primary", ten_o_clock + 5, 10, stored=(222, "never shown")))
+
+    def test_search_message_history_blocks_for_keys_and_restores_the_idle_timeout(self) -> None:
+        ui_state.channel_list = ["Primary"]
+        contact_ui.entry_win = mock.Mock()
+        contact_ui.entry_win.get_wch.side_effect = ["h", chr(27)]
+
+        with mock.patch.object(contact_ui, "flush_db_writes"):
+            with mock.patch.object(contact_ui, "draw_centered_text_field"):
+                with mock.patch.object(contact_ui, "get_color", return_value=0):
+                    with mock.patch.object(contact_ui, "search_messages", return_value=None) as search_messages:
+                        contact_ui.search_message_history()
+
+        search_messages.assert_called_once_with("h")
+        self.assertEqual(
+            contact_ui.entry_win.timeout.call_args_list, [mock.call(-1), mock.call(contact_ui.INPUT_IDLE_TIMEOUT_MS)]
+        )
+
+    def test_node_details_dialog_shows_trend_summary_and_tab_changes_range(self) -> None:
+        ui_state.node_list = [456]
+        ui_state.selected_node = 0
+        node = {"num": 456, "user": {"shortName": "SAT2"}, "deviceMetrics": {"batteryLevel": 55}}
+        dialog_win = mock.Mock()
+        dialog_win.getch.side_effect = [ord("\t"), 27]
+        summary = {"batteryLevel": (40.0, 52.5, 80.0)}
+        day_ago = 1700000000 - 24 * 60 * 60
+        battery = (array("q", [day_ago, day_ago + 23 * 3600]), array("d", [40, 80]), array("d", [1, 1]))
+        series = {"batteryLevel": battery}
+        msg_win = dialog_win.derwin.return_value
+
+        with mock.patch.object(contact_ui, "interface_state") as interface_state:
+            interface_state.interface.nodesByNum = {456: node}
+            with mock.patch.object(contact_ui, "curses") as curses_mock:
+                curses_mock.LINES, curses_mock.COLS = 40, 100
+                curses_mock.error = Exception
+                curses_mock.newwin.return_value = dialog_win
+                with mock.patch.object(contact_ui, "get_color", return_value=0):
+                    with mock.patch.object(contact_ui, "handle_resize"):
+                        with mock.patch.object(contact_ui, "refresh_node_selection"):
+                            with mock.patch.object(contact_ui.time, "time", return_value=1700000000):
+                                with mock.patch.object(
+                                    contact_ui, "get_telemetry_summary", return_value=summary
+                                ) as get_telemetry_summary:
+                                    with mock.patch.object(contact_ui, "get_telemetry_series", return_value=series):
+                                        contact_ui.handle_f5_key(mock.Mock())
+
+        self.assertEqual(
+            get_telemetry_summary.call_args_list,
+            [mock.call(456, 1700000000 - 24 * 60 * 60), mock.call(456, 1700000000 - 7 * 24 * 60 * 60)],
+        )
+        lines = [c.args[2] for c in msg_win.addstr.call_args_list]
+        self.assertIn("**📈 Last 7d (min / avg / max):**", lines)
+        self.assertIn("• Battery: ▁" + " " * 22 + "█ 40.0 / 52.5 / 80.0%", lines)
+        self.assertIn((456, 1), ui_state.node_trend_cache)
@@ -1,9 +1,12 @@
 import os
 import sqlite3
 import tempfile
+import threading
 import unittest
+from unittest import mock
 
 import contact.ui.default_config as config
+from contact.ui.nav_utils import format_message_row
 from contact.utilities import db_handler
 from contact.utilities.demo_data import DEMO_LOCAL_NODE_NUM, build_demo_interface
 from contact.utilities.singleton import interface_state, ui_state
@@ -17,6 +20,7 @@ class DbHandlerTests(unittest.TestCase):
         reset_singletons()
         self.saved_config = snapshot_config(
             "db_file_path",
+            "db_write_behind",
             "message_prefix",
             "sent_message_prefix",
             "ack_str",
@@ -26,24 +30,73 @@ class DbHandlerTests(unittest.TestCase):
         )
         self.tempdir = tempfile.TemporaryDirectory()
         config.db_file_path = os.path.join(self.tempdir.name, "client.db")
+        config.db_write_behind = "False"
         interface_state.myNodeNum = 123
+        db_handler.clear_name_cache()
+        db_handler.init_database()
 
     def tearDown(self) -> None:
+        db_handler.stop_db_writer()
+        db_handler.close_db_connections()
         self.tempdir.cleanup()
         restore_config(self.saved_config)
         reset_singletons()
 
+    def test_telemetry_summary_reads_rollups_kept_by_trigger(self) -> None:
+        hour = db_handler.TELEMETRY_ROLLUP_SECONDS
+        start = 1700000000 - 1700000000 % hour
+        db_handler.save_telemetry_samples(456, {"batteryLevel": 80, "voltage": 4.1}, timestamp=start)
+        db_handler.save_telemetry_samples(456, {"batteryLevel": 60}, timestamp=start + 10)
+        db_handler.save_telemetry_samples(456, {"batteryLevel": 99}, timestamp=start + 10)  # Same second, ignored
+        db_handler.save_telemetry_samples(456, {"batteryLevel": 40}, timestamp=start + hour)
+        db_handler.save_telemetry_samples(789, {"batteryLevel": 5}, timestamp=start)
+
+        with sqlite3.connect(config.db_file_path) as conn:
+            rollups = conn.execute(
+                "SELECT bucket_ts, sample_count, min_value, max_value FROM telemetry_rollups "
+                "WHERE node = 456 AND metric = 'batteryLevel' ORDER BY bucket_ts"
+            ).fetchall()
+
+        self.assertEqual(rollups, [(start, 2, 60.0, 80.0), (start + hour, 1, 40.0, 40.0)])
+        self.assertEqual(
+            db_handler.get_telemetry_summary(456, start + 5),
+            {"batteryLevel": (40.0, 60.0, 80.0), "voltage": (4.1, 4.1, 4.1)},
+        )
+        self.assertEqual(db_handler.get_telemetry_summary(456, start + hour), {"batteryLevel": (40.0, 40.0, 40.0)})
+
+    def test_telemetry_series_uses_rollups_only_where_samples_were_pruned(self) -> None:
+        hour = db_handler.TELEMETRY_ROLLUP_SECONDS
+        start = 1700000000 - 1700000000 % hour
+        for offset, value in ((0, 10), (60, 20), (2 * hour, 30), (3 * hour, 40)):
+            db_handler.save_telemetry_samples(456, {"snr": value}, timestamp=start + offset)
+        with sqlite3.connect(config.db_file_path) as conn:
+            conn.execute("DELETE FROM telemetry_samples WHERE ts < ?", (start + 2 * hour,))
+
+        timestamps, totals, weights = db_handler.get_telemetry_series(456, start)["snr"]
+
+        self.assertEqual(
+            sorted(zip(timestamps, totals, weights)),
+            [(start, 30.0, 2.0), (start + 2 * hour, 30.0, 1.0), (start + 3 * hour, 40.0, 1.0)],
+        )
+        self.assertEqual(db_handler.get_telemetry_series(789, start), {})
+
     def test_save_message_to_db_and_update_ack_roundtrip(self) -> None:
-        timestamp = db_handler.save_message_to_db("Primary", "123", "hello")
+        db_handler.save_message_to_db("Primary", "123", "old", packet_id=42)  # Same packet id, sent long ago
+        timestamp = db_handler.save_message_to_db("Primary", "123", "hello", packet_id=42)
+        db_handler.save_message_to_db("Primary", "123", "hello", packet_id=43)
 
         self.assertIsInstance(timestamp, int)
 
-        db_handler.update_ack_nak("Primary", timestamp, "hello", "Ack")
+        db_handler.update_ack_nak(42, "Ack")
 
         with sqlite3.connect(config.db_file_path) as conn:
-            row = conn.execute('SELECT user_id, message_text, ack_type FROM "123_Primary_messages"').fetchone()
+            rows = conn.execute("SELECT user_id, text, ack_type FROM messages ORDER BY rowid").fetchall()
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT MAX(id) FROM messages WHERE owner_node = 123 AND packet_id = 42"
+            ).fetchall()
 
-        self.assertEqual(row, ("123", "hello", "Ack"))
+        self.assertEqual(rows, [("123", "old", None), ("123", "hello", "Ack"), ("123", "hello", None)])
+        self.assertIn("messages_owner_packet_id", " ".join(str(step[-1]) for step in plan))
 
     def test_update_node_info_in_db_fills_defaults_and_preserves_existing_values(self) -> None:
         db_handler.update_node_info_in_db(999, short_name="ABCD")
@@ -53,49 +106,48 @@ class DbHandlerTests(unittest.TestCase):
         self.assertEqual(db_handler.get_name_from_database(999, "short"), "ABCD")
         self.assertEqual(db_handler.is_chat_archived(999), 0)
 
+        ui_state.channel_view = object()
         db_handler.update_node_info_in_db(999, chat_archived=1)
 
+        self.assertIsNone(ui_state.channel_view)
         self.assertEqual(db_handler.get_name_from_database(999, "long"), original_long_name)
         self.assertEqual(db_handler.get_name_from_database(999, "short"), "ABCD")
         self.assertEqual(db_handler.is_chat_archived(999), 1)
 
     def test_get_name_from_database_returns_hex_when_user_is_missing(self) -> None:
         user_id = 0x1234ABCD
-        db_handler.ensure_node_table_exists()
 
         self.assertEqual(db_handler.get_name_from_database(user_id, "short"), decimal_to_hex(user_id))
         self.assertEqual(db_handler.is_chat_archived(user_id), 0)
 
-    def test_load_messages_from_db_populates_channels_and_messages(self) -> None:
-        db_handler.update_node_info_in_db(123, long_name="Local Node", short_name="ME")
-        db_handler.update_node_info_in_db(456, long_name="Remote Node", short_name="RM")
-        db_handler.update_node_info_in_db(789, long_name="Archived", short_name="AR", chat_archived=1)
-
-        db_handler.ensure_table_exists(
-            '"123_Primary_messages"',
-            """
-            user_id TEXT,
-            message_text TEXT,
-            timestamp INTEGER,
-            ack_type TEXT
-            """,
-        )
-        db_handler.ensure_table_exists(
-            '"123_789_messages"',
-            """
-            user_id TEXT,
-            message_text TEXT,
-            timestamp INTEGER,
-            ack_type TEXT
-            """,
-        )
+    def test_init_database_migrates_legacy_tables_and_populates_channels(self) -> None:
+        db_handler.close_db_connections()
+        config.db_file_path = os.path.join(self.tempdir.name, "legacy.db")
 
         with sqlite3.connect(config.db_file_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE "123_nodedb" (
+                    user_id TEXT PRIMARY KEY, long_name TEXT, short_name TEXT, hw_model TEXT,
+                    is_licensed TEXT, role TEXT, public_key TEXT
+                )
+                """
+            )
+            for table_name in ('"123_Primary_messages"', '"123_789_messages"'):
+                conn.execute(
+                    f"CREATE TABLE {table_name} (user_id TEXT, message_text TEXT, timestamp INTEGER, ack_type TEXT)"
+                )
             conn.execute('INSERT INTO "123_Primary_messages" VALUES (?, ?, ?, ?)', ("123", "sent", 1700000000, "Ack"))
             conn.execute('INSERT INTO "123_Primary_messages" VALUES (?, ?, ?, ?)', ("456", "reply", 1700000001, None))
             conn.execute('INSERT INTO "123_789_messages" VALUES (?, ?, ?, ?)', ("789", "hidden", 1700000002, None))
             conn.commit()
 
+        db_handler.init_database()
+
+        db_handler.update_node_info_in_db(123, long_name="Local Node", short_name="ME")
+        db_handler.update_node_info_in_db(456, long_name="Remote Node", short_name="RM")
+        db_handler.update_node_info_in_db(789, long_name="Archived", short_name="AR", chat_archived=1)
+
         ui_state.channel_list = []
         ui_state.all_messages = {}
 
@@ -106,16 +158,337 @@ class DbHandlerTests(unittest.TestCase):
         self.assertIn("Primary", ui_state.all_messages)
         self.assertIn(789, ui_state.all_messages)
 
-        messages = ui_state.all_messages["Primary"]
-        self.assertTrue(messages[0][0].startswith("-- "))
-        self.assertTrue(any(config.sent_message_prefix in prefix and config.ack_str in prefix for prefix, _ in messages))
-        self.assertTrue(any("RM:" in prefix for prefix, _ in messages))
-        self.assertEqual(ui_state.all_messages[789][-1][1], "hidden")
+        store = ui_state.all_messages["Primary"]
+        lines = [text for index in range(len(store)) for text, _ in format_message_row(store, index)]
+        self.assertTrue(lines[0].startswith("-- "))
+        self.assertTrue(any(config.sent_message_prefix in line and config.ack_str in line for line in lines))
+        self.assertTrue(any("RM:" in line for line in lines))
+        self.assertEqual(ui_state.all_messages[789].texts[-1], "hidden")
+
+        with sqlite3.connect(config.db_file_path) as conn:
+            legacy_tables = conn.execute("SELECT name FROM sqlite_master WHERE name LIKE '123_%_messages'").fetchall()
+            migrated = conn.execute("SELECT owner_node, channel_key, user_id, text FROM messages ORDER BY rowid").fetchall()
+
+        self.assertEqual(legacy_tables, [])
+        self.assertEqual(
+            migrated,
+            [(123, "Primary", "123", "sent"), (123, "Primary", "456", "reply"), (123, "789", "789", "hidden")],
+        )
+
+    def test_run_migrations_records_schema_version_and_is_idempotent(self) -> None:
+        with mock.patch.object(db_handler.logging, "info") as log_info:
+            db_handler.run_migrations()
+
+        with sqlite3.connect(config.db_file_path) as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            node_columns = [row[1] for row in conn.execute('PRAGMA table_info("123_nodedb")')]
+
+        self.assertEqual(version, len(db_handler.SCHEMA_MIGRATIONS))
+        self.assertIn("chat_archived", node_columns)
+        log_info.assert_not_called()
+
+    def test_search_messages_matches_word_prefixes_newest_first(self) -> None:
+        db_handler.save_message_to_db("Primary", "456", "meet at the trailhead")
+        db_handler.save_message_to_db(456, "456", "Trail closed today")
+        db_handler.save_message_to_db("Primary", "456", "unrelated")
+        interface_state.myNodeNum = 999
+        db_handler.save_message_to_db("Primary", "456", "trail on another radio")
+        interface_state.myNodeNum = 123
+
+        newest = db_handler.search_messages("trail")
+        older = db_handler.search_messages("trail", before=newest[1:])
+
+        self.assertEqual(newest[0], 456)
+        self.assertEqual(older[0], "Primary")
+        self.assertIsNone(db_handler.search_messages("trail", before=older[1:]))
+        self.assertIsNone(db_handler.search_messages("   "))
+        self.assertEqual(db_handler.get_stored_message(older[2]), (456, "meet at the trailhead"))
+
+        with sqlite3.connect(config.db_file_path) as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT rowid FROM messages_fts WHERE messages_fts MATCH 'trail*'"
+            ).fetchall()
+        self.assertIn("VIRTUAL TABLE INDEX", " ".join(str(step[-1]) for step in plan))
+
+    def test_search_messages_falls_back_to_substring_match_without_fts(self) -> None:
+        db_handler.save_message_to_db("Primary", "456", "100% done")
+        db_handler.save_message_to_db("Primary", "456", "100 done")
+        with sqlite3.connect(config.db_file_path) as conn:
+            conn.execute("DROP TABLE messages_fts")
+
+        hit = db_handler.search_messages("0%")
+
+        self.assertEqual(db_handler.get_stored_message(hit[2]), (456, "100% done"))
+        self.assertIsNone(db_handler.get_stored_message(hit[2] + 100))
+
+    def test_search_index_migration_keeps_rowids_of_existing_messages(self) -> None:
+        db_handler.close_db_connections()
+        config.db_file_path = os.path.join(self.tempdir.name, "v2.db")
+
+        with sqlite3.connect(config.db_file_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE messages (
+                    owner_node INTEGER NOT NULL, channel_key TEXT NOT NULL, timestamp INTEGER NOT NULL,
+                    user_id TEXT, text TEXT, ack_type TEXT, packet_id INTEGER
+                )
+                """
+            )
+            conn.execute(
+                "INSERT INTO messages (rowid, owner_node, channel_key, timestamp, user_id, text) VALUES (?, ?, ?, ?, ?, ?)",
+                (7, 123, "Primary", 1, "456", "old news"),
+            )
+            conn.execute("PRAGMA user_version = 2")
+            conn.commit()
+
+        db_handler.init_database()
+
+        self.assertEqual(db_handler.search_messages("news"), ("Primary", 1, 7))
+
+    def test_load_messages_from_db_only_reads_current_node_messages(self) -> None:
+        db_handler.update_node_info_in_db(456, long_name="Remote Node", short_name="RM")
+        db_handler.save_message_to_db("Primary", "456", "mine")
+        interface_state.myNodeNum = 999
+        db_handler.save_message_to_db("Primary", "456", "other radio")
+        interface_state.myNodeNum = 123
+
+        ui_state.channel_list = []
+        ui_state.all_messages = {}
+        db_handler.load_messages_from_db()
+
+        self.assertEqual(ui_state.all_messages["Primary"].texts, ["mine"])
+
+    def test_message_channels_keep_first_seen_order_per_owner(self) -> None:
+        db_handler.update_node_info_in_db(456, long_name="Remote Node", short_name="RM")
+        db_handler.save_message_to_db("Primary", "123", "first")
+        db_handler.save_message_to_db(456, "456", "dm")
+        db_handler.save_message_to_db("Primary", "456", "again")
+        db_handler.save_message_to_db("Pruned", "456", "gone")
+        interface_state.myNodeNum = 999
+        db_handler.save_message_to_db("Other", "456", "other radio")
+        interface_state.myNodeNum = 123
+
+        with sqlite3.connect(config.db_file_path) as conn:
+            conn.execute("DELETE FROM messages WHERE channel_key = 'Pruned'")
+            channels = conn.execute("SELECT owner_node, channel_key FROM message_channels ORDER BY first_id").fetchall()
+
+        ui_state.channel_list = []
+        ui_state.all_messages = {}
+        db_handler.load_messages_from_db()
+
+        self.assertEqual(channels, [(123, "Primary"), (123, "456"), (123, "Pruned"), (999, "Other")])
+        self.assertEqual(ui_state.channel_list, ["Primary", 456])
+        self.assertNotIn("Pruned", ui_state.all_messages)
+
+    def test_history_window_loads_one_page_either_side_of_a_hit_and_pages_on_demand(self) -> None:
+        with sqlite3.connect(config.db_file_path) as conn:
+            conn.executemany(
+                "INSERT INTO messages (owner_node, channel_key, timestamp, user_id, text) VALUES (123, 'Primary', ?, '456', ?)",
+                [(1700000000 + offset, f"msg{offset}") for offset in range(10)],
+            )
+            conn.commit()
+
+        ui_state.all_messages = {"Primary": db_handler.MessageStore()}
+
+        with mock.patch.object(db_handler, "MESSAGE_HISTORY_PAGE_SIZE", 2):
+            self.assertTrue(db_handler.open_history_window("Primary", 1700000004, 5))
+            window = ui_state.history_windows["Primary"]
+            self.assertEqual(window.store.texts, ["msg3", "msg4", "msg5", "msg6"])
+
+            self.assertEqual(db_handler.load_older_messages("Primary"), 2)
+            self.assertEqual(db_handler.load_newer_messages("Primary"), 2)
+            self.assertEqual(db_handler.load_newer_messages("Primary"), 1)
+            self.assertEqual(db_handler.load_newer_messages("Primary"), 0)
+
+        self.assertEqual(window.store.texts, [f"msg{offset}" for offset in range(1, 10)])
+        self.assertEqual(list(window.store.db_ids), list(range(2, 11)))
+        self.assertEqual(ui_state.all_messages["Primary"].texts, [])
 
     def test_init_nodedb_inserts_nodes_from_interface(self) -> None:
         interface_state.interface = build_demo_interface()
         interface_state.myNodeNum = DEMO_LOCAL_NODE_NUM
+        db_handler.init_database()
 
         db_handler.init_nodedb()
 
         self.assertEqual(db_handler.get_name_from_database(2701131778, "short"), "SAT2")
+
+    def test_init_nodedb_upserts_in_bulk_and_preserves_archived_flag(self) -> None:
+        interface_state.interface = build_demo_interface()
+        interface_state.myNodeNum = DEMO_LOCAL_NODE_NUM
+        db_handler.init_database()
+        db_handler.update_node_info_in_db(2701131778, long_name="Old", short_name="OLD", chat_archived=1)
+        db_handler.clear_name_cache()
+
+        with mock.patch.object(db_handler, "update_node_info_in_db") as update_node_info:
+            db_handler.init_nodedb()
+
+        update_node_info.assert_not_called()
+        self.assertEqual(db_handler.get_name_from_database(2701131778, "short"), "SAT2")
+        self.assertEqual(db_handler.is_chat_archived(2701131778), 1)
+        with sqlite3.connect(config.db_file_path) as conn:
+            row_count = conn.execute(f'SELECT COUNT(*) FROM "{DEMO_LOCAL_NODE_NUM}_nodedb"').fetchone()[0]
+        self.assertEqual(row_count, len(interface_state.interface.nodes))
+
+    def test_get_db_connection_reuses_connection_per_thread_and_enables_wal(self) -> None:
+        connection = db_handler.get_db_connection()
+
+        self.assertIs(db_handler.get_db_connection(), connection)
+        self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+        other_thread_connections = []
+        worker = threading.Thread(target=lambda: other_thread_connections.append(db_handler.get_db_connection()))
+        worker.start()
+        worker.join()
+
+        self.assertIsNot(other_thread_connections[0], connection)
+
+    def test_close_db_connections_forces_reconnect(self) -> None:
+        connection = db_handler.get_db_connection()
+
+        db_handler.close_db_connections()
+
+        with self.assertRaises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
+        self.assertIsNot(db_handler.get_db_connection(), connection)
+
+    def test_get_name_from_database_serves_repeat_lookups_from_cache(self) -> None:
+        db_handler.update_node_info_in_db(456, long_name="Remote Node", short_name="RM")
+
+        with mock.patch.object(db_handler, "get_db_connection") as get_db_connection:
+            self.assertEqual(db_handler.get_name_from_database(456, "long"), "Remote Node")
+            self.assertEqual(db_handler.get_name_from_database(456, "short"), "RM")
+
+        get_db_connection.assert_not_called()
+
+    def test_name_cache_is_bulk_loaded_and_bounded(self) -> None:
+        db_handler.update_node_info_in_db(456, long_name="Remote Node", short_name="RM")
+        db_handler.update_node_info_in_db(789, long_name="Other Node", short_name="ON")
+        db_handler.clear_name_cache()
+
+        with mock.patch.object(db_handler, "NAME_CACHE_SIZE", 4):
+            db_handler.load_name_cache()
+            with mock.patch.object(db_handler, "get_db_connection") as get_db_connection:
+                self.assertEqual(db_handler.get_name_from_database(456, "short"), "RM")
+                self.assertEqual(db_handler.get_name_from_database(789, "long"), "Other Node")
+            get_db_connection.assert_not_called()
+
+            db_handler.cache_node_names(1, "One", "1")
+            db_handler.cache_node_names(2, "Two", "2")
+
+            self.assertEqual(len(db_handler._name_cache), 4)
+            self.assertNotIn((456, "short"), db_handler._name_cache)
+
+    def test_write_behind_batches_inserts_and_acks_until_flushed(self) -> None:
+        config.db_write_behind = "True"
+
+        with mock.patch.object(db_handler, "DB_WRITE_FLUSH_INTERVAL_SECONDS", 60):
+            db_handler.save_message_to_db("Primary", "123", "one", packet_id=7)
+            db_handler.save_message_to_db("Primary", "456", "two")
+            db_handler.update_ack_nak(7, "Ack")
+
+            self.assertTrue(db_handler.flush_db_writes())
+
+        with sqlite3.connect(config.db_file_path) as conn:
+            rows = conn.execute("SELECT user_id, text, ack_type FROM messages ORDER BY rowid").fetchall()
+
+        self.assertEqual(rows, [("123", "one", "Ack"), ("456", "two", None)])
+
+    def test_stop_db_writer_flushes_pending_writes(self) -> None:
+        config.db_write_behind = "True"
+
+        with mock.patch.object(db_handler, "DB_WRITE_FLUSH_INTERVAL_SECONDS", 60):
+            db_handler.save_message_to_db("Primary", "123", "queued")
+            db_handler.stop_db_writer()
+
+        with sqlite3.connect(config.db_file_path) as conn:
+            row = conn.execute("SELECT text FROM messages").fetchone()
+
+        self.assertEqual(row, ("queued",))
+
+    def test_queue_operations_give_up_instead_of_blocking_on_a_full_queue(self) -> None:
+        config.db_write_behind = "True"
+        full_queue = db_handler.queue.Queue(maxsize=1)
+        full_queue.put(("SELECT 1", ()))
+        writer = mock.Mock()
+        writer.is_alive.return_value = True
+
+        with mock.patch.object(db_handler, "_db_write_queue", full_queue):
+            with mock.patch.object(db_handler, "_db_writer_thread", writer):
+                with mock.patch.object(db_handler, "DB_WRITE_QUEUE_PUT_TIMEOUT_SECONDS", 0.01):
+                    with mock.patch.object(db_handler.logging, "warning") as warning:
+                        db_handler.save_message_to_db("Primary", "123", "dropped")
+                        self.assertFalse(db_handler.flush_db_writes(timeout=0.01))
+                        db_handler.stop_db_writer(timeout=0.01)
+
+        self.assertEqual(warning.call_count, 3)
+        writer.join.assert_not_called()
+
+    def test_commit_db_writes_waits_out_a_locked_database_instead_of_dropping_rows(self) -> None:
+        db_handler.close_db_connections()
+        write = ("INSERT INTO messages (owner_node, channel_key, user_id, text, timestamp) VALUES (?, ?, ?, ?, 1)",)
+
+        with mock.patch.object(db_handler, "DB_BUSY_TIMEOUT_SECONDS", 0.01):
+            db_handler.get_db_connection()
+            blocker = sqlite3.connect(config.db_file_path, isolation_level=None)
+            blocker.execute("BEGIN IMMEDIATE")
+            with mock.patch.object(db_handler.time, "sleep", side_effect=lambda _: blocker.commit()) as sleep:
+                db_handler._commit_db_writes([write + ((123, "Primary", "123", "kept"),)])
+        blocker.close()
+
+        sleep.assert_called_once_with(db_handler.DB_WRITE_BUSY_RETRY_SECONDS)
+        with sqlite3.connect(config.db_file_path) as conn:
+            self.assertEqual(conn.execute("SELECT text FROM messages").fetchall(), [("kept",)])
+
+    def test_commit_db_writes_drops_batch_once_busy_retries_run_out(self) -> None:
+        db_handler.close_db_connections()
+        write = ("INSERT INTO messages (owner_node, channel_key, user_id, text, timestamp) VALUES (?, ?, ?, ?, 1)",)
+
+        with mock.patch.object(db_handler, "DB_BUSY_TIMEOUT_SECONDS", 0.01):
+            db_handler.get_db_connection()
+            blocker = sqlite3.connect(config.db_file_path, isolation_level=None)
+            blocker.execute("BEGIN IMMEDIATE")
+            with mock.patch.object(db_handler.time, "sleep") as sleep:
+                with mock.patch.object(db_handler.logging, "error") as log_error:
+                    db_handler._commit_db_writes([write + ((123, "Primary", "123", "dropped"),)])
+        blocker.rollback()
+        blocker.close()
+
+        self.assertEqual(sleep.call_count, db_handler.DB_WRITE_BUSY_RETRIES)
+        log_error.assert_called_once()
+        with sqlite3.connect(config.db_file_path) as conn:
+            self.assertEqual(conn.execute("SELECT text FROM messages").fetchall(), [])
+
+    def test_commit_db_writes_logs_connection_errors_instead_of_raising(self) -> None:
+        error = sqlite3.OperationalError("unable to open database file")
+
+        with mock.patch.object(db_handler, "get_db_connection", side_effect=error):
+            with mock.patch.object(db_handler.logging, "error") as log_error:
+                db_handler._commit_db_writes([("SELECT 1", ())])
+
+        log_error.assert_called_once()
+
+    def test_load_messages_from_db_loads_latest_page_and_pages_older_history_on_demand(self) -> None:
+        db_handler.update_node_info_in_db(456, long_name="Remote Node", short_name="RM")
+        with sqlite3.connect(config.db_file_path) as conn:
+            conn.executemany(
+                "INSERT INTO messages (owner_node, channel_key, timestamp, user_id, text) VALUES (123, 'Primary', ?, '456', ?)",
+                [(1700000000 + offset, f"msg{offset}") for offset in range(5)],
+            )
+            conn.commit()
+
+        ui_state.channel_list = []
+        ui_state.all_messages = {}
+
+        with mock.patch.object(db_handler, "MESSAGE_HISTORY_PAGE_SIZE", 2):
+            db_handler.load_messages_from_db()
+            self.assertEqual(ui_state.all_messages["Primary"].texts, ["msg3", "msg4"])
+
+            self.assertEqual(db_handler.load_older_messages("Primary"), 2)
+            self.assertEqual(db_handler.load_older_messages("Primary"), 1)
+            self.assertEqual(db_handler.load_older_messages("Primary"), 0)
+
+        store = ui_state.all_messages["Primary"]
+        self.assertEqual(store.texts, ["msg0", "msg1", "msg2", "msg3", "msg4"])
+        self.assertEqual(store.first_id, -3)
+        self.assertNotIn("Primary", ui_state.history_cursors)
@@ -0,0 +1,159 @@
+import gzip
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import contact.ui.default_config as config
+from contact.utilities import db_handler, db_maintenance
+from contact.utilities.singleton import interface_state
+
+from tests.test_support import reset_singletons, restore_config, snapshot_config
+
+DAY = 24 * 60 * 60
+NOW = 1700000000
+
+
+class DbMaintenanceTests(unittest.TestCase):
+    def setUp(self) -> None:
+        reset_singletons()
+        self.saved_config = snapshot_config(
+            "db_file_path",
+            "db_write_behind",
+            "message_retention_days",
+            "message_retention_rows",
+            "message_archive_path",
+            "db_incremental_vacuum",
+        )
+        self.tempdir = tempfile.TemporaryDirectory()
+        config.db_file_path = os.path.join(self.tempdir.name, "client.db")
+        config.db_write_behind = "False"
+        config.message_retention_days = "0"
+        config.message_retention_rows = "0"
+        config.message_archive_path = ""
+        config.db_incremental_vacuum = "False"
+        interface_state.myNodeNum = 123
+        db_handler.init_database()
+
+    def tearDown(self) -> None:
+        db_maintenance.stop_db_maintenance()
+        db_handler.close_db_connections()
+        self.tempdir.cleanup()
+        restore_config(self.saved_config)
+        reset_singletons()
+
+    def insert_messages(self, channel_key: str, timestamps: list) -> None:
+        with sqlite3.connect(config.db_file_path) as conn:
+            conn.executemany(
+                "INSERT INTO messages (owner_node, channel_key, timestamp, user_id, text) VALUES (123, ?, ?, '456', ?)",
+                [(channel_key, timestamp, f"{channel_key}@{timestamp}") for timestamp in timestamps],
+            )
+            conn.commit()
+
+    def stored_texts(self) -> list:
+        with sqlite3.connect(config.db_file_path) as conn:
+            return [row[0] for row in conn.execute("SELECT text FROM messages ORDER BY channel_key, timestamp")]
+
+    def test_prune_messages_is_a_no_op_by_default(self) -> None:
+        self.insert_messages("Primary", [NOW - 400 * DAY, NOW])
+
+        self.assertEqual(db_maintenance.prune_messages(now=NOW), 0)
+        self.assertEqual(len(self.stored_texts()), 2)
+
+    def test_prune_messages_applies_age_and_per_channel_limits(self) -> None:
+        config.message_retention_days = "30"
+        config.message_retention_rows = "2"
+        self.insert_messages("Primary", [NOW - 40 * DAY, NOW - 3, NOW - 2, NOW - 1])
+        self.insert_messages("456", [NOW - 5])
+
+        with mock.patch.object(db_maintenance, "PRUNE_BATCH_ROWS", 1):
+            pruned = db_maintenance.prune_messages(now=NOW)
+
+        self.assertEqual(pruned, 2)
+        self.assertEqual(self.stored_texts(), [f"456@{NOW - 5}", f"Primary@{NOW - 2}", f"Primary@{NOW - 1}"])
+        self.assertIsNone(db_handler.search_messages(str(NOW - 3)))
+
+    def test_prune_messages_archives_pruned_rows_to_gzip(self) -> None:
+        config.message_retention_rows = "1"
+        config.message_archive_path = os.path.join(self.tempdir.name, "archive.jsonl.gz")
+        self.insert_messages("Primary", [NOW - 2, NOW - 1])
+        db_maintenance.prune_messages(now=NOW)
+        self.insert_messages("Primary", [NOW])
+        db_maintenance.prune_messages(now=NOW)
+
+        with gzip.open(config.message_archive_path, "rt", encoding="utf-8") as archive:
+            archived = [json.loads(line) for line in archive]
+
+        self.assertEqual([row["text"] for row in archived], [f"Primary@{NOW - 2}", f"Primary@{NOW - 1}"])
+        self.assertEqual(archived[0]["channel_key"], "Primary")
+
+    def test_invalid_retention_settings_are_treated_as_disabled(self) -> None:
+        config.message_retention_days = "soon"
+        config.message_retention_rows = ""
+
+        with mock.patch.object(db_maintenance.logging, "warning") as warning:
+            self.assertEqual(db_maintenance.get_retention_policy(), (0, 0))
+
+        warning.assert_called_once()
+
+    def test_rollup_telemetry_drops_old_samples_and_merges_old_hours_into_days(self) -> None:
+        old_day = NOW - NOW % DAY - 40 * DAY
+        db_handler.save_telemetry_samples(456, {"voltage": 3.5}, timestamp=old_day + 60)
+        db_handler.save_telemetry_samples(456, {"voltage": 4.5}, timestamp=old_day + 5 * 3600)
+        db_handler.save_telemetry_samples(456, {"voltage": 4.0}, timestamp=NOW - 2 * DAY)
+        db_handler.save_telemetry_samples(456, {"voltage": 3.9}, timestamp=NOW - 2 * DAY + 3600)
+
+        self.assertEqual(db_maintenance.rollup_telemetry(now=NOW), (2, 1))
+        self.assertEqual(db_maintenance.rollup_telemetry(now=NOW), (0, 0))
+
+        with sqlite3.connect(config.db_file_path) as conn:
+            samples = conn.execute("SELECT ts FROM telemetry_samples ORDER BY ts").fetchall()
+            rollups = conn.execute("SELECT bucket_ts, sample_count, total FROM telemetry_rollups ORDER BY bucket_ts")
+            rollups = rollups.fetchall()
+
+        self.assertEqual(samples, [(NOW - 2 * DAY,), (NOW - 2 * DAY + 3600,)])
+        self.assertEqual(rollups[0], (old_day, 2, 8.0))
+        self.assertEqual(len(rollups), 3)
+        self.assertEqual(db_handler.get_telemetry_summary(456, old_day)["voltage"], (3.5, 3.975, 4.5))
+
+    def create_legacy_database(self) -> None:
+        db_handler.close_db_connections()
+        config.db_file_path = os.path.join(self.tempdir.name, "old.db")
+        with sqlite3.connect(config.db_file_path) as conn:
+            conn.execute("CREATE TABLE legacy (value TEXT)")
+
+    def auto_vacuum_mode(self) -> int:
+        with sqlite3.connect(config.db_file_path) as conn:
+            return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+    def test_compact_database_leaves_file_alone_without_retention_or_opt_in(self) -> None:
+        self.create_legacy_database()
+
+        db_maintenance.compact_database()
+
+        self.assertEqual(self.auto_vacuum_mode(), 0)
+
+    def test_compact_database_converts_existing_file_to_incremental_auto_vacuum(self) -> None:
+        for setting, value in (("message_retention_rows", "100"), ("db_incremental_vacuum", "True")):
+            with self.subTest(setting=setting):
+                self.create_legacy_database()
+                with mock.patch.object(config, setting, value):
+                    db_maintenance.compact_database()
+                    db_maintenance.compact_database()
+
+                self.assertEqual(self.auto_vacuum_mode(), db_maintenance.AUTO_VACUUM_INCREMENTAL)
+                os.remove(config.db_file_path)
+
+    def test_maintenance_thread_runs_after_start_delay_and_stops(self) -> None:
+        with mock.patch.object(db_maintenance, "DB_MAINTENANCE_START_DELAY_SECONDS", 0):
+            with mock.patch.object(
+                db_maintenance, "run_db_maintenance", side_effect=db_maintenance._maintenance_stop.set
+            ) as run_db_maintenance:
+                db_maintenance.start_db_maintenance()
+                db_maintenance._maintenance_thread.join(1)
+                db_maintenance.stop_db_maintenance()
+
+        run_db_maintenance.assert_called_once_with()
+        self.assertIsNone(db_maintenance._maintenance_thread)
@@ -4,7 +4,9 @@ from unittest import mock
 
 import contact.__main__ as entrypoint
 import contact.ui.default_config as config
-from contact.utilities.db_handler import get_name_from_database
+from contact.ui.nav_utils import format_message_row
+from contact.utilities.db_handler import close_db_connections, get_name_from_database
+from contact.utilities.db_maintenance import stop_db_maintenance
 from contact.utilities.demo_data import DEMO_CHANNELS, DEMO_LOCAL_NODE_NUM, build_demo_interface, configure_demo_database
 from contact.utilities.singleton import interface_state, ui_state
 
@@ -17,6 +19,8 @@ class DemoDataTests(unittest.TestCase):
         self.saved_config = snapshot_config("db_file_path", "node_sort", "single_pane_mode")
 
     def tearDown(self) -> None:
+        stop_db_maintenance()
+        close_db_connections()
         restore_config(self.saved_config)
         reset_singletons()
 
@@ -43,9 +47,10 @@ class DemoDataTests(unittest.TestCase):
             self.assertEqual(get_name_from_database(2701131778, "short"), "SAT2")
 
             medium_fast = ui_state.all_messages["MediumFast"]
-            self.assertTrue(medium_fast[0][0].startswith("-- "))
-            self.assertTrue(any(config.sent_message_prefix in prefix and config.ack_str in prefix for prefix, _ in medium_fast))
-            self.assertTrue(any("SAT2:" in prefix for prefix, _ in medium_fast))
+            lines = [text for index in range(len(medium_fast)) for text, _ in format_message_row(medium_fast, index)]
+            self.assertTrue(lines[0].startswith("-- "))
+            self.assertTrue(any(config.sent_message_prefix in line and config.ack_str in line for line in lines))
+            self.assertTrue(any("SAT2:" in line for line in lines))
 
             direct_messages = ui_state.all_messages[2701131788]
-            self.assertEqual(len(direct_messages), 3)
+            self.assertEqual(len(direct_messages), 2)
@@ -126,15 +126,19 @@ class MainRuntimeTests(unittest.TestCase):
             with mock.patch.object(entrypoint, "get_channels", return_value=["Primary"]) as get_channels:
                 with mock.patch.object(entrypoint, "get_node_list", return_value=[123, 456]) as get_node_list:
                     with mock.patch.object(entrypoint.pub, "subscribe") as subscribe:
-                        with mock.patch.object(entrypoint, "init_nodedb") as init_nodedb:
-                            with mock.patch.object(entrypoint, "seed_demo_messages") as seed_demo_messages:
-                                with mock.patch.object(entrypoint, "load_messages_from_db") as load_messages:
-                                    entrypoint.initialize_globals(seed_demo=True)
+                        with mock.patch.object(entrypoint, "init_database") as init_database:
+                            with mock.patch.object(entrypoint, "init_nodedb") as init_nodedb:
+                                with mock.patch.object(entrypoint, "seed_demo_messages") as seed_demo_messages:
+                                    with mock.patch.object(entrypoint, "load_messages_from_db") as load_messages:
+                                        with mock.patch.object(entrypoint, "start_db_maintenance") as start_maintenance:
+                                            with mock.patch.object(entrypoint, "start_packet_worker") as start_worker:
+                                                entrypoint.initialize_globals(seed_demo=True)
 
         self.assertEqual(ui_state.channel_list, ["Primary"])
         self.assertEqual(ui_state.all_messages, {})
         self.assertEqual(ui_state.notifications, [])
-        self.assertEqual(ui_state.packet_buffer, [])
+        self.assertEqual(list(ui_state.packet_buffer), [])
+        self.assertEqual(ui_state.packet_buffer.maxlen, entrypoint.get_packet_log_size())
         self.assertEqual(ui_state.node_list, [123, 456])
         self.assertEqual(ui_state.selected_channel, 0)
         self.assertEqual(ui_state.selected_message, 0)
@@ -145,9 +149,12 @@ class MainRuntimeTests(unittest.TestCase):
         get_channels.assert_called_once_with()
         get_node_list.assert_called_once_with()
         subscribe.assert_called_once_with(entrypoint.on_receive, "meshtastic.receive")
+        init_database.assert_called_once_with()
         init_nodedb.assert_called_once_with()
         seed_demo_messages.assert_called_once_with()
         load_messages.assert_called_once_with()
+        start_maintenance.assert_called_once_with()
+        start_worker.assert_called_once_with()
 
     def test_ensure_min_rows_retries_until_terminal_is_large_enough(self) -> None:
         stdscr = mock.Mock()
@@ -181,10 +188,16 @@ class MainRuntimeTests(unittest.TestCase):
 
         with mock.patch.object(entrypoint.sys, "argv", ["contact"]):
             with mock.patch.object(entrypoint.curses, "wrapper") as wrapper:
-                entrypoint.start()
+                with mock.patch.object(entrypoint, "close_db_connections") as close_db_connections:
+                    with mock.patch.object(entrypoint, "stop_db_maintenance") as stop_db_maintenance:
+                        with mock.patch.object(entrypoint, "stop_packet_worker") as stop_packet_worker:
+                            entrypoint.start()
 
         wrapper.assert_called_once_with(entrypoint.main)
         interface.close.assert_called_once_with()
+        stop_packet_worker.assert_called_once_with()
+        stop_db_maintenance.assert_called_once_with()
+        close_db_connections.assert_called_once_with()
 
     def test_start_does_not_crash_when_wrapper_returns_without_interface(self) -> None:
         interface_state.interface = None
@@ -0,0 +1,16 @@
+import unittest
+
+from contact.utilities.message_store import KIND_RECEIVED, NO_DB_ID, NO_HOPS, MessageStore
+
+
+class MessageStoreTests(unittest.TestCase):
+    def test_hop_counts_are_stored_unclipped_and_distinct_from_no_hops(self) -> None:
+        store = MessageStore()
+        store.append(1700000000, 222, "a", hops=2)
+        store.append(1700000001, 222, "b", hops=-1)  # hopLimit above hopStart
+        store.append(1700000002, 222, "c", hops=300)
+        store.append(1700000003, 222, "d")
+
+        self.assertEqual(list(store.hops), [2, -1, 300, NO_HOPS])
+        self.assertNotIn(NO_HOPS, store.hops[:3])
+        self.assertEqual(store.row(3), (1700000003, 222, "d", KIND_RECEIVED, 0, NO_HOPS, NO_DB_ID))
@@ -1,16 +1,30 @@
 import unittest
+from datetime import datetime
 from unittest import mock
 
+import contact.ui.default_config as config
 from contact.ui import nav_utils
-from contact.ui.nav_utils import truncate_with_ellipsis, wrap_text
+from contact.ui.nav_utils import (
+    pad_to_width,
+    slice_to_width,
+    split_text_to_width_chunks,
+    text_width,
+    truncate_with_ellipsis,
+    wrap_text,
+)
+from contact.utilities.message_store import ACK_OK, ACK_UNKNOWN, KIND_RECEIVED, KIND_SENT, NO_HOPS, MessageStore
 from contact.utilities.singleton import ui_state
 
+from tests.test_support import restore_config, snapshot_config
+
 
 class NavUtilsTests(unittest.TestCase):
     def setUp(self) -> None:
         ui_state.current_window = 0
         ui_state.node_list = []
         ui_state.start_index = [0, 0, 0]
+        ui_state.all_messages = {}
+        ui_state.wrapped_messages = {}
 
     def test_wrap_text_splits_wide_characters_by_display_width(self) -> None:
         self.assertEqual(wrap_text("🔐🔐🔐", 4), ["🔐", "🔐", "🔐"])
@@ -18,6 +32,19 @@ class NavUtilsTests(unittest.TestCase):
     def test_truncate_with_ellipsis_respects_display_width(self) -> None:
         self.assertEqual(truncate_with_ellipsis("🔐Alpha", 5), "🔐Al…")
 
+    def test_width_helpers_agree_on_ascii_and_wide_text(self) -> None:
+        self.assertEqual(text_width("Alpha"), 5)
+        self.assertEqual(text_width("漢字é"), 5)
+        self.assertEqual(slice_to_width("漢字é", 3), "漢")
+        self.assertEqual(slice_to_width("Alpha", 3), "Alp")
+        self.assertEqual(pad_to_width("漢", 3), "漢 ")
+
+    def test_split_text_to_width_chunks_breaks_long_words_by_display_width(self) -> None:
+        self.assertEqual(split_text_to_width_chunks("abcdefg", 3), ["abc", "def", "g"])
+        self.assertEqual(split_text_to_width_chunks("a漢字bc", 3), ["a漢", "字b", "c"])
+        self.assertEqual(split_text_to_width_chunks("ab漢", 1), ["a", "b"])  # A wide character never fits
+        self.assertEqual(split_text_to_width_chunks("", 3), [""])
+
     def test_highlight_line_reserves_scroll_arrow_column_for_nodes(self) -> None:
         ui_state.current_window = 2
         ui_state.start_index = [0, 0, 0]
@@ -34,3 +61,54 @@ class NavUtilsTests(unittest.TestCase):
             menu_pad.chgat.call_args_list,
             [mock.call(0, 1, 16, 11), mock.call(1, 1, 16, 22)],
         )
+
+    def test_get_wrapped_messages_only_wraps_new_and_prepended_entries(self) -> None:
+        ten_o_clock = int(datetime(2024, 1, 1, 10, 0).timestamp())
+        store = MessageStore()
+        store.append(ten_o_clock, 222, "one two three four")
+        ui_state.all_messages = {"Primary": store}
+
+        with mock.patch.object(nav_utils, "get_name_from_database", return_value="A"):
+            with mock.patch.object(nav_utils, "wrap_message_row", wraps=nav_utils.wrap_message_row) as wrap_message_row:
+                wrapped = nav_utils.get_wrapped_messages("Primary", 30)
+                self.assertEqual(wrap_message_row.call_count, 1)
+                self.assertEqual(wrapped.line_starts, [0])
+                self.assertEqual(wrapped.lines[0][0], ("-- 2024-01-01 10:00 --", "timestamps"))
+
+                store.append(ten_o_clock + 1, 222, "five")
+                wrapped = nav_utils.get_wrapped_messages("Primary", 30)
+                self.assertEqual(wrap_message_row.call_count, 2)
+
+                # The formerly oldest message keeps its separator only if the older page ends in another hour
+                store.prepend([(ten_o_clock - 60, 222, "zero", KIND_RECEIVED, ACK_UNKNOWN, NO_HOPS)])
+                wrapped = nav_utils.get_wrapped_messages("Primary", 30)
+                self.assertEqual(wrap_message_row.call_count, 4)
+
+            expected = [nav_utils.wrap_message_row(store, index, 30) for index in range(len(store))]
+
+        self.assertEqual(wrapped.lines, expected)
+        self.assertEqual(wrapped.line_count, sum(len(lines) for lines in expected))
+        self.assertEqual(wrapped.line_starts[-1], wrapped.line_count - len(expected[-1]))
+
+    def test_get_wrapped_messages_rewraps_acked_rows_and_rebuilds_after_width_change(self) -> None:
+        self.addCleanup(restore_config, snapshot_config("sent_message_prefix", "ack_unknown_str", "ack_str"))
+        config.sent_message_prefix = ">> Sent"
+        config.ack_unknown_str = "[…]"
+        config.ack_str = "[✓] with a much longer marker"
+
+        ten_o_clock = int(datetime(2024, 1, 1, 10, 0).timestamp())
+        store = MessageStore()
+        sent_row = store.append(ten_o_clock, 111, "hi", kind=KIND_SENT)
+        ui_state.all_messages = {"Primary": store}
+        wrapped = nav_utils.get_wrapped_messages("Primary", 40)
+        self.assertEqual(wrapped.line_count, 2)
+
+        store.set_ack(sent_row, ACK_OK)
+        wrapped = nav_utils.get_wrapped_messages("Primary", 40)
+        self.assertEqual(wrapped.line_count, 3)
+        self.assertEqual(store.dirty_rows, set())
+        self.assertIn("[✓]", wrapped.lines[0][1][0])
+
+        wrapped = nav_utils.get_wrapped_messages("Primary", 80)
+        self.assertEqual(wrapped.width, 80)
+        self.assertEqual(wrapped.line_count, 2)
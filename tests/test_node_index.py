@@ -0,0 +1,61 @@
+import unittest
+
+from contact.utilities.demo_data import DEMO_LOCAL_NODE_NUM, build_demo_interface
+from contact.utilities.node_index import NodeIndex
+
+
+def reference_node_list(nodes, my_node_num, node_sort):
+    """The three stable sorts the node list was originally built with."""
+
+    def node_sort_key(node):
+        if node_sort == "lastHeard":
+            return -node["lastHeard"] if isinstance(node.get("lastHeard"), int) else 0
+        if node_sort == "name":
+            return node["user"]["longName"]
+        return node.get("hopsAway", 100)
+
+    sorted_nodes = sorted(nodes, key=node_sort_key)
+    sorted_nodes = sorted(sorted_nodes, key=lambda node: node.get("isFavorite", False), reverse=True)
+    sorted_nodes = sorted(sorted_nodes, key=lambda node: node.get("isIgnored", False))
+    return [my_node_num] + [node["num"] for node in sorted_nodes if node["num"] != my_node_num]
+
+
+class NodeIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.interface = build_demo_interface()
+        self.nodes = self.interface.nodesByNum
+
+    def test_initial_order_matches_stable_sorts_for_each_sort_mode(self) -> None:
+        for node_sort in ("lastHeard", "name", "hops"):
+            with self.subTest(node_sort=node_sort):
+                index = NodeIndex(self.nodes.values(), DEMO_LOCAL_NODE_NUM, node_sort)
+                expected = reference_node_list(self.nodes.values(), DEMO_LOCAL_NODE_NUM, node_sort)
+                self.assertEqual(index.node_list, expected)
+
+    def test_update_moves_only_the_changed_node_and_reports_the_rows_between(self) -> None:
+        index = NodeIndex(self.nodes.values(), DEMO_LOCAL_NODE_NUM, "lastHeard")
+        node_list = index.node_list
+        old_position = node_list.index(0xA1000009)
+
+        self.nodes[0xA1000009]["lastHeard"] = max(node["lastHeard"] for node in self.nodes.values()) + 1
+        moved_rows = index.update(self.nodes[0xA1000009])
+
+        # The favorite stays ahead; the refreshed node jumps to the top of the rest
+        self.assertEqual(moved_rows, (2, old_position))
+        self.assertIs(index.node_list, node_list)
+        self.assertEqual(node_list, reference_node_list(self.nodes.values(), DEMO_LOCAL_NODE_NUM, "lastHeard"))
+        self.assertIsNone(index.update(self.nodes[0xA1000009]))
+
+    def test_update_inserts_new_nodes_and_remove_drops_them(self) -> None:
+        index = NodeIndex(self.nodes.values(), DEMO_LOCAL_NODE_NUM, "hops")
+        self.nodes[0xB0000001] = {"num": 0xB0000001, "user": {"longName": "New"}, "hopsAway": 0}
+
+        moved_rows = index.update(self.nodes[0xB0000001])
+
+        self.assertEqual(index.node_list, reference_node_list(self.nodes.values(), DEMO_LOCAL_NODE_NUM, "hops"))
+        self.assertEqual(moved_rows, (index.node_list.index(0xB0000001), len(index) - 1))
+
+        del self.nodes[0xB0000001]
+        index.remove(0xB0000001)
+
+        self.assertEqual(index.node_list, reference_node_list(self.nodes.values(), DEMO_LOCAL_NODE_NUM, "hops"))
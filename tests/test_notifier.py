@@ -0,0 +1,84 @@
+import threading
+import unittest
+from unittest import mock
+
+import contact.ui.default_config as config
+from contact.utilities import notifier
+
+from tests.test_support import restore_config, snapshot_config
+
+
+class NotifierTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.saved_config = snapshot_config(
+            "notification_sound", "notification_muted_channels", "notification_priority_channels"
+        )
+        config.notification_sound = "True"
+        config.notification_muted_channels = ""
+        config.notification_priority_channels = ""
+        notifier._players.clear()
+
+    def tearDown(self) -> None:
+        notifier.stop_notifier()
+        notifier._players.clear()
+        notifier._sound_command = notifier._UNRESOLVED
+        restore_config(self.saved_config)
+
+    def test_token_bucket_allows_a_burst_then_one_per_refill(self) -> None:
+        bucket = notifier.TokenBucket(2, 10.0, now=0.0)
+
+        self.assertEqual(bucket.take(0.0), 0.0)
+        self.assertEqual(bucket.take(0.0), 0.0)
+        self.assertEqual(bucket.take(0.0), 10.0)
+        self.assertEqual(bucket.take(5.0), 5.0)
+        self.assertEqual(bucket.take(10.0), 0.0)
+
+    def test_burst_of_messages_plays_one_sound_and_muted_channels_none(self) -> None:
+        played = threading.Event()
+        config.notification_muted_channels = "Muted, 456"
+
+        with mock.patch.object(notifier, "SOUND_DEBOUNCE_SECONDS", 0.05):
+            with mock.patch.object(notifier, "play_sound", side_effect=played.set) as play_sound:
+                notifier.notify_message(456)
+                notifier.notify_message("Muted")
+                self.assertIsNone(notifier._notifier_thread)
+
+                thread_count = threading.active_count()
+                for _ in range(50):
+                    notifier.notify_message("Primary")
+                self.assertLessEqual(threading.active_count(), thread_count + 1)
+
+                self.assertTrue(played.wait(2.0))
+                notifier.stop_notifier()
+
+        play_sound.assert_called_once_with()
+
+    def test_priority_channel_skips_the_quiet_period(self) -> None:
+        played = threading.Event()
+        config.notification_priority_channels = "Alerts"
+
+        with mock.patch.object(notifier, "SOUND_DEBOUNCE_SECONDS", 60.0):
+            with mock.patch.object(notifier, "play_sound", side_effect=played.set):
+                notifier.notify_message("Primary")
+                notifier.notify_message("Alerts")
+
+                self.assertTrue(played.wait(2.0))
+
+    def test_sound_command_is_resolved_once_and_player_is_not_waited_on(self) -> None:
+        running = mock.Mock(args=["paplay"])
+        running.poll.return_value = None
+
+        with mock.patch.object(notifier.platform, "system", return_value="Linux"):
+            with mock.patch.object(notifier.shutil, "which", return_value="/usr/bin/paplay") as which:
+                with mock.patch.object(notifier.os.path, "exists", return_value=True):
+                    with mock.patch.object(notifier.subprocess, "Popen", return_value=running) as popen:
+                        notifier.play_sound()
+                        notifier.play_sound()  # Still playing, so skipped
+
+                        running.poll.return_value = 0
+                        notifier.play_sound()
+
+        which.assert_called_once_with("paplay")
+        self.assertEqual(popen.call_count, 2)
+        self.assertEqual(popen.call_args.args[0], ["paplay", "/usr/share/sounds/freedesktop/stereo/complete.oga"])
+        self.assertEqual(notifier._players, [running])
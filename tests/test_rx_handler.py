@@ -1,8 +1,10 @@
 import unittest
+from collections import deque
 from unittest import mock
 
 import contact.ui.default_config as config
 from contact.message_handlers import rx_handler
+from contact.utilities.message_store import MessageStore
 from contact.utilities.singleton import interface_state, menu_state, ui_state
 
 from tests.test_support import reset_singletons, restore_config, snapshot_config
@@ -11,17 +13,17 @@ from tests.test_support import reset_singletons, restore_config, snapshot_config
 class RxHandlerTests(unittest.TestCase):
     def setUp(self) -> None:
         reset_singletons()
-        self.saved_config = snapshot_config("notification_sound", "message_prefix")
+        self.saved_config = snapshot_config("notification_sound", "message_prefix", "packet_log_size")
         config.notification_sound = "False"
 
     def tearDown(self) -> None:
         restore_config(self.saved_config)
         reset_singletons()
 
-    def test_on_receive_text_message_refreshes_selected_channel(self) -> None:
+    def test_process_packet_text_message_refreshes_selected_channel(self) -> None:
         interface_state.myNodeNum = 111
         ui_state.channel_list = ["Primary"]
-        ui_state.all_messages = {"Primary": []}
+        ui_state.all_messages = {"Primary": MessageStore()}
         ui_state.selected_channel = 0
 
         packet = {
@@ -33,24 +35,25 @@ class RxHandlerTests(unittest.TestCase):
             "decoded": {"portnum": "TEXT_MESSAGE_APP", "payload": b"hello"},
         }
 
-        with mock.patch.object(rx_handler, "refresh_node_list", return_value=True):
+        with mock.patch.object(rx_handler, "refresh_node_entry", return_value=(2, 4)):
             with mock.patch.object(rx_handler, "request_ui_redraw") as request_ui_redraw:
                 with mock.patch.object(rx_handler, "add_notification") as add_notification:
                     with mock.patch.object(rx_handler, "save_message_to_db") as save_message_to_db:
-                        with mock.patch.object(rx_handler, "get_name_from_database", return_value="SAT2"):
-                            rx_handler.on_receive(packet, interface=None)
+                        rx_handler.process_packet(packet)
 
         self.assertEqual(request_ui_redraw.call_args_list, [mock.call(nodes=True), mock.call(messages=True, scroll_messages_to_bottom=True)])
         add_notification.assert_not_called()
         save_message_to_db.assert_called_once_with("Primary", 222, "hello")
-        self.assertEqual(ui_state.all_messages["Primary"][-1][1], "hello")
-        self.assertIn("SAT2:", ui_state.all_messages["Primary"][-1][0])
-        self.assertIn("[2]", ui_state.all_messages["Primary"][-1][0])
+        self.assertEqual(ui_state.dirty_node_rows, {2, 3, 4})
+        store = ui_state.all_messages["Primary"]
+        self.assertEqual(store.texts, ["hello"])
+        self.assertEqual(store.senders[0], 222)
+        self.assertEqual(store.hops[0], 2)
 
-    def test_on_receive_direct_message_adds_channel_and_notification(self) -> None:
+    def test_process_packet_direct_message_adds_channel_and_notification(self) -> None:
         interface_state.myNodeNum = 111
         ui_state.channel_list = ["Primary"]
-        ui_state.all_messages = {"Primary": []}
+        ui_state.all_messages = {"Primary": MessageStore()}
         ui_state.selected_channel = 0
 
         packet = {
@@ -61,30 +64,103 @@ class RxHandlerTests(unittest.TestCase):
             "decoded": {"portnum": "TEXT_MESSAGE_APP", "payload": b"dm"},
         }
 
-        with mock.patch.object(rx_handler, "refresh_node_list", return_value=False):
+        with mock.patch.object(rx_handler, "refresh_node_entry", return_value=None):
             with mock.patch.object(rx_handler, "request_ui_redraw") as request_ui_redraw:
                 with mock.patch.object(rx_handler, "add_notification") as add_notification:
                     with mock.patch.object(rx_handler, "update_node_info_in_db") as update_node_info_in_db:
                         with mock.patch.object(rx_handler, "save_message_to_db") as save_message_to_db:
-                            with mock.patch.object(rx_handler, "get_name_from_database", return_value="SAT2"):
-                                rx_handler.on_receive(packet, interface=None)
+                            rx_handler.process_packet(packet)
 
         self.assertIn(222, ui_state.channel_list)
-        self.assertIn(222, ui_state.all_messages)
-        request_ui_redraw.assert_called_once_with(channels=True)
+        self.assertEqual(ui_state.all_messages[222].texts, ["dm"])
+        # Once for the new channel, and again after un-archiving it outside the lock
+        self.assertEqual(request_ui_redraw.call_args_list, [mock.call(channels=True)] * 2)
         add_notification.assert_called_once_with(1)
         update_node_info_in_db.assert_called_once_with(222, chat_archived=False)
         save_message_to_db.assert_called_once_with(222, 222, "dm")
 
-    def test_on_receive_trims_packet_buffer_even_when_packet_is_undecoded(self) -> None:
-        ui_state.packet_buffer = list(range(25))
+    def test_process_packet_logs_formatted_record_even_when_packet_is_undecoded(self) -> None:
+        config.packet_log_size = "20"
+        ui_state.packet_buffer = deque((f"record {i}" for i in range(25)), maxlen=25)
+        ui_state.packetlog_offset = 3
         ui_state.display_log = True
         ui_state.current_window = 4
 
         with mock.patch.object(rx_handler, "request_ui_redraw") as request_ui_redraw:
-            rx_handler.on_receive({"id": "new"}, interface=None)
+            with mock.patch("contact.ui.contact_ui.get_name_from_database", return_value="SAT2"):
+                rx_handler.process_packet({"from": 222, "to": 4294967295})
 
         request_ui_redraw.assert_called_once_with(packetlog=True)
+        self.assertEqual(ui_state.packet_buffer.maxlen, 20)
         self.assertEqual(len(ui_state.packet_buffer), 20)
-        self.assertEqual(ui_state.packet_buffer[-1], {"id": "new"})
+        self.assertEqual(ui_state.packet_buffer[-1].split(), ["SAT2", "BROADCAST", "NO", "KEY", "NO", "KEY"])
+        self.assertEqual(ui_state.packetlog_offset, 4)
         self.assertTrue(menu_state.need_redraw)
+
+    def test_process_packet_records_position_and_telemetry_without_touching_the_node_entry(self) -> None:
+        node = {"num": 222, "position": {"altitude": 12}, "deviceMetrics": {"voltage": 4.1}}
+        interface_state.interface = mock.Mock(nodesByNum={222: node})
+        ui_state.node_list = [111, 222]
+        position = {"portnum": "POSITION_APP", "payload": b"", "position": {"latitudeI": 515000000, "raw": object()}}
+        telemetry = {
+            "portnum": "TELEMETRY_APP",
+            "payload": b"",
+            "telemetry": {"time": 1, "deviceMetrics": {"batteryLevel": 80}},
+        }
+
+        with mock.patch.object(rx_handler, "refresh_node_entry", return_value=None):
+            with mock.patch.object(rx_handler, "decode_payload", return_value=None) as decode_payload:
+                with mock.patch.object(rx_handler, "format_packet_log_record", return_value="record") as format_record:
+                    with mock.patch.object(rx_handler, "save_telemetry_samples") as save_telemetry_samples:
+                        rx_handler.process_packet({"from": 222, "to": 4294967295, "decoded": position})
+                        rx_handler.process_packet({"from": 222, "to": 4294967295, "rxSnr": 6.5, "decoded": telemetry})
+
+        self.assertEqual(decode_payload.call_count, 2)
+        self.assertEqual(
+            save_telemetry_samples.call_args_list,
+            [mock.call(222, {"latitude": 51.5}), mock.call(222, {"batteryLevel": 80, "snr": 6.5})],
+        )
+        format_record.assert_called_with(mock.ANY, None)
+        # The interface owns its node entries and updates them on its own thread
+        self.assertEqual(node, {"num": 222, "position": {"altitude": 12}, "deviceMetrics": {"voltage": 4.1}})
+        self.assertEqual(ui_state.dirty_node_rows, {1})
+
+    def test_registered_port_handler_runs_follow_up_after_releasing_lock(self) -> None:
+        calls = []
+
+        def apply(packet, message):
+            calls.append(("apply", rx_handler.app_state.lock.locked()))
+            return lambda: calls.append(("follow_up", rx_handler.app_state.lock.locked()))
+
+        with mock.patch.dict(rx_handler.PORT_HANDLERS, clear=True):
+            prepare = lambda packet, message: calls.append(("prepare", rx_handler.app_state.lock.locked()))
+            rx_handler.register_port_handler("RANGE_TEST_APP", apply, prepare=prepare)
+            with mock.patch.object(rx_handler, "refresh_node_entry", return_value=None):
+                with mock.patch.object(rx_handler, "format_packet_log_record", return_value="record"):
+                    rx_handler.process_packet({"from": 222, "decoded": {"portnum": "RANGE_TEST_APP", "payload": b"1"}})
+
+        self.assertEqual(calls, [("prepare", False), ("apply", True), ("follow_up", False)])
+
+    def test_on_receive_queues_packet_for_worker(self) -> None:
+        packet = {"from": 222, "to": 111}
+
+        with mock.patch.object(rx_handler, "process_packet") as process_packet:
+            with mock.patch.object(rx_handler.app_state, "lock") as lock:
+                rx_handler.on_receive(packet, interface=None)
+                rx_handler.stop_packet_worker()
+
+        # The reader thread never touches the UI lock; the worker handles the packet
+        lock.__enter__.assert_not_called()
+        process_packet.assert_called_once_with(packet)
+
+    def test_queue_packet_handler_runs_handlers_in_order_with_received_packets(self) -> None:
+        calls = []
+        received = {"from": 222}
+        response = {"from": 333}
+
+        with mock.patch.object(rx_handler, "process_packet", side_effect=lambda packet: calls.append(("rx", packet))):
+            rx_handler.on_receive(received, interface=None)
+            rx_handler.queue_packet_handler(lambda packet: calls.append(("response", packet)), response)
+            rx_handler.stop_packet_worker()
+
+        self.assertEqual(calls, [("rx", received), ("response", response)])
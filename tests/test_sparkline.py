@@ -0,0 +1,28 @@
+import unittest
+from array import array
+
+from contact.utilities.sparkline import bucket_means, render_sparkline
+
+
+class SparklineTests(unittest.TestCase):
+    def test_bucket_means_weights_rollups_and_skips_points_outside_the_range(self) -> None:
+        timestamps = array("q", [0, 5, 10, 35, 40, -1])
+        totals = array("d", [10, 20, 90, 7, 1, 99])
+        weights = array("d", [1, 1, 3, 1, 1, 1])
+
+        self.assertEqual(bucket_means(timestamps, totals, weights, 0, 40, 4), [15.0, 30.0, None, 7.0])
+
+    def test_render_sparkline_scales_between_min_and_max_and_leaves_gaps(self) -> None:
+        self.assertEqual(render_sparkline([0.0, None, 3.5, 7.0]), "▁ ▅█")
+        self.assertEqual(render_sparkline([2.0, 2.0, None]), "▄▄ ")
+        self.assertEqual(render_sparkline([None, None]), "  ")
+
+    def test_bucket_means_handles_thousands_of_samples(self) -> None:
+        timestamps = array("q", range(0, 86400, 10))
+        values = array("d", (float(i % 100) for i in range(len(timestamps))))
+        weights = array("d", [1.0]) * len(timestamps)
+
+        means = bucket_means(timestamps, values, weights, 0, 86400, 24)
+
+        self.assertEqual(len(means), 24)
+        self.assertTrue(all(value is not None and 0 <= value < 100 for value in means))
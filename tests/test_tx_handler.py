@@ -4,8 +4,8 @@ from unittest import mock
 
 from meshtastic import BROADCAST_NUM
 
-import contact.ui.default_config as config
 from contact.message_handlers import tx_handler
+from contact.utilities.message_store import ACK_IMPLICIT, ACK_OK, KIND_SENT, NO_HOPS, MessageStore
 from contact.utilities.singleton import interface_state, ui_state
 
 from tests.test_support import reset_singletons, restore_config, snapshot_config
@@ -28,11 +28,10 @@ class TxHandlerTests(unittest.TestCase):
         interface_state.interface = interface
         interface_state.myNodeNum = 111
         ui_state.channel_list = ["Primary"]
-        ui_state.all_messages = {"Primary": []}
+        ui_state.all_messages = {"Primary": MessageStore()}
 
         with mock.patch.object(tx_handler, "save_message_to_db", return_value=999) as save_message_to_db:
-            with mock.patch("contact.message_handlers.tx_handler.time.strftime", return_value="[00:00:00] "):
-                tx_handler.send_message("hello", channel=0)
+            tx_handler.send_message("hello", channel=0)
 
         interface.sendText.assert_called_once_with(
             text="hello",
@@ -42,11 +41,11 @@ class TxHandlerTests(unittest.TestCase):
             onResponse=tx_handler.onAckNak,
             channelIndex=0,
         )
-        save_message_to_db.assert_called_once_with("Primary", 111, "hello")
+        save_message_to_db.assert_called_once_with("Primary", 111, "hello", packet_id="req-1")
         self.assertEqual(tx_handler.ack_naks["req-1"]["channel"], "Primary")
-        self.assertEqual(tx_handler.ack_naks["req-1"]["messageIndex"], 1)
-        self.assertEqual(tx_handler.ack_naks["req-1"]["timestamp"], 999)
-        self.assertEqual(ui_state.all_messages["Primary"][-1][1], "hello")
+        self.assertEqual(tx_handler.ack_naks["req-1"]["row"], 0)
+        self.assertEqual(ui_state.all_messages["Primary"].texts, ["hello"])
+        self.assertEqual(ui_state.all_messages["Primary"].kinds[0], KIND_SENT)
 
     def test_send_message_to_direct_node_uses_node_as_destination(self) -> None:
         interface = mock.Mock()
@@ -54,11 +53,10 @@ class TxHandlerTests(unittest.TestCase):
         interface_state.interface = interface
         interface_state.myNodeNum = 111
         ui_state.channel_list = [222]
-        ui_state.all_messages = {222: []}
+        ui_state.all_messages = {222: MessageStore()}
 
         with mock.patch.object(tx_handler, "save_message_to_db", return_value=123):
-            with mock.patch("contact.message_handlers.tx_handler.time.strftime", return_value="[00:00:00] "):
-                tx_handler.send_message("dm", channel=0)
+            tx_handler.send_message("dm", channel=0)
 
         interface.sendText.assert_called_once_with(
             text="dm",
@@ -74,34 +72,53 @@ class TxHandlerTests(unittest.TestCase):
         interface_state.myNodeNum = 111
         ui_state.channel_list = ["Primary"]
         ui_state.selected_channel = 0
-        ui_state.all_messages = {"Primary": [("pending", "hello")]}
-        tx_handler.ack_naks["req"] = {"channel": "Primary", "messageIndex": 0, "timestamp": 55}
+        store = MessageStore()
+        row_id = store.append(1700000000, 111, "hello", kind=KIND_SENT)
+        store.prepend([(1600000000, 222, "older", 0, 0, NO_HOPS)])  # Row ids stay valid when history is prepended
+        ui_state.all_messages = {"Primary": store}
+        tx_handler.ack_naks["req"] = {"channel": "Primary", "row": row_id}
 
         packet = {"from": 222, "decoded": {"requestId": "req", "routing": {"errorReason": "NONE"}}}
 
         with mock.patch.object(tx_handler, "update_ack_nak") as update_ack_nak:
-            with mock.patch("contact.message_handlers.tx_handler.time.strftime", return_value="[01:02:03] "):
-                with mock.patch("contact.ui.contact_ui.request_ui_redraw") as request_ui_redraw:
-                    tx_handler.onAckNak(packet)
+            with mock.patch("contact.ui.contact_ui.request_ui_redraw") as request_ui_redraw:
+                tx_handler._apply_ack_nak(packet)
 
-        update_ack_nak.assert_called_once_with("Primary", 55, "hello", "Ack")
+        update_ack_nak.assert_called_once_with("req", "Ack")
         request_ui_redraw.assert_called_once_with(messages=True)
-        self.assertIn(config.sent_message_prefix, ui_state.all_messages["Primary"][0][0])
-        self.assertIn(config.ack_str, ui_state.all_messages["Primary"][0][0])
+        self.assertEqual(list(store.acks), [0, ACK_OK])
+        self.assertEqual(store.dirty_rows, {row_id})
 
     def test_on_ack_nak_uses_implicit_marker_for_self_ack(self) -> None:
         interface_state.myNodeNum = 111
         ui_state.channel_list = ["Primary"]
         ui_state.selected_channel = 0
-        ui_state.all_messages = {"Primary": [("pending", "hello")]}
-        tx_handler.ack_naks["req"] = {"channel": "Primary", "messageIndex": 0, "timestamp": 55}
+        store = MessageStore()
+        row_id = store.append(1700000000, 111, "hello", kind=KIND_SENT)
+        ui_state.all_messages = {"Primary": store}
+        tx_handler.ack_naks["req"] = {"channel": "Primary", "row": row_id}
 
         packet = {"from": 111, "decoded": {"requestId": "req", "routing": {"errorReason": "NONE"}}}
 
         with mock.patch.object(tx_handler, "update_ack_nak") as update_ack_nak:
-            with mock.patch("contact.message_handlers.tx_handler.time.strftime", return_value="[01:02:03] "):
-                with mock.patch("contact.ui.contact_ui.request_ui_redraw"):
-                    tx_handler.onAckNak(packet)
-
-        update_ack_nak.assert_called_once_with("Primary", 55, "hello", "Implicit")
-        self.assertIn(config.ack_implicit_str, ui_state.all_messages["Primary"][0][0])
+            with mock.patch("contact.ui.contact_ui.request_ui_redraw"):
+                tx_handler._apply_ack_nak(packet)
+
+        update_ack_nak.assert_called_once_with("req", "Implicit")
+        self.assertEqual(store.acks[0], ACK_IMPLICIT)
+
+    def test_response_callbacks_hand_packets_to_the_ingest_worker(self) -> None:
+        packet = {"from": 222, "decoded": {"requestId": "req"}}
+
+        for callback, handler in (
+            (tx_handler.onAckNak, tx_handler._apply_ack_nak),
+            (tx_handler.on_response_traceroute, tx_handler._apply_traceroute_response),
+        ):
+            with self.subTest(callback=callback.__name__):
+                with mock.patch("contact.message_handlers.rx_handler.queue_packet_handler") as queue_packet_handler:
+                    with mock.patch.object(tx_handler.app_state, "lock") as lock:
+                        callback(packet)
+
+                # The reader thread never touches the UI lock
+                lock.__enter__.assert_not_called()
+                queue_packet_handler.assert_called_once_with(handler, packet)
@@ -1,10 +1,20 @@
 import unittest
 from unittest import mock
 
+from meshtastic.protobuf import mesh_pb2
+
 import contact.ui.default_config as config
 from contact.utilities.demo_data import DEMO_LOCAL_NODE_NUM, build_demo_interface
 from contact.utilities.singleton import interface_state, ui_state
-from contact.utilities.utils import add_new_message, get_channels, get_node_list, parse_protobuf
+from contact.utilities.message_store import ACK_UNKNOWN, KIND_RECEIVED, KIND_SENT, NO_DB_ID, NO_HOPS, MessageStore
+from contact.utilities.utils import (
+    add_new_message,
+    decode_payload,
+    get_channels,
+    get_node_list,
+    parse_protobuf,
+    refresh_node_entry,
+)
 
 from tests.test_support import reset_singletons, restore_config, snapshot_config
 
@@ -29,24 +39,34 @@ class UtilsTests(unittest.TestCase):
         self.assertEqual(node_list[0], DEMO_LOCAL_NODE_NUM)
         self.assertEqual(node_list[-1], 0xA1000008)
 
-    def test_add_new_message_groups_messages_by_hour(self) -> None:
-        ui_state.all_messages = {"MediumFast": []}
-
-        with mock.patch("contact.utilities.utils.time.time", side_effect=[1000, 1000]):
-            with mock.patch("contact.utilities.utils.time.strftime", return_value="[00:16:40] "):
-                with mock.patch("contact.utilities.utils.datetime.datetime") as mocked_datetime:
-                    mocked_datetime.fromtimestamp.return_value.strftime.return_value = "2025-02-04 17:00"
-                    add_new_message("MediumFast", ">> Test: ", "First")
-                    add_new_message("MediumFast", ">> Test: ", "Second")
-
-        self.assertEqual(
-            ui_state.all_messages["MediumFast"],
-            [
-                ("-- 2025-02-04 17:00 --", ""),
-                ("[00:16:40] >> Test: ", "First"),
-                ("[00:16:40] >> Test: ", "Second"),
-            ],
-        )
+    def test_refresh_node_entry_builds_index_then_moves_single_nodes(self) -> None:
+        config.node_sort = "lastHeard"
+        interface = build_demo_interface()
+        interface_state.interface = interface
+        interface_state.myNodeNum = DEMO_LOCAL_NODE_NUM
+        ui_state.node_list = get_node_list()
+
+        self.assertIsNone(refresh_node_entry(0xA1000005))
+        node_list = ui_state.node_list
+
+        interface.nodesByNum[0xA1000005]["lastHeard"] += 10_000
+        moved_rows = refresh_node_entry(0xA1000005)
+
+        self.assertIs(ui_state.node_list, node_list)
+        self.assertEqual(node_list[moved_rows[0]], 0xA1000005)
+        self.assertEqual(node_list, get_node_list())
+
+    def test_add_new_message_appends_to_channel_store(self) -> None:
+        ui_state.all_messages = {}
+
+        with mock.patch("contact.utilities.utils.time.time", side_effect=[1000.5, 1001.0]):
+            first = add_new_message("MediumFast", 111, "First")
+            second = add_new_message("MediumFast", 222, "Second", kind=KIND_SENT, hops=2)
+
+        store = ui_state.all_messages["MediumFast"]
+        self.assertEqual((first, second), (0, 1))
+        self.assertEqual(store.row(0), (1000, 111, "First", KIND_RECEIVED, ACK_UNKNOWN, NO_HOPS, NO_DB_ID))
+        self.assertEqual(store.row(1), (1001, 222, "Second", KIND_SENT, ACK_UNKNOWN, 2, NO_DB_ID))
 
     def test_get_channels_populates_message_buckets_for_device_channels(self) -> None:
         interface_state.interface = build_demo_interface()
@@ -65,11 +85,8 @@ class UtilsTests(unittest.TestCase):
         interface.localNode.channels[0].settings.name = "Renamed Channel"
         interface_state.interface = interface
         ui_state.channel_list = ["MediumFast", "Another Channel", 2701131788]
-        ui_state.all_messages = {
-            "MediumFast": [("prefix", "first")],
-            "Another Channel": [("prefix", "second")],
-            2701131788: [("prefix", "dm")],
-        }
+        stores = {"MediumFast": MessageStore(), "Another Channel": MessageStore(), 2701131788: MessageStore()}
+        ui_state.all_messages = dict(stores)
         ui_state.selected_channel = 2
 
         channels = get_channels()
@@ -77,9 +94,9 @@ class UtilsTests(unittest.TestCase):
         self.assertEqual(channels[0], "Renamed Channel")
         self.assertEqual(channels[1], "Another Channel")
         self.assertEqual(channels[2], 2701131788)
-        self.assertEqual(ui_state.all_messages["Renamed Channel"], [("prefix", "first")])
-        self.assertEqual(ui_state.all_messages["Another Channel"], [("prefix", "second")])
-        self.assertEqual(ui_state.all_messages[2701131788], [("prefix", "dm")])
+        self.assertIs(ui_state.all_messages["Renamed Channel"], stores["MediumFast"])
+        self.assertIs(ui_state.all_messages["Another Channel"], stores["Another Channel"])
+        self.assertIs(ui_state.all_messages[2701131788], stores[2701131788])
         self.assertNotIn("MediumFast", ui_state.all_messages)
 
     def test_parse_protobuf_returns_string_payload_unchanged(self) -> None:
@@ -91,3 +108,16 @@ class UtilsTests(unittest.TestCase):
         packet = {"decoded": {"portnum": "TEXT_MESSAGE_APP", "payload": b"hello"}}
 
         self.assertEqual(parse_protobuf(packet), "✉️")
+
+    def test_decode_payload_reuses_message_parsed_by_interface(self) -> None:
+        position = mesh_pb2.Position(latitude_i=515000000, longitude_i=-1000000)
+        packet = {"decoded": {"portnum": "POSITION_APP", "payload": position.SerializeToString()}}
+
+        parsed = decode_payload(packet)
+        self.assertEqual(parsed, position)
+        self.assertIsNot(parsed, position)
+
+        packet["decoded"]["position"] = {"latitudeI": 515000000, "raw": position}
+        self.assertIs(decode_payload(packet), position)
+        self.assertIn("51.5", parse_protobuf(packet, position))
+        self.assertIsNone(decode_payload({"decoded": {"portnum": "TEXT_MESSAGE_APP", "payload": b"hi"}}))